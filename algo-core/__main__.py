@@ -16,10 +16,11 @@ limitations under the License.
 
 from src.read_input import read_input_files
 from src.process_input import process_input_data
-from src.solve_model import generate_solution
+from src.solve_model import generate_solution, get_output_folder
+from src.metrics import write_metrics
 
 # Read input:
-[input_json, sr_onboarding, sr_mentors] = read_input_files()
+[input_json, sr_onboarding, sr_mentors, previous_outputs] = read_input_files()
 
 # Transform input:
 [df_agents, agent_categories, config] = process_input_data(
@@ -27,6 +28,11 @@ from src.solve_model import generate_solution
 )
 
 # Configure, solve and save model:
-solution = generate_solution(df_agents, agent_categories, config)
+solution = generate_solution(
+    df_agents, agent_categories, config, previous_outputs
+)
+
+# Save timings of the phases of the run:
+write_metrics(get_output_folder(config))
 
 # TODO: configure functionality for volunteered shifts.
@@ -0,0 +1,7 @@
+"""
+Benchmarks for the core scheduling algorithm.
+
+Run from within the algo-core directory, e.g.:
+
+    python -m benchmarks.model_build
+"""
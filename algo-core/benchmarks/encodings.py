@@ -0,0 +1,159 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import time
+from ortools.sat.python import cp_model
+
+from src.process_input import process_input_data
+from src.solve_model import ObjectiveTracker, setup_model
+from .synthetic import generate_input, empty_handle_series
+
+# Model encodings and switches, selectable with these input options, and
+# their values:
+encodings = {
+    "fairShareEncoding": ["multiplication", "element", "tangents"],
+    "durationCostEncoding": ["reified", "element"],
+    "slotCostEncoding": ["per_slot", "prefix_sums"],
+    "agentDistributionEncoding": ["slots", "cumulative"],
+    "hoursCoverageEncoding": ["slots", "durations", "durations_linked"],
+    "symmetryBreaking": [False, True],
+}
+
+
+def time_encoding(
+    option,
+    value,
+    num_agents,
+    options=None,
+    timeout=60,
+    seed=0,
+    num_distribution_blocks=0,
+):
+    """Build and solve a synthetic input with the given encoding option.
+
+    Reports build time, time to the first feasible solution, total solve
+    time, and the objective and bound reached.
+    """
+    input_json = generate_input(
+        num_agents=num_agents,
+        num_distribution_blocks=num_distribution_blocks,
+        seed=seed,
+    )
+    input_json["options"].update(options or {})
+    input_json["options"][option] = value
+    with contextlib.redirect_stdout(io.StringIO()):
+        [df_agents, agent_categories, config] = process_input_data(
+            input_json, empty_handle_series(), empty_handle_series()
+        )
+        start = time.perf_counter()
+        [model, _, _, full_cost_list] = setup_model(
+            df_agents, agent_categories, config
+        )
+        model.Minimize(sum(full_cost_list))
+        build_time = time.perf_counter() - start
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = timeout
+    solver.parameters.num_search_workers = 8
+    solver.parameters.random_seed = seed
+    timer = ObjectiveTracker()
+    status = solver.Solve(model, timer)
+    proto = model.Proto()
+    is_solved = status in [cp_model.OPTIMAL, cp_model.FEASIBLE]
+    return {
+        "encoding": value,
+        "agents": len(agent_categories["veterans"]),
+        "variables": len(proto.variables),
+        "constraints": len(proto.constraints),
+        "build_time": build_time,
+        "first_solution_time": timer.first_solution_time,
+        "solve_time": solver.WallTime(),
+        "status": solver.StatusName(status),
+        "objective": solver.ObjectiveValue() if is_solved else None,
+        "bound": solver.BestObjectiveBound() if is_solved else None,
+    }
+
+
+def main():
+    """Compare the values of an encoding option on synthetic rosters."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("option", choices=list(encodings))
+    parser.add_argument(
+        "--values", nargs="+", help="Values to compare (default: all)"
+    )
+    parser.add_argument("--agents", type=int, nargs="+", default=[20, 40])
+    parser.add_argument("--tracks", type=int, nargs="+", default=[1])
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0])
+    parser.add_argument(
+        "--blocks",
+        type=int,
+        default=0,
+        help="agentDistribution rules per day (default: one for all days)",
+    )
+    parser.add_argument(
+        "--options",
+        type=json.loads,
+        default={},
+        help="Extra input options as JSON, e.g. '{\"sparseModel\": true}'",
+    )
+    args = parser.parse_args()
+    values = [
+        value
+        for value in encodings[args.option]
+        if args.values is None or str(value) in args.values
+    ]
+
+    print(
+        f"{'encoding':>17}{'agents':>7}{'tracks':>7}{'seed':>5}{'vars':>9}"
+        f"{'cons':>9}"
+        f"{'build [s]':>11}{'first [s]':>11}{'solve [s]':>11}"
+        f"{'status':>10}{'objective':>11}{'bound':>9}"
+    )
+    for num_agents, tracks, seed in itertools.product(
+        args.agents, args.tracks, args.seeds
+    ):
+        for value in values:
+            result = time_encoding(
+                args.option,
+                value,
+                num_agents,
+                {**args.options, "maxShiftsPerAgentPerDay": tracks},
+                args.timeout,
+                seed,
+                args.blocks,
+            )
+            first = result["first_solution_time"]
+            print(
+                f"{str(result['encoding']):>17}"
+                f"{result['agents']:>7}{tracks:>7}"
+                f"{seed:>5}{result['variables']:>9}"
+                f"{result['constraints']:>9}"
+                f"{result['build_time']:>11.2f}"
+                f"{first if first is not None else float('nan'):>11.2f}"
+                f"{result['solve_time']:>11.2f}{result['status']:>10}"
+                f"{str(result['objective']):>11}"
+                f"{str(result['bound']):>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import time
+from ortools.sat.python import cp_model
+
+from src.process_input import process_input_data
+from src.solve_model import (
+    ObjectiveTracker,
+    setup_model,
+    veteran_formulations,
+)
+from .synthetic import generate_input, empty_handle_series
+
+
+def time_formulation(
+    formulation,
+    num_agents,
+    max_shifts_per_agent_per_day,
+    options=None,
+    timeout=60,
+    hours=(8, 25),
+    seed=0,
+):
+    """Build and solve a synthetic input with the given veteran formulation.
+
+    Reports build time, time to the first feasible solution, total solve
+    time (which is the time to proven optimality, if status is OPTIMAL)
+    and the objective reached.
+    """
+    input_json = generate_input(
+        num_agents=num_agents,
+        max_shifts_per_agent_per_day=max_shifts_per_agent_per_day,
+        start_hour=hours[0],
+        end_hour=hours[1],
+        seed=seed,
+    )
+    input_json["options"].update(options or {})
+    input_json["options"]["veteranFormulation"] = formulation
+    with contextlib.redirect_stdout(io.StringIO()):
+        [df_agents, agent_categories, config] = process_input_data(
+            input_json, empty_handle_series(), empty_handle_series()
+        )
+        start = time.perf_counter()
+        [model, _, _, full_cost_list] = setup_model(
+            df_agents, agent_categories, config
+        )
+        model.Minimize(sum(full_cost_list))
+        build_time = time.perf_counter() - start
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = timeout
+    solver.parameters.num_search_workers = 8
+    timer = ObjectiveTracker()
+    status = solver.Solve(model, timer)
+    proto = model.Proto()
+    return {
+        "formulation": formulation,
+        "agents": len(agent_categories["veterans"]),
+        "tracks": max_shifts_per_agent_per_day,
+        "variables": len(proto.variables),
+        "constraints": len(proto.constraints),
+        "build_time": build_time,
+        "first_solution_time": timer.first_solution_time,
+        "solve_time": solver.WallTime(),
+        "status": solver.StatusName(status),
+        "objective": (
+            solver.ObjectiveValue()
+            if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]
+            else None
+        ),
+    }
+
+
+def main():
+    """Compare the veteran formulations on synthetic rosters."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agents", type=int, nargs="+", default=[20, 40])
+    parser.add_argument("--tracks", type=int, nargs="+", default=[1, 2])
+    parser.add_argument(
+        "--formulations",
+        nargs="+",
+        default=list(veteran_formulations),
+        choices=list(veteran_formulations),
+    )
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument(
+        "--hours",
+        type=int,
+        nargs=2,
+        default=[8, 25],
+        help="Start and end of support hours",
+    )
+    parser.add_argument(
+        "--options",
+        type=json.loads,
+        default={},
+        help="Extra input options as JSON, e.g. '{\"sparseModel\": true}'",
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'formulation':>12}{'agents':>7}{'tracks':>7}{'vars':>9}"
+        f"{'build [s]':>11}{'first [s]':>11}{'solve [s]':>11}"
+        f"{'status':>10}{'objective':>11}"
+    )
+    for num_agents in args.agents:
+        for tracks in args.tracks:
+            for formulation in args.formulations:
+                result = time_formulation(
+                    formulation,
+                    num_agents,
+                    tracks,
+                    args.options,
+                    args.timeout,
+                    args.hours,
+                )
+                first = result["first_solution_time"]
+                print(
+                    f"{result['formulation']:>12}{result['agents']:>7}"
+                    f"{result['tracks']:>7}{result['variables']:>9}"
+                    f"{result['build_time']:>11.2f}"
+                    f"{first if first is not None else float('nan'):>11.2f}"
+                    f"{result['solve_time']:>11.2f}{result['status']:>10}"
+                    f"{str(result['objective']):>11}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import time
+import jsonschema
+from ortools.sat.python import cp_model
+
+from src.read_input import get_project_root
+from src.process_input import process_input_data
+from src.custom_var_domains import define_custom_var_domains
+from src.greedy import (
+    calculate_schedule_cost,
+    construct_greedy_schedule,
+    find_schedule_violations,
+)
+from src.hints import add_schedule_hints, find_agent_day_shifts
+from src.solve_model import ObjectiveTracker, coefficients, setup_model
+from .synthetic import generate_input, empty_handle_series
+
+
+def find_historical_inputs():
+    """Find the scheduler inputs in logs/ that are valid for this version.
+
+    Older inputs that no longer validate against the schema are skipped.
+    """
+    input_json_schema = json.load(
+        open(
+            get_project_root()
+            / "lib/schemas/support-shift-scheduler-input.schema.json"
+        )
+    )
+    inputs = {}
+    for path in sorted(
+        (get_project_root() / "logs").glob(
+            "*/support-shift-scheduler-input.json"
+        )
+    ):
+        input_json = json.load(open(path))
+        try:
+            jsonschema.validate(input_json, input_json_schema)
+        except jsonschema.exceptions.ValidationError:
+            print(f"Skipping {path.parent.name}: input is not valid.")
+            continue
+        inputs[path.parent.name] = input_json
+    return inputs
+
+
+def solve(df_agents, agent_categories, config, timeout, schedule=None):
+    """Solve the model, optionally hinted with a schedule."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        [model, var_veterans, _, full_cost_list] = setup_model(
+            df_agents, agent_categories, config
+        )
+        if schedule is not None:
+            add_schedule_hints(
+                model,
+                var_veterans,
+                find_agent_day_shifts(schedule, agent_categories, config),
+                coefficients,
+                df_agents,
+                agent_categories,
+                config,
+            )
+    model.Minimize(sum(full_cost_list))
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = timeout
+    solver.parameters.num_search_workers = 8
+    timer = ObjectiveTracker()
+    status = solver.Solve(model, timer)
+    is_solved = status in [cp_model.OPTIMAL, cp_model.FEASIBLE]
+    return {
+        "status": solver.StatusName(status),
+        "objective": solver.ObjectiveValue() if is_solved else None,
+        "bound": solver.BestObjectiveBound() if is_solved else None,
+        "first_solution_time": timer.first_solution_time,
+    }
+
+
+def evaluate_greedy(input_json, timeout, hint):
+    """Compare the greedy schedule for an input with the solver's result.
+
+    Onboarders are left out, as the heuristic doesn't schedule them.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        [df_agents, agent_categories, config] = process_input_data(
+            input_json, empty_handle_series(), empty_handle_series()
+        )
+    custom_domains = define_custom_var_domains(coefficients, df_agents, config)
+    start = time.perf_counter()
+    schedule = construct_greedy_schedule(
+        custom_domains, coefficients, df_agents, agent_categories, config
+    )
+    greedy_time = time.perf_counter() - start
+    violations = find_schedule_violations(
+        schedule,
+        custom_domains,
+        coefficients,
+        df_agents,
+        agent_categories,
+        config,
+    )
+    result = {
+        "agents": len(agent_categories["veterans"]),
+        "greedy_time": greedy_time,
+        "greedy_feasible": not violations,
+        "greedy_cost": calculate_schedule_cost(
+            schedule, coefficients, df_agents, agent_categories, config
+        ),
+    }
+    if timeout > 0:
+        result["solver"] = solve(df_agents, agent_categories, config, timeout)
+        if hint:
+            result["hinted_solver"] = solve(
+                df_agents, agent_categories, config, timeout, schedule
+            )
+    return result
+
+
+def main():
+    """Report feasibility and cost of greedy schedules vs the solver."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agents", type=int, nargs="+", default=[20, 40, 60])
+    parser.add_argument("--tracks", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=60,
+        help="Solver time limit for comparison (0 to skip the solver)",
+    )
+    parser.add_argument(
+        "--hint",
+        action="store_true",
+        help="Also solve with the greedy schedule as solution hint",
+    )
+    args = parser.parse_args()
+
+    inputs = find_historical_inputs()
+    for num_agents in args.agents:
+        for tracks in args.tracks:
+            for seed in range(args.seeds):
+                inputs[f"synthetic-{num_agents}-{tracks}-{seed}"] = (
+                    generate_input(
+                        num_agents=num_agents,
+                        max_shifts_per_agent_per_day=tracks,
+                        seed=seed,
+                    )
+                )
+
+    print(
+        f"{'input':>20}{'agents':>7}{'greedy [ms]':>13}{'feasible':>10}"
+        f"{'greedy':>8}{'solver':>8}{'bound':>8}{'gap':>8}"
+        f"{'hinted':>8}{'first [s]':>11}"
+    )
+    num_feasible = 0
+    for name, input_json in inputs.items():
+        result = evaluate_greedy(input_json, args.timeout, args.hint)
+        num_feasible += result["greedy_feasible"]
+        solver = result.get("solver", {})
+        hinted = result.get("hinted_solver", {})
+        gap = (
+            f"{result['greedy_cost'] / solver['objective'] - 1:.0%}"
+            if solver.get("objective")
+            else "-"
+        )
+        print(
+            f"{name:>20}{result['agents']:>7}"
+            f"{result['greedy_time'] * 1000:>13.0f}"
+            f"{str(result['greedy_feasible']):>10}"
+            f"{result['greedy_cost']:>8}"
+            f"{str(solver.get('objective', '-')):>8}"
+            f"{str(solver.get('bound', '-')):>8}{gap:>8}"
+            f"{str(hinted.get('objective', '-')):>8}"
+            f"{str(solver.get('first_solution_time', '-'))[:5]:>11}"
+        )
+    print(
+        f"\nGreedy schedule feasible for {num_feasible}/{len(inputs)} inputs."
+    )
+
+
+if __name__ == "__main__":
+    main()
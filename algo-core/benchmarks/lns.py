@@ -0,0 +1,94 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+from ortools.sat.python import cp_model
+
+from src.lns import run_lns
+from src.process_input import process_input_data
+from src.solve_model import ObjectiveTracker, setup_model
+from .synthetic import generate_input, empty_handle_series
+
+
+def objective_at(progress, wall_time):
+    """Best objective found up to the given wall time, if any."""
+    objectives = [objective for t, objective in progress if t <= wall_time]
+    return min(objectives) if objectives else None
+
+
+def compare_lns(num_agents, timeout, options, seed):
+    """Return the objective progress of a monolithic and an LNS solve."""
+    input_json = generate_input(num_agents=num_agents, seed=seed)
+    input_json["options"]["optimizationTimeout"] = timeout / 3600
+    input_json["options"].update(options)
+    with contextlib.redirect_stdout(io.StringIO()):
+        [df_agents, agent_categories, config] = process_input_data(
+            input_json, empty_handle_series(), empty_handle_series()
+        )
+        [model, var_veterans, _, full_cost_list] = setup_model(
+            df_agents, agent_categories, config
+        )
+    model.Minimize(sum(full_cost_list))
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = timeout
+    solver.parameters.num_search_workers = 8
+    tracker = ObjectiveTracker()
+    solver.Solve(model, tracker)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        [_, _, lns_progress] = run_lns(
+            model, var_veterans, df_agents, agent_categories, config
+        )
+    return {"monolithic": tracker.progress, "lns": lns_progress}
+
+
+def main():
+    """Compare objective over wall time of LNS and a monolithic solve."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agents", type=int, nargs="+", default=[40, 60])
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--options",
+        type=json.loads,
+        default={},
+        help="Extra input options as JSON, e.g. LNS workers and timeout",
+    )
+    args = parser.parse_args()
+
+    checkpoints = [args.timeout * x for x in (0.125, 0.25, 0.5, 1)]
+    print(
+        f"{'agents':>7}{'mode':>12}"
+        + "".join(f"{f'{t:.0f} s':>10}" for t in checkpoints)
+    )
+    for num_agents in args.agents:
+        result = compare_lns(num_agents, args.timeout, args.options, args.seed)
+        for mode, progress in result.items():
+            print(
+                f"{num_agents:>7}{mode:>12}"
+                + "".join(
+                    f"{str(objective_at(progress, t)):>10}"
+                    for t in checkpoints
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
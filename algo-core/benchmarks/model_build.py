@@ -0,0 +1,98 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import time
+from ortools.sat.python import cp_model
+
+from src.process_input import process_input_data
+from src.custom_var_domains import define_custom_var_domains
+from src.veterans import setup_model_veterans
+from src.solve_model import coefficients
+from .synthetic import generate_input, empty_handle_series
+
+
+def time_model_build(
+    num_agents, max_shifts_per_agent_per_day, options=None, seed=0
+):
+    """Time the construction of the veteran model for a synthetic input.
+
+    Any options given are added to the input's options (e.g. sparseModel).
+    """
+    input_json = generate_input(
+        num_agents=num_agents,
+        max_shifts_per_agent_per_day=max_shifts_per_agent_per_day,
+        seed=seed,
+    )
+    input_json["options"].update(options or {})
+    # The pipeline is chatty; keep the benchmark output readable:
+    with contextlib.redirect_stdout(io.StringIO()):
+        [df_agents, agent_categories, config] = process_input_data(
+            input_json, empty_handle_series(), empty_handle_series()
+        )
+        start = time.perf_counter()
+        custom_domains = define_custom_var_domains(
+            coefficients, df_agents, config
+        )
+        model = cp_model.CpModel()
+        setup_model_veterans(
+            model,
+            custom_domains,
+            coefficients,
+            df_agents,
+            agent_categories,
+            config,
+        )
+        build_time = time.perf_counter() - start
+    proto = model.Proto()
+    return {
+        "agents": len(agent_categories["veterans"]),
+        "tracks": max_shifts_per_agent_per_day,
+        "build_time": build_time,
+        "variables": len(proto.variables),
+        "constraints": len(proto.constraints),
+    }
+
+
+def main():
+    """Print model build times for a range of synthetic roster sizes."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agents", type=int, nargs="+", default=[20, 40, 60])
+    parser.add_argument("--tracks", type=int, nargs="+", default=[1, 2])
+    parser.add_argument(
+        "--options",
+        type=json.loads,
+        default={},
+        help="Extra input options as JSON, e.g. '{\"sparseModel\": true}'",
+    )
+    args = parser.parse_args()
+
+    print(f"{'agents':>7}{'tracks':>7}{'build [s]':>11}{'vars':>9}{'cons':>9}")
+    for num_agents in args.agents:
+        for tracks in args.tracks:
+            result = time_model_build(num_agents, tracks, args.options)
+            print(
+                f"{result['agents']:>7}{result['tracks']:>7}"
+                f"{result['build_time']:>11.2f}"
+                f"{result['variables']:>9}{result['constraints']:>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import argparse
+import concurrent.futures
+import datetime
+import json
+import multiprocessing
+import os
+import sys
+from pathlib import Path
+import ortools
+
+from src.read_input import (
+    filename_input,
+    get_project_root,
+    read_json_input,
+    read_onboarding_files,
+    validate_json,
+)
+from src.process_input import process_input_data
+from src.solve_model import generate_solution
+from src.metrics import get_metrics, root_phase, write_metrics
+from .scaling import get_commit
+
+# Historical replay: every archived input under logs/<date>_<model>/ is run
+# through the full pipeline (read_input -> process_input_data ->
+# generate_solution), with a fixed seed and time budget, and the results are
+# compared against a stored baseline. Any week that regresses beyond the
+# thresholds makes the run exit with a non-zero status, so that it can be
+# used as a gate for changes to the model or solver settings.
+
+results_folder = Path(__file__).parent / "results"
+
+
+def find_archived_inputs(logs_folder, weeks=None):
+    """List the (week, input path) of the archived inputs in logs."""
+    return [
+        (path.parent.name, path)
+        for path in sorted(Path(logs_folder).glob(f"*/{filename_input}"))
+        if weeks is None or path.parent.name in weeks
+    ]
+
+
+def get_phase_seconds(*names):
+    """Return the total seconds of the given top-level phases."""
+    return sum(
+        root_phase["phases"][name]["seconds"]
+        for name in names
+        if name in root_phase["phases"]
+    )
+
+
+def replay_week(input_path, output_folder, time_budget, seed, options):
+    """Replay an archived week; to be run in a fresh process.
+
+    Outputs, the solver log and metrics are written to output_folder, so
+    that the archived outputs are left untouched.
+    """
+    output_folder.mkdir(parents=True, exist_ok=True)
+    # Redirect the process's stdout, including the solver's log (which is
+    # written by the C++ library), to a log file:
+    logfile = open(output_folder / "replay.log", "w")
+    sys.stdout.flush()
+    os.dup2(logfile.fileno(), sys.stdout.fileno())
+    try:
+        try:
+            # Valid inputs are read from their cache:
+            [input_json, _] = read_json_input(input_path)
+            unvalidated_agents = []
+        except SystemExit:
+            input_json = json.load(open(input_path))
+            unvalidated_agents = input_json["agents"]
+        # Options are overridden before validation, so that they can also
+        # fill in options that older inputs lack:
+        input_json["options"].update(options)
+        validate_json(
+            {"agents": unvalidated_agents, "options": input_json["options"]},
+            "support-shift-scheduler-input.schema.json",
+            "Input JSON",
+        )
+    except SystemExit:
+        # Archived inputs may predate the current schema:
+        return {
+            "build_time": 0.0,
+            "solve_time": 0.0,
+            "total_time": 0.0,
+            "status": "INVALID_INPUT",
+            "objective": None,
+            "verified_cost": None,
+        }
+    [sr_onboarding, sr_mentors] = read_onboarding_files(input_path.parent)
+    [df_agents, agent_categories, config] = process_input_data(
+        input_json, sr_onboarding, sr_mentors
+    )
+    config["optimization_timeout"] = time_budget
+    config["random_seed"] = seed
+    config["output_folder"] = output_folder
+    solution_info = generate_solution(df_agents, agent_categories, config)
+    sys.stdout.flush()
+    write_metrics(output_folder)
+    return {
+        "build_time": get_phase_seconds("setup_model"),
+        "solve_time": get_phase_seconds(
+            "run_solver", "run_lns", "run_greedy_heuristic"
+        ),
+        "total_time": get_metrics()["total_seconds"],
+        "status": solution_info["status"] if solution_info else None,
+        "objective": solution_info["objective"] if solution_info else None,
+        "verified_cost": (
+            solution_info["verified_cost"] if solution_info else None
+        ),
+    }
+
+
+def find_regressions(
+    results, baseline, threshold, time_threshold, min_seconds
+):
+    """List the regressions of replay results against a baseline.
+
+    Costs may not increase by more than the relative threshold, and build
+    and solve times not by more than the relative time_threshold, ignoring
+    changes below min_seconds (which are mostly noise).
+    """
+    regressions = []
+    for week, old in baseline["results"].items():
+        new = results["results"].get(week)
+        if new is None:
+            continue
+        if new["verified_cost"] is None:
+            if old["verified_cost"] is not None:
+                regressions.append(f"{week}: no solution found")
+            continue
+        if new["verified_cost"] != new["objective"]:
+            regressions.append(
+                f"{week}: verified cost {new['verified_cost']} differs from "
+                f"objective {new['objective']}"
+            )
+        if old["verified_cost"] is not None and new["verified_cost"] > old[
+            "verified_cost"
+        ] * (1 + threshold):
+            regressions.append(
+                f"{week}: cost {old['verified_cost']} -> "
+                f"{new['verified_cost']}"
+            )
+        for key in ["build_time", "solve_time"]:
+            if (
+                new[key] > old[key] * (1 + time_threshold)
+                and new[key] - old[key] > min_seconds
+            ):
+                regressions.append(
+                    f"{week}: {key} {old[key]:.2f} s -> {new[key]:.2f} s"
+                )
+    return regressions
+
+
+def main():
+    """Replay archived weeks, and compare them against a baseline."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--logs",
+        default=get_project_root() / "logs",
+        help="Folder containing the archived <date>_<model> folders",
+    )
+    parser.add_argument(
+        "--weeks", nargs="+", help="Names of the week folders to replay"
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=60,
+        help="Solver time limit per week (s)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--options",
+        type=json.loads,
+        default={},
+        help="Input options to override as JSON, e.g. a veteranFormulation",
+    )
+    parser.add_argument(
+        "--baseline", default=results_folder / "replay-baseline.json"
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store the results as the new baseline, instead of comparing",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.05,
+        help="Relative cost increase counted as a regression",
+    )
+    parser.add_argument(
+        "--time-threshold",
+        type=float,
+        default=0.25,
+        help="Relative build or solve time increase counted as a regression",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=1.0,
+        help="Time increases below this are never counted as regressions",
+    )
+    args = parser.parse_args()
+
+    commit = get_commit()
+    results = {
+        "commit": commit,
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "ortools": ortools.__version__,
+        "time_budget": args.time_budget,
+        "seed": args.seed,
+        "options": args.options,
+        "results": {},
+    }
+    print(
+        f"{'week':>24}{'build [s]':>11}{'solve [s]':>11}{'status':>15}"
+        f"{'objective':>11}{'verified':>10}"
+    )
+    for week, input_path in find_archived_inputs(args.logs, args.weeks):
+        # A fresh process per week, so that its metrics are its own:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("fork")
+        ) as executor:
+            result = executor.submit(
+                replay_week,
+                input_path,
+                results_folder / "replay" / week,
+                args.time_budget,
+                args.seed,
+                args.options,
+            ).result()
+        results["results"][week] = result
+        print(
+            f"{week:>24}{result['build_time']:>11.2f}"
+            f"{result['solve_time']:>11.2f}{str(result['status']):>15}"
+            f"{str(result['objective']):>11}"
+            f"{str(result['verified_cost']):>10}"
+        )
+
+    results_folder.mkdir(parents=True, exist_ok=True)
+    with open(results_folder / f"replay-{commit}.json", "w") as outfile:
+        outfile.write(json.dumps(results, indent=4))
+    if args.update_baseline:
+        with open(args.baseline, "w") as outfile:
+            outfile.write(json.dumps(results, indent=4))
+        print(f"\nBaseline written to {args.baseline}.")
+        return
+    if not Path(args.baseline).exists():
+        print(f"\nNo baseline at {args.baseline}; use --update-baseline.")
+        return
+
+    baseline = json.load(open(args.baseline))
+    if (baseline["time_budget"], baseline["seed"], baseline["options"]) != (
+        args.time_budget,
+        args.seed,
+        args.options,
+    ):
+        print(
+            "\nWARNING: The baseline was recorded with a different time "
+            "budget, seed or options."
+        )
+    regressions = find_regressions(
+        results,
+        baseline,
+        args.threshold,
+        args.time_threshold,
+        args.min_seconds,
+    )
+    print(f"\nCompared against baseline of commit {baseline['commit']}:")
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    if regressions:
+        sys.exit(1)
+    print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import datetime
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import time
+from pathlib import Path
+import jsonschema
+import ortools
+from ortools.sat.python import cp_model
+
+from src.read_input import get_project_root
+from src.process_input import process_input_data
+from src.solve_model import ObjectiveTracker, setup_model
+from .lns import objective_at
+from .synthetic import generate_input, onboarding_handle_series
+
+# Scaling benchmark suite: each scenario varies one aspect of a base input
+# (or the number of agents), is generated with a fixed seed, and is built
+# and solved in a fresh process, so that its peak memory can be measured.
+
+base_scenario = {
+    "num_agents": 40,
+    "num_days": 5,
+    "start_hour": 8,
+    "end_hour": 25,
+    "use_twos": True,
+    "use_threes": False,
+    "max_shifts_per_agent_per_day": 1,
+    "num_distribution_blocks": 0,
+    "num_onboarders": 0,
+    "num_mentors": 0,
+}
+
+variations = {
+    "days-3": {"num_days": 3},
+    "hours-9-17": {"start_hour": 9, "end_hour": 17},
+    "no-twos": {"use_twos": False},
+    "threes": {"use_threes": True},
+    "tracks-2": {"max_shifts_per_agent_per_day": 2},
+    "onboarding-2-4": {"num_onboarders": 2, "num_mentors": 4},
+    "distribution-dense": {"num_distribution_blocks": 6},
+}
+
+suites = {
+    "quick": {"agents": [20, 50, 100], "variations": list(variations)},
+    "full": {
+        "agents": [20, 50, 100, 200, 500],
+        "variations": list(variations),
+    },
+}
+
+
+def find_scenarios(suite, agents=None):
+    """List the (name, parameters) of the scenarios in a suite."""
+    scenarios = [
+        (f"agents-{num_agents}", {**base_scenario, "num_agents": num_agents})
+        for num_agents in agents or suites[suite]["agents"]
+    ]
+    scenarios += [
+        (name, {**base_scenario, **variations[name]})
+        for name in suites[suite]["variations"]
+    ]
+    return scenarios
+
+
+def run_scenario(parameters, budgets, options, seed):
+    """Build and solve a scenario; to be run in a fresh process."""
+    generator_parameters = {
+        key: value
+        for key, value in parameters.items()
+        if key not in ["num_onboarders", "num_mentors"]
+    }
+    input_json = generate_input(**generator_parameters, seed=seed)
+    input_json["options"].update(options)
+    input_json_schema = json.load(
+        open(
+            get_project_root()
+            / "lib/schemas/support-shift-scheduler-input.schema.json"
+        )
+    )
+    jsonschema.validate(input_json, input_json_schema)
+    [sr_onboarding, sr_mentors] = onboarding_handle_series(
+        input_json, parameters["num_onboarders"], parameters["num_mentors"]
+    )
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        [df_agents, agent_categories, config] = process_input_data(
+            input_json, sr_onboarding, sr_mentors
+        )
+        start = time.perf_counter()
+        [model, _, _, full_cost_list] = setup_model(
+            df_agents, agent_categories, config
+        )
+        model.Minimize(sum(full_cost_list))
+        build_time = time.perf_counter() - start
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = max(budgets)
+    solver.parameters.num_search_workers = 8
+    tracker = ObjectiveTracker()
+    status = solver.Solve(model, tracker)
+    proto = model.Proto()
+    return {
+        "build_time": build_time,
+        "variables": len(proto.variables),
+        "constraints": len(proto.constraints),
+        # Peak resident set size of the process, in kB (on Linux):
+        "peak_memory": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "first_solution_time": tracker.first_solution_time,
+        "objectives": {
+            str(budget): objective_at(tracker.progress, budget)
+            for budget in budgets
+        },
+        "status": solver.StatusName(status),
+        "bound": (
+            solver.BestObjectiveBound()
+            if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]
+            else None
+        ),
+    }
+
+
+def get_commit():
+    """Return the current git commit of the repository, if any."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=get_project_root(),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare_results(old_path, new_path):
+    """Print the changes between two stored benchmark results."""
+    old = json.load(open(old_path))
+    new = json.load(open(new_path))
+    print(f"{old['commit']} -> {new['commit']}")
+    print(
+        f"{'scenario':>20}{'build [s]':>18}{'variables':>20}"
+        f"{'first [s]':>18}{'final cost':>22}"
+    )
+    for name, new_result in new["results"].items():
+        old_result = old["results"].get(name)
+        if old_result is None:
+            continue
+        # Compare the objectives at the longest budget:
+        budget = list(new_result["objectives"])[-1]
+        print(
+            f"{name:>20}"
+            f"{old_result['build_time']:>9.2f}{new_result['build_time']:>9.2f}"
+            f"{old_result['variables']:>10}{new_result['variables']:>10}"
+            f"{str(old_result['first_solution_time'])[:5]:>9}"
+            f"{str(new_result['first_solution_time'])[:5]:>9}"
+            f"{str(old_result['objectives'].get(budget)):>11}"
+            f"{str(new_result['objectives'][budget]):>11}"
+        )
+
+
+def main():
+    """Run a suite of synthetic scenarios and store the results as JSON."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--suite", choices=list(suites), default="quick")
+    parser.add_argument(
+        "--agents",
+        type=int,
+        nargs="+",
+        help="Agent counts to sweep, instead of those of the suite",
+    )
+    parser.add_argument(
+        "--budgets",
+        type=float,
+        nargs="+",
+        default=[10, 30, 60],
+        help="Time budgets (s) at which to record the objective",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--options",
+        type=json.loads,
+        default={},
+        help="Extra input options as JSON, e.g. a veteranFormulation",
+    )
+    parser.add_argument("--output", help="Path of the results JSON file")
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("OLD", "NEW"),
+        help="Compare two results files instead of running the suite",
+    )
+    args = parser.parse_args()
+    if args.compare:
+        compare_results(*args.compare)
+        return
+
+    commit = get_commit()
+    output_path = Path(
+        args.output
+        or Path(__file__).parent / "results" / f"scaling-{commit}.json"
+    )
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    results = {
+        "commit": commit,
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "ortools": ortools.__version__,
+        "cpus": os.cpu_count(),
+        "suite": args.suite,
+        "seed": args.seed,
+        "options": args.options,
+        "budgets": args.budgets,
+        "scenarios": {},
+        "results": {},
+    }
+
+    print(
+        f"{'scenario':>20}{'build [s]':>10}{'vars':>9}{'cons':>9}"
+        f"{'mem [MB]':>10}{'first [s]':>11}"
+        + "".join(f"{f'{budget:.0f} s':>9}" for budget in args.budgets)
+    )
+    for name, parameters in find_scenarios(args.suite, args.agents):
+        # A fresh process per scenario, so that peak memory is its own:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("fork")
+        ) as executor:
+            result = executor.submit(
+                run_scenario, parameters, args.budgets, args.options, args.seed
+            ).result()
+        results["scenarios"][name] = parameters
+        results["results"][name] = result
+        # Store results as they come, so that a long run can be cut short:
+        with open(output_path, "w") as outfile:
+            outfile.write(json.dumps(results, indent=4))
+        print(
+            f"{name:>20}{result['build_time']:>10.2f}"
+            f"{result['variables']:>9}{result['constraints']:>9}"
+            f"{result['peak_memory'] / 1024:>10.0f}"
+            f"{str(result['first_solution_time'])[:5]:>11}"
+            + "".join(
+                f"{str(result['objectives'][str(budget)]):>9}"
+                for budget in args.budgets
+            )
+        )
+    print(f"\nResults written to {output_path}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import itertools
+import math
+import random
+import pandas as pd
+
+# Slots per day in the availableSlots arrays (27 hours):
+slots_per_day = 54
+
+
+def generate_agent(
+    rng, index, num_days, start_hour, end_hour, use_twos, use_threes
+):
+    """Generate a single agent with randomized, contiguous availability."""
+    # Each agent works in a "time zone", i.e. a window that shifts only
+    # slightly from day to day. Clipping to the support hours puts extra
+    # agents at the edges, which keeps early and late slots coverable.
+    window = 2 * rng.randint(6, 10)
+    base = rng.randint(2 * start_hour - 6, 2 * end_hour - window + 6)
+    available_slots = []
+    for d in range(num_days):
+        day_slots = [0] * slots_per_day
+        # Roughly one day off per agent per fortnight:
+        if rng.random() > 0.1:
+            first = min(
+                max(base + rng.randint(-2, 2), 2 * start_hour),
+                2 * end_hour - window,
+            )
+            for s in range(first, first + window):
+                day_slots[s] = 1
+            # Non-preferred slots at either end of the window (which a team
+            # that doesn't use twos wouldn't enter):
+            if use_twos:
+                for s in [first, first + 1, first + window - 1]:
+                    day_slots[s] = 2
+            if use_threes and first + window < slots_per_day:
+                day_slots[first + window] = 3
+        available_slots.append(day_slots)
+
+    return {
+        "handle": f"@agent-{index:03d}",
+        "email": f"agent-{index:03d}@example.com",
+        "weight": rng.choice([0.5, 1, 1, 1]),
+        "isSupportEngineer": int(rng.random() < 0.3),
+        "teamworkBalance": rng.randint(-100, 100),
+        "nextWeekCredit": rng.choice([0, 0, 0, 2]),
+        "idealShiftLength": rng.choice([3, 4, 4, 5, 6]),
+        "availableSlots": available_slots,
+    }
+
+
+def encode_availability_ranges(available_slots):
+    """Encode availableSlots as availableRanges, i.e. [start, end, level]."""
+    available_ranges = []
+    for day_slots in available_slots:
+        day_ranges = []
+        start = 0
+        for level, group in itertools.groupby(day_slots):
+            end = start + len(list(group))
+            if level != 0:
+                day_ranges.append([start, end, level])
+            start = end
+        available_ranges.append(day_ranges)
+    return available_ranges
+
+
+def generate_input(
+    num_agents=40,
+    num_days=5,
+    start_hour=8,
+    end_hour=25,
+    max_shifts_per_agent_per_day=1,
+    use_twos=True,
+    use_threes=False,
+    num_distribution_blocks=0,
+    range_encoded=False,
+    seed=0,
+):
+    """Generate a valid scheduler input with a default balenaio-like cover.
+
+    With num_distribution_blocks, agentDistribution gets a rule per day and
+    per block of hours (instead of a single rule), for denser constraints.
+    With range_encoded, availability is given as availableRanges.
+    """
+    rng = random.Random(seed)
+    agents = [
+        generate_agent(
+            rng, i, num_days, start_hour, end_hour, use_twos, use_threes
+        )
+        for i in range(num_agents)
+    ]
+    day_hours = end_hour - start_hour
+    options = {
+        "startMondayDate": "2022-01-03",
+        "modelName": "synthetic",
+        "longName": "synthetic support",
+        "numDays": num_days,
+        "startHour": start_hour,
+        "endHour": end_hour,
+        "shiftMinDuration": 2,
+        "shiftMaxDuration": 8,
+        "maxShiftsPerAgentPerDay": max_shifts_per_agent_per_day,
+        "useTwos": use_twos,
+        "useThrees": use_threes,
+        "optimizationTimeout": 0.01,
+        "logSheet": "synthetic",
+        "calendarID": "synthetic",
+        "specialAgentConditions": {
+            "agentsMaxHoursShift": [],
+            "agentsMinHoursWeek": [],
+            "agentsMaxHoursWeek": [],
+            "agentsFixHours": [],
+        },
+        "hoursCoverage": [
+            {
+                "start_day": d,
+                "end_day": d,
+                "min_hours": day_hours,
+                "max_hours": day_hours + 1,
+            }
+            for d in range(num_days)
+        ],
+        "agentDistribution": [
+            {
+                "start_day": 0,
+                "end_day": num_days - 1,
+                "start_hour": start_hour,
+                "end_hour": end_hour,
+                "min_agents": 1,
+                "max_agents": 3,
+            }
+        ],
+    }
+    if num_distribution_blocks > 0:
+        block_hours = math.ceil(day_hours / num_distribution_blocks)
+        options["agentDistribution"] = [
+            {
+                "start_day": d,
+                "end_day": d,
+                "start_hour": block_start,
+                "end_hour": min(block_start + block_hours, end_hour),
+                "min_agents": 1,
+                # Allow more agents mid-day than at the edges:
+                "max_agents": 3 + (start_hour < block_start < end_hour - 6),
+            }
+            for d in range(num_days)
+            for block_start in range(start_hour, end_hour, block_hours)
+        ]
+    # Weekday availability must always list 5 days:
+    for agent in agents:
+        agent["availableSlots"] += [[0] * slots_per_day] * (5 - num_days)
+        if range_encoded:
+            agent["availableRanges"] = encode_availability_ranges(
+                agent.pop("availableSlots")
+            )
+    return {"agents": agents, "options": options}
+
+
+def empty_handle_series():
+    """Return an empty onboarding / mentors series, as read_input does."""
+    return pd.Series(data=None, name="agents", dtype="str")
+
+
+def onboarding_handle_series(input_json, num_onboarders, num_mentors):
+    """Return onboarding and mentors series, from the input's first agents."""
+    handles = [agent["handle"] for agent in input_json["agents"]]
+    return [
+        pd.Series(handles[:num_onboarders], name="agents", dtype="str"),
+        pd.Series(
+            handles[num_onboarders:num_onboarders + num_mentors],
+            name="agents",
+            dtype="str",
+        ),
+    ]
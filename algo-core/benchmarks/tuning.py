@@ -0,0 +1,313 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import random
+from pathlib import Path
+import ortools
+from ortools.sat.python import cp_model
+
+from src.read_input import (
+    get_project_root,
+    read_json_input,
+    read_onboarding_files,
+)
+from src.process_input import process_input_data
+from src.solve_model import setup_model
+from src.solver_profiles import (
+    base_parameters,
+    set_solver_parameters,
+    solver_profiles,
+)
+from .replay import find_archived_inputs, results_folder
+from .scaling import get_commit
+from .synthetic import empty_handle_series, generate_input
+
+# Parameter tuning by successive halving: candidate sets of CP-SAT
+# parameters, drawn at random from parameter_space (plus the balanced
+# profile, i.e. the defaults), are run on a corpus of inputs at a short time
+# budget. Only the best 1/eta of them are kept for the next round, whose
+# budget is eta times longer, until one candidate is left. Candidates are
+# scored by the objective they reach on each input, relative to the best
+# objective of any candidate of the round. The winner is written as a
+# "tuned" solver profile, to be loaded with --solver-profiles.
+
+parameter_space = {
+    "num_search_workers": [1, 2, 4, 8],
+    "max_presolve_iterations": [1, 3, 10],
+    "linearization_level": [0, 1, 2],
+    "search_branching": [
+        "AUTOMATIC_SEARCH",
+        "FIXED_SEARCH",
+        "PORTFOLIO_SEARCH",
+        "PSEUDO_COST_SEARCH",
+        "PORTFOLIO_WITH_QUICK_RESTART_SEARCH",
+    ],
+    "use_lns_only": [False, True],
+    "lns_initial_difficulty": [0.2, 0.5, 0.8],
+    "use_rins_lns": [False, True],
+}
+
+# Score of an input without a solution, in addition to the worst relative
+# objective on that input:
+no_solution_penalty = 1.0
+
+
+def sample_candidates(num_candidates, seed):
+    """Draw distinct parameter sets, starting with the balanced profile."""
+    rng = random.Random(seed)
+    candidates = [
+        {
+            key: value
+            for key, value in {
+                **base_parameters,
+                **solver_profiles["balanced"],
+            }.items()
+            if key in parameter_space
+        }
+    ]
+    # Stop drawing if the space is exhausted:
+    for _ in range(100 * num_candidates):
+        if len(candidates) >= num_candidates:
+            break
+        candidate = {
+            key: rng.choice(values) for key, values in parameter_space.items()
+        }
+        if candidate not in candidates:
+            candidates.append(candidate)
+    return candidates
+
+
+def score_candidates(objectives):
+    """Score candidates by their mean relative objective (1.0 is best).
+
+    objectives holds, per candidate, the objective reached on each input
+    (None if no solution was found). Objectives are compared as
+    (objective + 1) / (best objective + 1), so that zero costs are allowed.
+    """
+    scores = [0.0] * len(objectives)
+    for instance_objectives in zip(*objectives):
+        best = min(
+            (value for value in instance_objectives if value is not None),
+            default=None,
+        )
+        ratios = [
+            (value + 1) / (best + 1) if value is not None else None
+            for value in instance_objectives
+        ]
+        worst = max(
+            (ratio for ratio in ratios if ratio is not None), default=1
+        )
+        for i, ratio in enumerate(ratios):
+            scores[i] += (
+                ratio if ratio is not None else worst + no_solution_penalty
+            )
+    return [score / len(objectives[0]) for score in scores]
+
+
+def build_model(input_json, sr_onboarding, sr_mentors):
+    """Build the minimization model of an input."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        [df_agents, agent_categories, config] = process_input_data(
+            input_json, sr_onboarding, sr_mentors
+        )
+        [model, _, _, full_cost_list] = setup_model(
+            df_agents, agent_categories, config
+        )
+    model.Minimize(sum(full_cost_list))
+    return model
+
+
+def load_corpus(args):
+    """Build the models of the corpus: synthetic or archived inputs."""
+    corpus = {}
+    if args.logs is not None:
+        for week, input_path in find_archived_inputs(args.logs, args.weeks):
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    [input_json, _] = read_json_input(input_path)
+                    [sr_onboarding, sr_mentors] = read_onboarding_files(
+                        input_path.parent
+                    )
+            except SystemExit:
+                print(f"Skipping {week}: input is not valid.")
+                continue
+            corpus[week] = build_model(input_json, sr_onboarding, sr_mentors)
+        return corpus
+    for num_agents in args.agents:
+        for seed in args.seeds:
+            input_json = generate_input(num_agents=num_agents, seed=seed)
+            corpus[f"synthetic-{num_agents}-{seed}"] = build_model(
+                input_json, empty_handle_series(), empty_handle_series()
+            )
+    return corpus
+
+
+def solve_instance(model, parameters, time_budget, seed):
+    """Solve a model with the given parameters and time budget.
+
+    Returns the objective, or None if no solution was found.
+    """
+    solver = cp_model.CpSolver()
+    set_solver_parameters(solver, parameters)
+    solver.parameters.max_time_in_seconds = time_budget
+    solver.parameters.random_seed = seed
+    solver.parameters.log_search_progress = False
+    status = solver.Solve(model)
+    if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+        return solver.ObjectiveValue()
+    return None
+
+
+def successive_halving(corpus, candidates, min_budget, eta, seed):
+    """Run the rounds of successive halving, returning their results."""
+    rounds = []
+    remaining = list(range(len(candidates)))
+    time_budget = min_budget
+    while True:
+        objectives = []
+        for i in remaining:
+            objectives.append(
+                [
+                    solve_instance(model, candidates[i], time_budget, seed)
+                    for model in corpus.values()
+                ]
+            )
+        scores = score_candidates(objectives)
+        ranking = sorted(range(len(remaining)), key=lambda j: scores[j])
+        rounds.append(
+            {
+                "time_budget": time_budget,
+                "candidates": [
+                    {
+                        "parameters": candidates[remaining[j]],
+                        "score": scores[j],
+                        "objectives": dict(zip(corpus, objectives[j])),
+                    }
+                    for j in ranking
+                ],
+            }
+        )
+        print(
+            f"{time_budget:>10.1f}{len(remaining):>12}"
+            f"{scores[ranking[0]]:>12.4f}"
+            f"  {json.dumps(candidates[remaining[ranking[0]]])}"
+        )
+        if len(remaining) == 1:
+            return rounds
+        remaining = [
+            remaining[j] for j in ranking[:max(len(remaining) // eta, 1)]
+        ]
+        time_budget *= eta
+
+
+def main():
+    """Tune the solver parameters on a corpus, and write a solver profile."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--logs",
+        nargs="?",
+        const=get_project_root() / "logs",
+        help="Tune on the archived inputs in this folder (default: logs), "
+        "instead of on synthetic inputs",
+    )
+    parser.add_argument(
+        "--weeks", nargs="+", help="Names of the archived weeks to tune on"
+    )
+    parser.add_argument(
+        "--agents",
+        type=int,
+        nargs="+",
+        default=[20, 40],
+        help="Sizes of the synthetic inputs",
+    )
+    parser.add_argument(
+        "--seeds",
+        type=int,
+        nargs="+",
+        default=[0, 1],
+        help="Seeds of the synthetic inputs",
+    )
+    parser.add_argument(
+        "--candidates",
+        type=int,
+        default=16,
+        help="Number of parameter sets to start with",
+    )
+    parser.add_argument(
+        "--min-budget",
+        type=float,
+        default=5,
+        help="Solver time limit per input in the first round (s)",
+    )
+    parser.add_argument(
+        "--eta",
+        type=int,
+        default=2,
+        help="Factor by which candidates are cut and budgets grow per round",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output",
+        default=results_folder / "tuned-solver-profiles.json",
+        help="Solver profiles file to write",
+    )
+    args = parser.parse_args()
+
+    corpus = load_corpus(args)
+    if not corpus:
+        print("No inputs to tune on.")
+        return
+    candidates = sample_candidates(args.candidates, args.seed)
+    print(f"Tuning {len(candidates)} candidates on {len(corpus)} inputs.\n")
+    print(f"{'budget [s]':>10}{'candidates':>12}{'best score':>12}")
+    rounds = successive_halving(
+        corpus, candidates, args.min_budget, args.eta, args.seed
+    )
+
+    tuned = rounds[-1]["candidates"][0]["parameters"]
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w") as outfile:
+        outfile.write(
+            json.dumps(
+                {
+                    "solverProfiles": {"tuned": tuned},
+                    "tuning": {
+                        "commit": get_commit(),
+                        "date": datetime.datetime.now().isoformat(
+                            timespec="seconds"
+                        ),
+                        "ortools": ortools.__version__,
+                        "corpus": list(corpus),
+                        "seed": args.seed,
+                        "rounds": rounds,
+                    },
+                },
+                indent=4,
+            )
+        )
+    print(
+        f"\nTuned profile written to {args.output}; use it with "
+        f"--solver-profiles {args.output} --solver-profile tuned."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import random
+from ortools.sat.python import cp_model
+
+from src.process_input import process_input_data
+from src.hints import add_schedule_hints
+from src.solve_model import (
+    ObjectiveTracker,
+    coefficients,
+    fetch_veteran_schedule,
+    find_solution_indices,
+    format_solution,
+    get_solution_values,
+    setup_model,
+)
+from src.warm_start import find_warm_start_shifts
+from .synthetic import generate_input, empty_handle_series
+
+
+def solve_week(input_json, timeout, previous_outputs=()):
+    """Solve a week, optionally warm-started, and return result and output."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        [df_agents, agent_categories, config] = process_input_data(
+            input_json, empty_handle_series(), empty_handle_series()
+        )
+        [model, var_veterans, _, full_cost_list] = setup_model(
+            df_agents, agent_categories, config
+        )
+        if previous_outputs:
+            agent_day_shifts = find_warm_start_shifts(
+                previous_outputs,
+                coefficients,
+                df_agents,
+                agent_categories,
+                config,
+            )
+            add_schedule_hints(
+                model,
+                var_veterans,
+                agent_day_shifts,
+                coefficients,
+                df_agents,
+                agent_categories,
+                config,
+            )
+    model.Minimize(sum(full_cost_list))
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = timeout
+    solver.parameters.num_search_workers = 8
+    timer = ObjectiveTracker()
+    status = solver.Solve(model, timer)
+    if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+        return [{"status": solver.StatusName(status)}, None]
+    indices = find_solution_indices(var_veterans, None, config)
+    veteran_schedule = fetch_veteran_schedule(
+        get_solution_values(solver, indices),
+        indices,
+        var_veterans,
+        agent_categories,
+        config,
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        [sol_shifts, _, _] = format_solution(
+            veteran_schedule, None, None, df_agents, agent_categories, config
+        )
+    result = {
+        "status": solver.StatusName(status),
+        "objective": solver.ObjectiveValue(),
+        "first_solution_time": timer.first_solution_time,
+    }
+    return [result, sol_shifts]
+
+
+def next_week_input(input_json, changed_fraction, seed):
+    """Derive next week's input by changing some agents' availability.
+
+    Each changed agent has one weekday's availability replaced by another
+    agent's, or removed.
+    """
+    rng = random.Random(seed)
+    next_input = copy.deepcopy(input_json)
+    next_input["options"]["startMondayDate"] = "2022-01-10"
+    agents = next_input["agents"]
+    num_days = next_input["options"]["numDays"]
+    for agent in rng.sample(agents, int(changed_fraction * len(agents))):
+        d = rng.randrange(num_days)
+        other = rng.choice(agents)
+        agent["availableSlots"][d] = list(
+            other["availableSlots"][d]
+            if rng.random() < 0.5
+            else [0] * len(agent["availableSlots"][d])
+        )
+    return next_input
+
+
+def main():
+    """Compare cold and warm-started solves of a slightly changed week."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agents", type=int, nargs="+", default=[20, 40, 60])
+    parser.add_argument("--changed", type=float, default=0.1)
+    parser.add_argument("--seeds", type=int, default=2)
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    print(
+        f"{'agents':>7}{'seed':>6}{'cold first [s]':>16}{'warm first [s]':>16}"
+        f"{'cold cost':>11}{'warm cost':>11}"
+    )
+    for num_agents in args.agents:
+        for seed in range(args.seeds):
+            input_json = generate_input(num_agents=num_agents, seed=seed)
+            [_, previous_output] = solve_week(input_json, args.timeout)
+            next_input = next_week_input(input_json, args.changed, seed)
+            [cold, _] = solve_week(next_input, args.timeout)
+            [warm, _] = solve_week(next_input, args.timeout, [previous_output])
+            print(
+                f"{num_agents:>7}{seed:>6}"
+                f"{str(cold.get('first_solution_time'))[:5]:>16}"
+                f"{str(warm.get('first_solution_time'))[:5]:>16}"
+                f"{str(cold.get('objective')):>11}"
+                f"{str(warm.get('objective')):>11}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import argparse
+from pathlib import Path
+
+from src.input_cache import get_cache_path
+from src.read_input import filename_input, read_json_input
+
+
+def main():
+    """Convert scheduler inputs into their cached form."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="Scheduler input JSON files (or logs folders containing them)",
+    )
+    parser.add_argument(
+        "--revalidate",
+        action="store_true",
+        help="Parse and validate inputs, even if they are cached",
+    )
+    args = parser.parse_args()
+    for path in args.inputs:
+        if (path := Path(path.strip())).is_dir():
+            path = path / filename_input
+        [_, is_cached] = read_json_input(path, revalidate=args.revalidate)
+        print(
+            f"{path}: "
+            + ("cache is up to date" if is_cached else "cached")
+            + f" in {get_cache_path(path)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
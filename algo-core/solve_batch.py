@@ -0,0 +1,218 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.read_input import (
+    filename_input,
+    get_input_folder,
+    read_json_input,
+    read_onboarding_files,
+)
+from src.process_input import process_input_data
+from src.solve_model import generate_solution, get_output_folder
+from src.metrics import get_metrics, reset_metrics, root_phase, write_metrics
+
+# Batch mode: several inputs (e.g. of the different support channels) are
+# solved concurrently, in worker processes forked from this one, so that
+# the imports are only paid once. The CPU cores are divided among the jobs
+# in proportion to the size of their models, and each job writes its
+# output, metrics and log (scheduler.log) to its own logs folder.
+
+
+def find_model_size(input_json):
+    """Estimate the size of an input's model, by its agent-slots."""
+    options = input_json["options"]
+    return (
+        len(input_json["agents"])
+        * options["numDays"]
+        * 2
+        * (options["endHour"] - options["startHour"])
+    )
+
+
+def divide_cores(sizes, num_cores):
+    """Divide cores among jobs in proportion to their sizes.
+
+    Each job gets at least one core; with more jobs than cores, all jobs
+    get one core, and are run num_cores at a time.
+    """
+    if len(sizes) >= num_cores:
+        return [1] * len(sizes)
+    shares = (
+        np.array(sizes, float) / max(sum(sizes), 1) * (num_cores - len(sizes))
+    )
+    cores = 1 + np.floor(shares).astype(int)
+    # Leftover cores go to the largest remainders:
+    remainders = shares - np.floor(shares)
+    leftover = num_cores - cores.sum()
+    cores[np.argsort(-remainders, kind="stable")[:leftover]] += 1
+    return cores.tolist()
+
+
+def get_phase_seconds(*names):
+    """Total seconds of the given top-level phases in the metrics."""
+    return sum(
+        root_phase["phases"][name]["seconds"]
+        for name in names
+        if name in root_phase["phases"]
+    )
+
+
+def solve_job(input_path, num_cores):
+    """Solve a single input; to be run in a worker process.
+
+    The run's output, including the solver's log, is written to
+    scheduler.log in its logs folder.
+    """
+    reset_metrics()
+    [input_json, _] = read_json_input(input_path)
+    output_folder = get_input_folder(input_json)
+    output_folder.mkdir(parents=True, exist_ok=True)
+    logfile = open(output_folder / "scheduler.log", "w")
+    sys.stdout.flush()
+    os.dup2(logfile.fileno(), sys.stdout.fileno())
+    [sr_onboarding, sr_mentors] = read_onboarding_files(output_folder)
+    [df_agents, agent_categories, config] = process_input_data(
+        input_json, sr_onboarding, sr_mentors
+    )
+    # Only use this job's share of the cores (and, with the auto solver
+    # profile, of the memory), unless the input selects a solver profile:
+    config["num_cores"] = num_cores
+    if "solverProfile" not in input_json["options"]:
+        config["solver_profile"] = "auto"
+    config["lns_workers"] = min(config["lns_workers"], num_cores)
+    solution_info = generate_solution(df_agents, agent_categories, config)
+    sys.stdout.flush()
+    write_metrics(get_output_folder(config))
+    return {
+        "folder": str(get_output_folder(config)),
+        "cores": num_cores,
+        "build_time": get_phase_seconds("setup_model"),
+        "solve_time": get_phase_seconds(
+            "run_solver", "run_lns", "run_greedy_heuristic"
+        ),
+        "total_time": get_metrics()["total_seconds"],
+        "status": solution_info["status"] if solution_info else None,
+        "objective": solution_info["objective"] if solution_info else None,
+        "verified_cost": (
+            solution_info["verified_cost"] if solution_info else None
+        ),
+    }
+
+
+def main():
+    """Solve several scheduler inputs concurrently, and report on them."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="Scheduler input JSON files (or logs folders containing them)",
+    )
+    parser.add_argument(
+        "--cores",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="CPU cores to divide among the jobs (default: all)",
+    )
+    parser.add_argument(
+        "--report", help="Also write the report as JSON to this file"
+    )
+    args = parser.parse_args()
+    start = time.perf_counter()
+
+    # Inputs are validated (and cached) up front, to size the jobs:
+    jobs = {}
+    for path in args.inputs:
+        if (path := Path(path.strip())).is_dir():
+            path = path / filename_input
+        try:
+            [input_json, _] = read_json_input(path)
+        except SystemExit:
+            print(f"Skipping {path}: input is not valid.")
+            continue
+        # Jobs write to the logs folder of their week and model:
+        if (name := get_input_folder(input_json).name) in jobs:
+            print(f"Skipping {path}: another input is also for {name}.")
+            continue
+        jobs[name] = {"path": path, "size": find_model_size(input_json)}
+    cores = divide_cores([job["size"] for job in jobs.values()], args.cores)
+
+    results = {}
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=min(len(jobs), args.cores) or 1,
+        mp_context=multiprocessing.get_context("fork"),
+    ) as executor:
+        futures = {
+            executor.submit(solve_job, job["path"], num_cores): name
+            for (name, job), num_cores in zip(jobs.items(), cores)
+        }
+        for future in concurrent.futures.as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as err:
+                print(f"{name} failed: {err!r}")
+                continue
+            print(f"{name} finished: {results[name]['status']}")
+
+    wall_time = time.perf_counter() - start
+    print(
+        f"\n{'job':>28}{'cores':>7}{'build [s]':>11}{'solve [s]':>11}"
+        f"{'total [s]':>11}{'status':>12}{'objective':>11}{'verified':>10}"
+    )
+    for name, result in sorted(results.items()):
+        print(
+            f"{name:>28}{result['cores']:>7}{result['build_time']:>11.2f}"
+            f"{result['solve_time']:>11.2f}{result['total_time']:>11.2f}"
+            f"{str(result['status']):>12}{str(result['objective']):>11}"
+            f"{str(result['verified_cost']):>10}"
+        )
+    job_time = sum(result["total_time"] for result in results.values())
+    print(
+        f"\n{len(results)} of {len(args.inputs)} jobs run in "
+        f"{wall_time:.2f} s on {args.cores} cores "
+        f"(sum of job times: {job_time:.2f} s)."
+    )
+    if args.report:
+        with open(args.report, "w") as outfile:
+            outfile.write(
+                json.dumps(
+                    {
+                        "cores": args.cores,
+                        "wall_time": wall_time,
+                        "results": results,
+                    },
+                    indent=4,
+                )
+            )
+    if len(results) < len(args.inputs) or any(
+        result["status"] is None for result in results.values()
+    ):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import numpy as np
+
+from .sparsity import find_reachable_slots
+from .var_grid import VarGrid
+from .veterans import (
+    constraint_agent_distribution,
+    constraint_hours_coverage,
+    constraint_weekly_custom_conditions,
+    cost_multiple_shifts_per_day,
+    cost_total_agent_hours_for_week,
+    define_weekly_and_daily_relationships_veterans,
+    fill_weekly_and_daily_vars_veterans,
+    find_allowed_shift_durations,
+    setup_weekly_and_daily_var_grids_veterans,
+)
+from .metrics import timed
+
+# Automaton formulation of the veteran model: shifts are not modelled
+# explicitly, but follow from the per-slot is_agent_on_slot booleans of an
+# agent-day, which an automaton (regular) constraint restricts to at most
+# max_shifts_per_agent_per_day runs of allowed length. For every slot,
+# the automaton also reads whether a shift ends with that slot, and what
+# the duration cost of that shift is, so that shift counts and duration
+# costs are plain sums. As in the intervals formulation, a shift can start
+# right after the previous one, in which case the shift ends tell the runs
+# of slots apart.
+
+# In the model below, the following abbreviations are used:
+# d: day
+# h: Github handle
+# i: position of handle h in agent_categories["veterans"]
+# s: slot number
+# s_i: position of slot s in range(config["start_slot"], config["end_slot"])
+
+
+def build_shift_automaton(duration_costs, max_shifts):
+    """Build the automaton for the slot sequence of an agent-day.
+
+    duration_costs maps each duration that a shift may have to its cost.
+    The labels read per slot are, in this order: whether the agent is on
+    the next slot, whether a shift ends with this slot, and the duration
+    cost of that shift (0 if none ends here). The very first label is
+    whether the agent is on the first slot.
+
+    Returns the starting state, the final states and the transitions.
+    """
+    states = {}
+
+    def state(*key):
+        return states.setdefault(key, len(states))
+
+    max_length = max(duration_costs, default=0)
+    transitions = []
+
+    def read_no_shift_end(tail, label, target):
+        # Read label, then "no shift ends here", at zero duration cost:
+        transitions.append((tail, label, state("no_end", target)))
+        transitions.append(
+            (state("no_end", target), 0, state("no_cost", target))
+        )
+        transitions.append((state("no_cost", target), 0, target))
+
+    # First slot:
+    init = state("init")
+    transitions.append((init, 0, state("off", 0)))
+    if max_shifts > 0 and max_length > 0:
+        transitions.append((init, 1, state("on", 0, 1)))
+
+    for r in range(max_shifts + 1):
+        # Off, after r shifts:
+        read_no_shift_end(state("off", r), 0, state("off", r))
+        if r < max_shifts and max_length > 0:
+            read_no_shift_end(state("off", r), 1, state("on", r, 1))
+        if r == max_shifts:
+            continue
+        # On for l slots, during shift r + 1:
+        for length in range(1, max_length + 1):
+            on = state("on", r, length)
+            is_end_allowed = length in duration_costs
+            # Back-to-back shifts: the shift ends, and the next one starts
+            # with the next slot:
+            is_next_allowed = is_end_allowed and r + 1 < max_shifts
+            if length < max_length or is_next_allowed:
+                transitions.append((on, 1, state("on_next", r, length)))
+            if length < max_length:
+                transitions.append(
+                    (state("on_next", r, length), 0, state("stay", r, length))
+                )
+                transitions.append(
+                    (state("stay", r, length), 0, state("on", r, length + 1))
+                )
+            if is_next_allowed:
+                transitions.append(
+                    (state("on_next", r, length), 1, state("next", r, length))
+                )
+                transitions.append(
+                    (
+                        state("next", r, length),
+                        duration_costs[length],
+                        state("on", r + 1, 1),
+                    )
+                )
+            if is_end_allowed:
+                # The shift ends, and the agent is off on the next slot:
+                transitions.append((on, 0, state("end", r, length)))
+                transitions.append(
+                    (state("end", r, length), 1, state("cost", r, length))
+                )
+                transitions.append(
+                    (
+                        state("cost", r, length),
+                        duration_costs[length],
+                        state("off", r + 1),
+                    )
+                )
+    final_states = [state("off", r) for r in range(max_shifts + 1)]
+    return [init, final_states, transitions]
+
+
+@timed
+def setup_var_grids_automaton(agent_categories, config):
+    """Create grids that will contain automaton model variables."""
+    days = range(config["num_days"])
+    slots = range(config["start_slot"], config["end_slot"])
+    handles = agent_categories["veterans"]
+    tracks = range(config["max_shifts_per_agent_per_day"])
+
+    # h, dh:
+    var_veterans = setup_weekly_and_daily_var_grids_veterans(
+        agent_categories, config
+    )
+
+    # dhk:
+    # (Only the first track, and only for mentors, so that onboarders'
+    # shifts can be linked to their mentors' as in the interval model.)
+    var_veterans["dhk"] = VarGrid(
+        {"day": days, "handle": handles, "shift_track": tracks},
+        ["shift_start", "shift_duration", "is_agent_on"],
+    )
+
+    # dsh:
+    # (is_agent_on_slot_engineer refers to is_agent_on_slot for support
+    # engineers, and is left empty for everyone else.)
+    var_veterans["dsh"] = VarGrid(
+        {"day": days, "slot": slots, "handle": handles},
+        [
+            "is_agent_on_slot",
+            "is_agent_on_slot_engineer",
+            "is_shift_end",
+            "duration_cost",
+        ],
+    )
+    return var_veterans
+
+
+@timed
+def fill_var_grids_automaton(
+    model, custom_domains, var_veterans, df_agents, agent_categories, config
+):
+    """Fill automaton grids with OR-Tools model variables.
+
+    Slots that an agent may not be scheduled for get no variables.
+    """
+    v_dhk = var_veterans["dhk"]
+    v_dsh = var_veterans["dsh"]
+    agent_slots = df_agents["slots"].to_dict()
+    is_support_engineer = df_agents["is_support_engineer"].to_dict()
+    reachable = find_reachable_slots(
+        df_agents, agent_categories["veterans"], config["min_duration"], config
+    )
+
+    # h, dh:
+    model = fill_weekly_and_daily_vars_veterans(
+        model, custom_domains, var_veterans, agent_categories, config
+    )
+
+    # dsh:
+    for d in range(config["num_days"]):
+        for i, h in enumerate(agent_categories["veterans"]):
+            if h in agent_categories["unavailable"][d]:
+                continue
+            for s_i, s in enumerate(v_dsh.labels[1]):
+                if (
+                    not reachable[d, s_i, i]
+                    or agent_slots[h][d][s]
+                    not in config["allowed_availabilities"]
+                ):
+                    continue
+                # is_agent_on_slot
+                v_dsh["is_agent_on_slot"][d, s_i, i] = model.NewBoolVar(
+                    f"is_agent_on_slot_{d}_{s}_{h}"
+                )
+                # is_agent_on_slot_engineer
+                if is_support_engineer[h]:
+                    v_dsh["is_agent_on_slot_engineer"][d, s_i, i] = v_dsh[
+                        "is_agent_on_slot"
+                    ][d, s_i, i]
+                # is_shift_end
+                v_dsh["is_shift_end"][d, s_i, i] = model.NewBoolVar(
+                    f"is_shift_end_{d}_{s}_{h}"
+                )
+                # duration_cost
+                v_dsh["duration_cost"][d, s_i, i] = model.NewIntVarFromDomain(
+                    custom_domains["duration_cost"],
+                    f"duration_cost_{d}_{s}_{h}",
+                )
+
+    # dhk:
+    for d in range(config["num_days"]):
+        for m in agent_categories["mentors"]:
+            if m in agent_categories["unavailable"][d]:
+                continue
+            i = v_dhk.pos("handle", m)
+            v_dhk["is_agent_on"][d, i, 0] = model.NewBoolVar(
+                f"is_agent_on_{d}_{m}_0"
+            )
+    return model
+
+
+def get_slot_label(v_dsh, column, d, s_i, i):
+    """Return the automaton label of a slot (0 if it can't be worked)."""
+    if s_i >= v_dsh.shape[1] or v_dsh[column][d, s_i, i] is None:
+        return 0
+    return v_dsh[column][d, s_i, i]
+
+
+@timed
+def define_general_relationships_automaton(
+    model,
+    var_veterans,
+    custom_domains,
+    coefficients,
+    df_agents,
+    agent_categories,
+    config,
+):
+    """Declare the defining relationships between the model variables."""
+    v_h = var_veterans["h"]
+    v_dh = var_veterans["dh"]
+    v_dhk = var_veterans["dhk"]
+    v_dsh = var_veterans["dsh"]
+    slots = v_dsh.labels[1]
+    ideal_shift_length = df_agents["ideal_shift_length"].to_dict()
+    allowed_durations = find_allowed_shift_durations(
+        custom_domains, coefficients, df_agents, config
+    )
+
+    # h, dh:
+    model = define_weekly_and_daily_relationships_veterans(
+        model, var_veterans, df_agents, agent_categories, config
+    )
+
+    for i, h in enumerate(agent_categories["veterans"]):
+        # total_week_slots
+        model.Add(
+            v_h["total_week_slots"][i]
+            == sum(v_dsh.values("is_agent_on_slot", np.s_[:, :, i]))
+        )
+
+        # The automaton only depends on the agent, not on the day:
+        [init, final_states, transitions] = build_shift_automaton(
+            allowed_durations[h], config["max_shifts_per_agent_per_day"]
+        )
+
+        for d in range(config["num_days"]):
+            # num_shifts
+            model.Add(
+                v_dh["num_shifts"][d, i]
+                == sum(v_dsh.values("is_shift_end", np.s_[d, :, i]))
+            )
+            if h in agent_categories["unavailable"][d]:
+                continue
+
+            labels = [get_slot_label(v_dsh, "is_agent_on_slot", d, 0, i)]
+            for s_i in range(len(slots)):
+                labels += [
+                    get_slot_label(v_dsh, "is_agent_on_slot", d, s_i + 1, i),
+                    get_slot_label(v_dsh, "is_shift_end", d, s_i, i),
+                    get_slot_label(v_dsh, "duration_cost", d, s_i, i),
+                ]
+            model.AddAutomaton(labels, init, final_states, transitions)
+
+            # The automaton implies the following bounds on the day's
+            # duration cost, which strengthen the LP relaxation:
+            day_duration_cost = sum(
+                v_dsh.values("duration_cost", np.s_[d, :, i])
+            )
+            day_slots = sum(v_dsh.values("is_agent_on_slot", np.s_[d, :, i]))
+            model.Add(
+                day_duration_cost
+                >= coefficients["shorter_than_pref"]
+                * (
+                    ideal_shift_length[h] * v_dh["num_shifts"][d, i]
+                    - day_slots
+                )
+            )
+            model.Add(
+                day_duration_cost
+                >= coefficients["longer_than_pref"]
+                * (
+                    day_slots
+                    - ideal_shift_length[h] * v_dh["num_shifts"][d, i]
+                )
+            )
+
+            # dhk (mentors only):
+            # Mentors have exactly one shift on days that they mentor, so
+            # that its start and duration follow from the slots:
+            if v_dhk["is_agent_on"][d, i, 0] is None:
+                continue
+            shift_duration = sum(
+                v_dsh.values("is_agent_on_slot", np.s_[d, :, i])
+            )
+            v_dhk["shift_duration"][d, i, 0] = shift_duration
+            v_dhk["shift_start"][d, i, 0] = (
+                sum(
+                    (s + 1) * v_dsh["is_shift_end"][d, s_i, i]
+                    for s_i, s in enumerate(slots)
+                    if v_dsh["is_shift_end"][d, s_i, i] is not None
+                )
+                - shift_duration
+            )
+            model.Add(v_dh["num_shifts"][d, i] >= 1).OnlyEnforceIf(
+                v_dhk["is_agent_on"][d, i, 0]
+            )
+            model.Add(v_dh["num_shifts"][d, i] == 0).OnlyEnforceIf(
+                v_dhk["is_agent_on"][d, i, 0].Not()
+            )
+    return model
+
+
+@timed
+def cost_slots_automaton(var_veterans, coefficients, df_agents):
+    """Determine the cost terms of the slots that veterans are on."""
+    v_dsh = var_veterans["dsh"]
+    agent_slots = df_agents["slots"].to_dict()
+    cost_terms = []
+    for d in range(v_dsh.shape[0]):
+        for s_i, s in enumerate(v_dsh.labels[1]):
+            for i, h in enumerate(v_dsh.labels[2]):
+                if v_dsh["is_agent_on_slot"][d, s_i, i] is None:
+                    continue
+                # For "non_preferred", (s_cost - 1) = 1. If 3-slots
+                # included, "ask-me-nicely" would have (s_cost - 1) = 2:
+                slot_cost = coefficients["non_preferred"] * (
+                    agent_slots[h][d][s] - 1
+                )
+                if slot_cost > 0:
+                    cost_terms.append(
+                        slot_cost * v_dsh["is_agent_on_slot"][d, s_i, i]
+                    )
+    return cost_terms
+
+
+@timed
+def setup_model_veterans_automaton(
+    model, custom_domains, coefficients, df_agents, agent_categories, config
+):
+    """Set up the automaton model for veteran agents."""
+    # Configure model variables and constraints:
+    var_veterans = setup_var_grids_automaton(agent_categories, config)
+    model = fill_var_grids_automaton(
+        model,
+        custom_domains,
+        var_veterans,
+        df_agents,
+        agent_categories,
+        config,
+    )
+    model = define_general_relationships_automaton(
+        model,
+        var_veterans,
+        custom_domains,
+        coefficients,
+        df_agents,
+        agent_categories,
+        config,
+    )
+    model = constraint_hours_coverage(model, var_veterans, config)
+    model = constraint_agent_distribution(model, var_veterans, config)
+    model = constraint_weekly_custom_conditions(
+        model, var_veterans, df_agents, agent_categories, config
+    )
+    # Configure cost:
+    model = cost_total_agent_hours_for_week(
+        model, var_veterans, coefficients, df_agents, agent_categories, config
+    )
+    model = cost_multiple_shifts_per_day(
+        model, var_veterans, coefficients, agent_categories, config
+    )
+
+    # Add together resulting cost terms:
+    full_cost_list = (
+        var_veterans["h"].values("total_week_slots_cost")
+        + cost_slots_automaton(var_veterans, coefficients, df_agents)
+        + var_veterans["dsh"].values("duration_cost")
+        + var_veterans["dh"].values("multiple_shifts_cost")
+    )
+    return [model, var_veterans, full_cost_list]
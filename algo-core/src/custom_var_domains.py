@@ -15,11 +15,12 @@ limitations under the License.
 """
 
 from ortools.sat.python import cp_model
-import pandas as pd
 
 from .veterans import week_working_slots
+from .metrics import timed
 
 
+@timed
 def define_custom_var_domains(coefficients, df_agents, config):
     """Define custom model variable domains."""
     custom_domains = {}
@@ -31,67 +32,41 @@ def define_custom_var_domains(coefficients, df_agents, config):
             coefficients["non_preferred"] * (allowed_availability - 1)
         )
     custom_domains["slot_cost"] = cp_model.Domain.FromValues(values_list)
+    # Slot cost of a whole shift, and prefix sums of slot costs:
+    custom_domains["shift_slot_cost"] = cp_model.Domain(
+        0, max(values_list) * (config["end_slot"] - config["start_slot"])
+    )
 
     # Duration domain:
     custom_domains["duration"] = cp_model.Domain.FromIntervals(
         [[0, 0], [config["min_duration"], config["max_duration"]]]
     )
 
-    # Create preference domains:
-    dh_multi_index = pd.MultiIndex.from_product(
-        [[d for d in range(config["num_days"])], [h for h in df_agents.index]],
-        names=("day", "handle"),
-    )
-
-    custom_domains["prefs"] = pd.Series(
-        data=None, index=dh_multi_index, dtype="object"
-    )
-
-    for d in range(config["num_days"]):
-        for h in df_agents.index:
-            custom_domains["prefs"].loc[(d, h)] = (
-                cp_model.Domain.FromIntervals(
-                    df_agents.loc[h, "slot_ranges"][d]
-                )
+    # Create preference domains, keyed by (day, handle):
+    custom_domains["prefs"] = {}
+    for h, slot_ranges in df_agents["slot_ranges"].items():
+        for d in range(config["num_days"]):
+            custom_domains["prefs"][(d, h)] = cp_model.Domain.FromIntervals(
+                slot_ranges[d]
             )
 
     # Duration cost domain:
-    duration_cost_list = set(
-        [
-            coefficients["shorter_than_pref"] * x
-            for x in range(0, config["max_duration"] - config["min_duration"])
-        ]
-    )
-    duration_cost_list = list(
-        duration_cost_list.union(
-            set(
-                [
-                    coefficients["longer_than_pref"] * x
-                    for x in range(
-                        0, config["max_duration"] - config["min_duration"]
-                    )
-                ]
-            )
-        )
-    )
-    duration_cost_list.sort()
     custom_domains["duration_cost"] = cp_model.Domain.FromValues(
-        duration_cost_list
-    )
-
-    # Total slots per week cost domain:
-    total_week_slots_cost_list = [
-        coefficients["fair_share"] * x
-        for x in range(
-            0,
-            week_working_slots**2
-            - 2 * week_working_slots * config["min_fair_share"]
-            + (config["min_fair_share"]) ** 2,
+        sorted(
+            {
+                coefficients[deviation] * x
+                for deviation in ["shorter_than_pref", "longer_than_pref"]
+                for x in range(config["max_duration"] - config["min_duration"])
+            }
         )
-    ]
+    )
 
-    custom_domains["total_week_slots_cost"] = cp_model.Domain.FromValues(
-        total_week_slots_cost_list
+    # Total slots per week cost domain, as an interval (the cost is a
+    # multiple of the coefficient by constraint):
+    custom_domains["total_week_slots_cost"] = cp_model.Domain(
+        0,
+        coefficients["fair_share"]
+        * ((week_working_slots - config["min_fair_share"]) ** 2 - 1),
     )
 
     # Number of shifts per agent per day cost domain:
@@ -0,0 +1,464 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import numpy as np
+
+from .veterans import (
+    find_allowed_shift_durations,
+    find_slot_requirements,
+    find_weekly_slot_limits,
+)
+from .verify import verify_veteran_schedule
+
+# Constructive (greedy) heuristic for the veteran schedule. It does not use
+# the solver, and finds a schedule in well under a second, which can be
+# used as output directly (fast mode) or as a solution hint for the solver.
+
+# Schedules are given as a list with, per day, a list of veteran shifts
+# (handle, start slot, end slot), as returned by fetch_veteran_schedule().
+
+# In the code below, the following abbreviations are used:
+# d: day
+# h: Github handle
+# i: position of handle h in agent_categories["veterans"]
+# s: slot number
+# s_i: position of slot s in range(config["start_slot"], config["end_slot"])
+
+
+def find_slot_costs(coefficients, df_agents, agent_categories, config):
+    """Determine the cost of each (day, slot, handle) for veterans.
+
+    Slots that a veteran may not be scheduled for have cost -1.
+    """
+    agent_slots = df_agents["slots"].to_dict()
+    slots = range(config["start_slot"], config["end_slot"])
+    slot_costs = np.full(
+        (config["num_days"], len(slots), len(agent_categories["veterans"])),
+        -1,
+        dtype=int,
+    )
+    for i, h in enumerate(agent_categories["veterans"]):
+        for d in range(config["num_days"]):
+            if h in agent_categories["unavailable"][d]:
+                continue
+            for s_i, s in enumerate(slots):
+                if agent_slots[h][d][s] in config["allowed_availabilities"]:
+                    slot_costs[d, s_i, i] = coefficients["non_preferred"] * (
+                        agent_slots[h][d][s] - 1
+                    )
+    return slot_costs
+
+
+def find_run_lengths(is_set):
+    """Count, per position, the consecutive set entries along the last axis.
+
+    E.g. [1, 1, 0, 1] gives [2, 1, 0, 1].
+    """
+    run_lengths = np.zeros(is_set.shape[:-1] + (is_set.shape[-1] + 1,), int)
+    for j in range(is_set.shape[-1] - 1, -1, -1):
+        run_lengths[..., j] = np.where(
+            is_set[..., j], run_lengths[..., j + 1] + 1, 0
+        )
+    return run_lengths[..., :-1]
+
+
+class GreedyScheduler:
+    """Constructive heuristic that schedules veterans slot by slot.
+
+    Each day is filled from its first to its last slot: whenever a slot has
+    fewer agents (or support engineers) than agentDistribution requires, a
+    shift covering it is added for the available agent that is furthest
+    below their fair share. The duration is chosen to cover slots that
+    still need agents, at the least cost. Remaining hoursCoverage minima
+    are then met by extending shifts, or by adding shifts where
+    agentDistribution allows. Onboarders are not scheduled.
+    """
+
+    def __init__(
+        self, custom_domains, coefficients, df_agents, agent_categories, config
+    ):
+        """Set up the (empty) schedule and everything needed to fill it."""
+        self.coefficients = coefficients
+        self.config = config
+        self.handles = agent_categories["veterans"]
+        allowed_durations = find_allowed_shift_durations(
+            custom_domains, coefficients, df_agents, config
+        )
+        # Shift durations that each agent may work, with their cost:
+        self.durations = [
+            sorted(allowed_durations[h].items()) for h in self.handles
+        ]
+        weekly_slot_limits = find_weekly_slot_limits(
+            df_agents, agent_categories, config
+        )
+        self.max_week_slots = np.array(
+            [weekly_slot_limits["max"].get(h, np.inf) for h in self.handles]
+        )
+        self.fair_share = np.array(
+            [max(df_agents.loc[h, "fair_share"], 1) for h in self.handles]
+        )
+        self.is_engineer = np.array(
+            [
+                bool(df_agents.loc[h, "is_support_engineer"])
+                for h in self.handles
+            ]
+        )
+        [self.min_agents, self.max_agents, self.min_engineers] = (
+            find_slot_requirements(config, len(self.handles))
+        )
+        self.slot_costs = find_slot_costs(
+            coefficients, df_agents, agent_categories, config
+        )
+        # Number of consecutive allowed slots from each slot on:
+        self.available_run = np.moveaxis(
+            find_run_lengths(np.moveaxis(self.slot_costs >= 0, 1, -1)), -1, 1
+        )
+        # Cumulative slot costs, for the cost of a shift as a difference:
+        self.cumulative_costs = np.zeros(
+            (
+                self.slot_costs.shape[0],
+                self.slot_costs.shape[1] + 1,
+                self.slot_costs.shape[2],
+            ),
+            dtype=int,
+        )
+        self.cumulative_costs[:, 1:, :] = np.cumsum(
+            np.maximum(self.slot_costs, 0), axis=1
+        )
+
+        # The schedule, and derived quantities:
+        self.shifts = [[] for d in range(config["num_days"])]
+        self.num_agents = np.zeros(self.min_agents.shape, dtype=int)
+        self.num_engineers = np.zeros(self.min_agents.shape, dtype=int)
+        self.week_slots = np.zeros(len(self.handles), dtype=int)
+        self.covered_slots = [0] * len(config["hours_coverage"])
+
+    def get_coverage_room(self, d):
+        """Return how many slots may still be added on day d."""
+        room = np.inf
+        for j, h_cover in enumerate(self.config["hours_coverage"]):
+            if h_cover["start_day"] <= d <= h_cover["end_day"]:
+                room = min(room, h_cover["max_slots"] - self.covered_slots[j])
+        return room
+
+    def get_agent_shifts(self, d, i):
+        """Return the (start, end) positions of agent i's shifts on day d."""
+        return [(start, end) for (j, start, end) in self.shifts[d] if j == i]
+
+    def find_latest_end(self, d, i, start):
+        """Find the position up to which a shift from start may extend.
+
+        The shift has to stay within the agent's allowed slots, must not
+        overfill any slot, and must leave a gap to the agent's other shifts.
+        """
+        latest_end = start + self.available_run[d, start, i]
+        is_full = self.num_agents[d] >= self.max_agents[d]
+        if is_full[start:latest_end].any():
+            latest_end = start + int(np.argmax(is_full[start:latest_end]))
+        for other_start, other_end in self.get_agent_shifts(d, i):
+            if other_end >= start:
+                # (The shift must not touch one that ends right before it:)
+                if other_start <= start:
+                    return start
+                latest_end = min(latest_end, other_start - 1)
+        return latest_end
+
+    def find_best_shift(self, d, s_i, is_needed, engineers_only):
+        """Find the best new shift that covers slot s_i on day d.
+
+        Returns (key, i, start, end) or None. Shifts starting at s_i are
+        preferred; earlier starts are only tried if there are none.
+        """
+        num_slots = self.num_agents.shape[1]
+        num_needed = np.concatenate([[0], np.cumsum(is_needed)])
+        needed_run = find_run_lengths(is_needed)
+        room = self.get_coverage_room(d)
+        max_duration = max(
+            (durations[-1][0] for durations in self.durations if durations),
+            default=0,
+        )
+        for start in range(s_i, max(s_i - max_duration, -1), -1):
+            best = None
+            for i in range(len(self.handles)):
+                if self.slot_costs[d, start, i] < 0 or (
+                    engineers_only and not self.is_engineer[i]
+                ):
+                    continue
+                agent_shifts = self.get_agent_shifts(d, i)
+                if (
+                    len(agent_shifts)
+                    >= self.config["max_shifts_per_agent_per_day"]
+                ):
+                    continue
+                latest_end = self.find_latest_end(d, i, start)
+                if latest_end <= s_i:
+                    continue
+                load = self.week_slots[i] / self.fair_share[i]
+                multiple_shifts_cost = (
+                    self.coefficients["multiple_shifts_per_day"]
+                    if agent_shifts
+                    else 0
+                )
+                for duration, duration_cost in self.durations[i]:
+                    end = start + duration
+                    if (
+                        end <= s_i
+                        or end > latest_end
+                        or duration > room
+                        or self.week_slots[i] + duration
+                        > self.max_week_slots[i]
+                    ):
+                        continue
+                    # Slots covered that didn't need it, and slots left
+                    # needing a shift too short to be scheduled:
+                    overshoot = duration - (
+                        num_needed[end] - num_needed[start]
+                    )
+                    remainder = needed_run[end] if end < num_slots else 0
+                    if 0 < remainder < self.config["min_duration"]:
+                        overshoot += self.config["min_duration"] - remainder
+                    cost = (
+                        duration_cost
+                        + multiple_shifts_cost
+                        + self.cumulative_costs[d, end, i]
+                        - self.cumulative_costs[d, start, i]
+                    )
+                    key = (overshoot, load, cost)
+                    if best is None or key < best[0]:
+                        best = (key, i, start, end)
+            if best is not None:
+                return best
+        return None
+
+    def add_shift(self, d, i, start, end):
+        """Add a shift to the schedule."""
+        self.shifts[d].append((i, start, end))
+        self.num_agents[d, start:end] += 1
+        self.num_engineers[d, start:end] += self.is_engineer[i]
+        self.week_slots[i] += end - start
+        for j, h_cover in enumerate(self.config["hours_coverage"]):
+            if h_cover["start_day"] <= d <= h_cover["end_day"]:
+                self.covered_slots[j] += end - start
+
+    def fill_agent_distribution(self, d):
+        """Add shifts on day d until agentDistribution minima are met."""
+        for s_i in range(self.num_agents.shape[1]):
+            while True:
+                if self.num_engineers[d, s_i] < self.min_engineers[d, s_i]:
+                    engineers_only = True
+                    is_needed = self.num_engineers[d] < self.min_engineers[d]
+                elif self.num_agents[d, s_i] < self.min_agents[d, s_i]:
+                    engineers_only = False
+                    is_needed = self.num_agents[d] < self.min_agents[d]
+                else:
+                    break
+                best = self.find_best_shift(d, s_i, is_needed, engineers_only)
+                if best is None:
+                    break
+                self.add_shift(d, *best[1:])
+
+    def extend_shift(self, days):
+        """Extend one shift on the given days by a slot, if possible."""
+        best = None
+        for d in days:
+            if self.get_coverage_room(d) < 1:
+                continue
+            for n, (i, start, end) in enumerate(self.shifts[d]):
+                if self.week_slots[i] + 1 > self.max_week_slots[i]:
+                    continue
+                durations = dict(self.durations[i])
+                if end - start + 1 not in durations:
+                    continue
+                load = self.week_slots[i] / self.fair_share[i]
+                cost_change = (
+                    durations[end - start + 1] - durations[end - start]
+                )
+                # Extend at the end, or at the start:
+                options = []
+                if self.is_extendable(d, i, start, end, end):
+                    options.append((start, end + 1, end))
+                if start > 0 and self.is_extendable(
+                    d, i, start, end, start - 1
+                ):
+                    options.append((start - 1, end, start - 1))
+                for new_start, new_end, s_i in options:
+                    key = (
+                        load,
+                        cost_change + max(self.slot_costs[d, s_i, i], 0),
+                    )
+                    if best is None or key < best[0]:
+                        best = (key, d, n, new_start, new_end)
+        if best is None:
+            return False
+        [_, d, n, new_start, new_end] = best
+        (i, start, end) = self.shifts[d].pop(n)
+        self.num_agents[d, start:end] -= 1
+        self.num_engineers[d, start:end] -= self.is_engineer[i]
+        self.week_slots[i] -= end - start
+        for j, h_cover in enumerate(self.config["hours_coverage"]):
+            if h_cover["start_day"] <= d <= h_cover["end_day"]:
+                self.covered_slots[j] -= end - start
+        self.add_shift(d, i, new_start, new_end)
+        return True
+
+    def is_extendable(self, d, i, start, end, s_i):
+        """Check whether agent i's shift may be extended to slot s_i."""
+        if s_i >= self.num_agents.shape[1] or self.slot_costs[d, s_i, i] < 0:
+            return False
+        if self.num_agents[d, s_i] >= self.max_agents[d, s_i]:
+            return False
+        # The agent's other shifts must not be touched:
+        for other_start, other_end in self.get_agent_shifts(d, i):
+            if (other_start, other_end) != (start, end) and (
+                other_start - 1 <= s_i <= other_end
+            ):
+                return False
+        return True
+
+    def add_coverage_shift(self, days):
+        """Add a shift on the given days wherever agents may be added."""
+        for d in days:
+            is_needed = self.num_agents[d] < self.max_agents[d]
+            for s_i in np.argsort(self.num_agents[d], kind="stable"):
+                if not is_needed[s_i]:
+                    continue
+                best = self.find_best_shift(d, s_i, is_needed, False)
+                if best is not None:
+                    self.add_shift(d, *best[1:])
+                    return True
+        return False
+
+    def fill_hours_coverage(self):
+        """Extend and add shifts until hoursCoverage minima are met."""
+        for j, h_cover in enumerate(self.config["hours_coverage"]):
+            days = range(h_cover["start_day"], h_cover["end_day"] + 1)
+            while self.covered_slots[j] < h_cover["min_slots"]:
+                if not (
+                    self.extend_shift(days) or self.add_coverage_shift(days)
+                ):
+                    break
+
+    def get_schedule(self):
+        """Return the schedule as lists of (handle, start, end) per day."""
+        start_slot = self.config["start_slot"]
+        return [
+            sorted(
+                (self.handles[i], start + start_slot, end + start_slot)
+                for (i, start, end) in day_shifts
+            )
+            for day_shifts in self.shifts
+        ]
+
+
+def construct_greedy_schedule(
+    custom_domains, coefficients, df_agents, agent_categories, config
+):
+    """Construct a veteran schedule with the greedy heuristic."""
+    scheduler = GreedyScheduler(
+        custom_domains, coefficients, df_agents, agent_categories, config
+    )
+    for d in range(config["num_days"]):
+        scheduler.fill_agent_distribution(d)
+    scheduler.fill_hours_coverage()
+    return scheduler.get_schedule()
+
+
+def find_schedule_violations(
+    schedule, custom_domains, coefficients, df_agents, agent_categories, config
+):
+    """List the ways in which a veteran schedule violates the constraints.
+
+    Availability, overlapping shifts, agentDistribution and hoursCoverage
+    are checked by verify_veteran_schedule(), and shift durations and
+    counts, support hours and weekly limits here. An empty list means the
+    schedule is feasible (for veterans).
+    """
+    summary = verify_veteran_schedule(
+        schedule, coefficients, df_agents, agent_categories, config
+    )
+    violations = [
+        f"Day {date}: {h} is scheduled outside their availability."
+        for date, h in sorted(
+            {(slot["date"], slot["agent"]) for slot in summary["violations"]}
+        )
+    ]
+    violations += [
+        f"Day {date}: {h} has overlapping shifts."
+        for date, h in sorted(
+            {(slot["date"], slot["agent"]) for slot in summary["overlaps"]}
+        )
+    ]
+    for a_distribution in summary["distribution"]:
+        for slot in a_distribution["unmet_slots"]:
+            violations.append(
+                f"Day {slot['date']}: agentDistribution not met in slot "
+                f"{slot['slot']} ({slot['agents']} agents)."
+            )
+    for h_cover in summary["coverage"]:
+        if not h_cover["met"]:
+            violations.append(
+                f"Days {h_cover['start_day']}-{h_cover['end_day']}: "
+                f"hoursCoverage not met ({h_cover['hours']} hours)."
+            )
+
+    handles = agent_categories["veterans"]
+    allowed_durations = find_allowed_shift_durations(
+        custom_domains, coefficients, df_agents, config
+    )
+    week_slots = dict.fromkeys(handles, 0)
+    for day, day_shifts in zip(config["days"], schedule):
+        date = day.strftime("%Y-%m-%d")
+        num_shifts = {}
+        for h, start, end in day_shifts:
+            if h not in week_slots:
+                violations.append(f"Day {date}: {h} is not a veteran.")
+                continue
+            if start < config["start_slot"] or end > config["end_slot"]:
+                violations.append(
+                    f"Day {date}: shift {start}-{end} of {h} is outside "
+                    "support hours."
+                )
+            if end - start not in allowed_durations[h]:
+                violations.append(
+                    f"Day {date}: shift {start}-{end} of {h} has a duration "
+                    "that is not allowed."
+                )
+            week_slots[h] += end - start
+            num_shifts[h] = num_shifts.get(h, 0) + 1
+        for h, n in num_shifts.items():
+            if n > config["max_shifts_per_agent_per_day"]:
+                violations.append(f"Day {date}: {h} has too many shifts.")
+
+    # Weekly limits:
+    weekly_slot_limits = find_weekly_slot_limits(
+        df_agents, agent_categories, config
+    )
+    for h, slots in weekly_slot_limits["min"].items():
+        if h in week_slots and week_slots[h] < slots:
+            violations.append(f"{h} has fewer than {slots} slots this week.")
+    for h, slots in weekly_slot_limits["max"].items():
+        if h in week_slots and week_slots[h] > slots:
+            violations.append(f"{h} has more than {slots} slots this week.")
+    return violations
+
+
+def calculate_schedule_cost(
+    schedule, coefficients, df_agents, agent_categories, config
+):
+    """Calculate the cost of a veteran schedule, as the solver would."""
+    return verify_veteran_schedule(
+        schedule, coefficients, df_agents, agent_categories, config
+    )["total_cost"]
@@ -0,0 +1,331 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from .veterans import find_prefix_slot_costs, get_duration_cost
+from .metrics import timed
+
+# Solution hints: given the veteran shifts per agent-day (keyed by (day,
+# handle), with a list of (start, end) per key), set the hint of every
+# related model variable to the value it takes in that schedule, so that the
+# solver can start its search from there. Agent-days that are missing are
+# left unhinted, which allows partial schedules to be hinted.
+
+# In the code below, the following abbreviations are used:
+# d: day
+# h: Github handle
+# i: position of handle h in agent_categories["veterans"]
+# k: shift track
+# s: slot number
+# s_i: position of slot s in range(config["start_slot"], config["end_slot"])
+
+
+def add_hint(model, var, value):
+    """Hint a single variable, if it exists."""
+    if var is not None:
+        model.AddHint(var, int(value))
+        return 1
+    return 0
+
+
+def find_agent_day_shifts(schedule, agent_categories, config):
+    """Sort the schedule's shifts by (day, handle), ordered by start.
+
+    The schedule is a list with, per day, a list of shifts (handle, start,
+    end), as returned by fetch_veteran_schedule().
+    """
+    agent_day_shifts = {}
+    for d in range(config["num_days"]):
+        for h in agent_categories["veterans"]:
+            agent_day_shifts[(d, h)] = []
+        for h, start, end in sorted(schedule[d], key=lambda x: x[1]):
+            if (d, h) in agent_day_shifts:
+                agent_day_shifts[(d, h)].append((start, end))
+    return agent_day_shifts
+
+
+def add_weekly_and_daily_hints(
+    model, var_veterans, agent_day_shifts, coefficients, df_agents, config
+):
+    """Hint the per-agent (h) and per-agent-day (dh) variables.
+
+    The weekly variables are only hinted for agents with all days given.
+    """
+    v_h = var_veterans["h"]
+    v_dh = var_veterans["dh"]
+    fair_share = df_agents["fair_share"].to_dict()
+    num_hints = 0
+    for (d, h), shifts in agent_day_shifts.items():
+        i = v_dh.pos("handle", h)
+        num_shifts = len(shifts)
+        num_hints += add_hint(model, v_dh["num_shifts"][d, i], num_shifts)
+        num_hints += add_hint(
+            model, v_dh["has_multiple_shifts"][d, i], num_shifts > 1
+        )
+        num_hints += add_hint(
+            model,
+            v_dh["multiple_shifts_cost"][d, i],
+            coefficients["multiple_shifts_per_day"] * max(num_shifts - 1, 0),
+        )
+    for i, h in enumerate(v_h.labels[0]):
+        if any(
+            (d, h) not in agent_day_shifts for d in range(config["num_days"])
+        ):
+            continue
+        total_week_slots = sum(
+            end - start
+            for d in range(config["num_days"])
+            for start, end in agent_day_shifts[(d, h)]
+        )
+        more_than_fair_share = total_week_slots > fair_share[h]
+        num_hints += add_hint(
+            model, v_h["more_than_fair_share"][i], more_than_fair_share
+        )
+        num_hints += add_hint(
+            model, v_h["total_week_slots"][i], total_week_slots
+        )
+        num_hints += add_hint(
+            model, v_h["total_week_slots_squared"][i], total_week_slots**2
+        )
+        num_hints += add_hint(
+            model,
+            v_h["fair_share_overshoot"][i],
+            max(total_week_slots - fair_share[h], 0),
+        )
+        num_hints += add_hint(
+            model,
+            v_h["total_week_slots_cost"][i],
+            more_than_fair_share
+            * coefficients["fair_share"]
+            * (total_week_slots - fair_share[h]) ** 2,
+        )
+    return num_hints
+
+
+def add_interval_hints(
+    model,
+    var_veterans,
+    agent_day_shifts,
+    coefficients,
+    df_agents,
+    agent_categories,
+    config,
+):
+    """Hint the variables of the interval formulation."""
+    v_dhk = var_veterans["dhk"]
+    v_dsh = var_veterans["dsh"]
+    v_dshk = var_veterans["dshk"]
+    slots = v_dsh.labels[1]
+    agent_slots = df_agents["slots"].to_dict()
+    slot_ranges = df_agents["slot_ranges"].to_dict()
+    ideal_shift_length = df_agents["ideal_shift_length"].to_dict()
+    is_support_engineer = df_agents["is_support_engineer"].to_dict()
+    num_hints = 0
+    for (d, h), shifts in agent_day_shifts.items():
+        i = v_dhk.pos("handle", h)
+        # dhk, dshk:
+        for k in range(config["max_shifts_per_agent_per_day"]):
+            if v_dhk["is_agent_on"][d, i, k] is None:
+                continue
+            if k < len(shifts):
+                start, end = shifts[k]
+            else:
+                # Unused tracks have zero duration, at the first slot that
+                # their domain allows:
+                if h in agent_categories["unavailable"][d]:
+                    start = end = 12
+                elif slot_ranges[h][d]:
+                    start = end = slot_ranges[h][d][0][0]
+                else:
+                    continue
+            num_hints += add_hint(
+                model, v_dhk["is_agent_on"][d, i, k], end > start
+            )
+            num_hints += add_hint(model, v_dhk["shift_start"][d, i, k], start)
+            num_hints += add_hint(model, v_dhk["shift_end"][d, i, k], end)
+            num_hints += add_hint(
+                model, v_dhk["shift_duration"][d, i, k], end - start
+            )
+            if v_dhk["slot_cost"][d, i, k] is not None:
+                prefix_slot_costs = find_prefix_slot_costs(
+                    coefficients, agent_slots[h][d], config
+                )
+                num_hints += add_hint(
+                    model,
+                    v_dhk["start_prefix_cost"][d, i, k],
+                    prefix_slot_costs[start],
+                )
+                num_hints += add_hint(
+                    model,
+                    v_dhk["end_prefix_cost"][d, i, k],
+                    prefix_slot_costs[end],
+                )
+                num_hints += add_hint(
+                    model,
+                    v_dhk["slot_cost"][d, i, k],
+                    prefix_slot_costs[end] - prefix_slot_costs[start],
+                )
+            num_hints += add_hint(
+                model,
+                v_dhk["is_duration_shorter_than_ideal"][d, i, k],
+                end - start < ideal_shift_length[h],
+            )
+            num_hints += add_hint(
+                model,
+                v_dhk["duration_cost"][d, i, k],
+                (end > start)
+                * get_duration_cost(
+                    end - start, ideal_shift_length[h], coefficients
+                ),
+            )
+            is_in_range_found = False
+            for j, (range_start, range_end) in enumerate(slot_ranges[h][d]):
+                is_in_range = (
+                    not is_in_range_found
+                    and end > start
+                    and range_start <= start
+                    and end <= range_end
+                )
+                is_in_range_found |= is_in_range
+                num_hints += add_hint(
+                    model, v_dhk["is_in_pref_range"][d, i, k][j], is_in_range
+                )
+            for s_i, s in enumerate(slots):
+                num_hints += add_hint(
+                    model,
+                    v_dshk["is_start_smaller_equal_slot"][d, s_i, i, k],
+                    start <= s,
+                )
+                num_hints += add_hint(
+                    model,
+                    v_dshk["is_end_greater_than_slot"][d, s_i, i, k],
+                    end > s,
+                )
+                num_hints += add_hint(
+                    model,
+                    v_dshk["interval_covers_slot"][d, s_i, i, k],
+                    start <= s < end,
+                )
+        # dsh:
+        for s_i, s in enumerate(slots):
+            is_on = any(start <= s < end for start, end in shifts)
+            num_hints += add_hint(
+                model, v_dsh["is_agent_on_slot"][d, s_i, i], is_on
+            )
+            num_hints += add_hint(
+                model,
+                v_dsh["is_agent_on_slot_engineer"][d, s_i, i],
+                is_on and is_support_engineer[h],
+            )
+            num_hints += add_hint(
+                model,
+                v_dsh["slot_cost"][d, s_i, i],
+                is_on
+                * coefficients["non_preferred"]
+                * (agent_slots[h][d][s] - 1),
+            )
+    return num_hints
+
+
+def add_pattern_hints(model, var_veterans, agent_day_shifts):
+    """Hint the variables of the shift-pattern formulation."""
+    v_p = var_veterans["p"]
+    v_dhk = var_veterans["dhk"]
+    num_hints = 0
+    for p, (d, h, start, end) in enumerate(v_p.labels[0]):
+        if (d, h) not in agent_day_shifts:
+            continue
+        num_hints += add_hint(
+            model,
+            v_p["is_selected"][p],
+            (start, end) in agent_day_shifts[(d, h)],
+        )
+    for (d, h), shifts in agent_day_shifts.items():
+        num_hints += add_hint(
+            model,
+            v_dhk["is_agent_on"][d, v_dhk.pos("handle", h), 0],
+            len(shifts) > 0,
+        )
+    return num_hints
+
+
+def add_automaton_hints(
+    model, var_veterans, agent_day_shifts, coefficients, df_agents
+):
+    """Hint the variables of the automaton formulation."""
+    v_dhk = var_veterans["dhk"]
+    v_dsh = var_veterans["dsh"]
+    ideal_shift_length = df_agents["ideal_shift_length"].to_dict()
+    num_hints = 0
+    for (d, h), shifts in agent_day_shifts.items():
+        i = v_dsh.pos("handle", h)
+        for s_i, s in enumerate(v_dsh.labels[1]):
+            ending = [(start, end) for start, end in shifts if end == s + 1]
+            num_hints += add_hint(
+                model,
+                v_dsh["is_agent_on_slot"][d, s_i, i],
+                any(start <= s < end for start, end in shifts),
+            )
+            num_hints += add_hint(
+                model, v_dsh["is_shift_end"][d, s_i, i], len(ending) > 0
+            )
+            num_hints += add_hint(
+                model,
+                v_dsh["duration_cost"][d, s_i, i],
+                sum(
+                    get_duration_cost(
+                        end - start, ideal_shift_length[h], coefficients
+                    )
+                    for start, end in ending
+                ),
+            )
+        num_hints += add_hint(
+            model, v_dhk["is_agent_on"][d, i, 0], len(shifts) > 0
+        )
+    return num_hints
+
+
+@timed
+def add_schedule_hints(
+    model,
+    var_veterans,
+    agent_day_shifts,
+    coefficients,
+    df_agents,
+    agent_categories,
+    config,
+):
+    """Hint the veteran model variables with the values of a schedule."""
+    num_hints = add_weekly_and_daily_hints(
+        model, var_veterans, agent_day_shifts, coefficients, df_agents, config
+    )
+    if config["veteran_formulation"] == "patterns":
+        num_hints += add_pattern_hints(model, var_veterans, agent_day_shifts)
+    elif config["veteran_formulation"] == "automaton":
+        num_hints += add_automaton_hints(
+            model, var_veterans, agent_day_shifts, coefficients, df_agents
+        )
+    else:
+        num_hints += add_interval_hints(
+            model,
+            var_veterans,
+            agent_day_shifts,
+            coefficients,
+            df_agents,
+            agent_categories,
+            config,
+        )
+    print(f"\nAdded solution hints for {num_hints} model variables.")
+    return model
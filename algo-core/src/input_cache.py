@@ -0,0 +1,129 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import hashlib
+import json
+import os
+import numpy as np
+from pathlib import Path
+
+from .process_input import load_availability
+
+# Cache of a validated scheduler input, next to the input file: the
+# availability of all agents is stored as an agents × days × slots int8
+# array in a .npy file (which is memory-mapped when read), and the options
+# and remaining agent properties in a small metadata file. The cache is
+# keyed by a hash of the input file and of the input schema, so that it is
+# only used if neither changed since the input was validated.
+
+# Bump when the cached form changes, to invalidate existing caches:
+cache_version = 1
+
+
+def find_input_hash(input_bytes, schema_path):
+    """Hash the input, together with the schema it was validated against."""
+    input_hash = hashlib.sha256(f"v{cache_version}\n".encode())
+    input_hash.update(Path(schema_path).read_bytes())
+    input_hash.update(input_bytes)
+    return input_hash.hexdigest()
+
+
+def get_cache_path(input_path):
+    """Return the path of the metadata file of an input's cache."""
+    input_path = Path(input_path)
+    return input_path.with_name(f"{input_path.stem}.cache.json")
+
+
+def read_cache_metadata(cache_path):
+    """Read the metadata of a cache, or return None if it is unreadable."""
+    try:
+        return json.load(open(cache_path))
+    except (OSError, ValueError):
+        return None
+
+
+def read_input_cache(input_path, input_hash):
+    """Read an input from its cache, or return None if it is not cached.
+
+    Each agent's availableSlots is a view into the memory-mapped
+    availability array, as a days × slots array (or a list of arrays per
+    day, if the days have different numbers of slots).
+    """
+    cache_path = get_cache_path(input_path)
+    metadata = read_cache_metadata(cache_path)
+    if metadata is None or metadata["hash"] != input_hash:
+        return None
+    try:
+        availability = np.load(
+            cache_path.with_name(metadata["availability"]), mmap_mode="r"
+        )
+    except (OSError, ValueError):
+        return None
+    agents = metadata["agents"]
+    for agent, agent_availability, lengths in zip(
+        agents, availability, metadata["lengths"]
+    ):
+        if len(set(lengths)) == 1:
+            agent["availableSlots"] = agent_availability[:, :lengths[0]]
+        else:
+            agent["availableSlots"] = [
+                day_availability[:length]
+                for day_availability, length in zip(
+                    agent_availability, lengths
+                )
+            ]
+    return {"agents": agents, "options": metadata["options"]}
+
+
+def write_input_cache(input_json, input_path, input_hash):
+    """Write the cache of a validated input, replacing any previous one."""
+    cache_path = get_cache_path(input_path)
+    previous_metadata = read_cache_metadata(cache_path)
+    [availability, in_row] = load_availability(input_json["agents"])
+    array_path = cache_path.with_name(
+        f"{Path(input_path).stem}.cache-{input_hash[:16]}.npy"
+    )
+    with open(f"{array_path}.tmp", "wb") as array_file:
+        np.save(array_file, availability)
+    os.replace(f"{array_path}.tmp", array_path)
+
+    # The metadata is written last, so that it only refers to a complete
+    # array:
+    metadata = {
+        "hash": input_hash,
+        "availability": array_path.name,
+        "lengths": in_row.sum(axis=2).tolist(),
+        "options": input_json["options"],
+        "agents": [
+            {
+                key: value
+                for key, value in agent.items()
+                if key not in ["availableSlots", "availableRanges"]
+            }
+            for agent in input_json["agents"]
+        ],
+    }
+    with open(f"{cache_path}.tmp", "w") as metadata_file:
+        json.dump(metadata, metadata_file)
+    os.replace(f"{cache_path}.tmp", cache_path)
+    if (
+        previous_metadata is not None
+        and previous_metadata.get("availability") != array_path.name
+    ):
+        cache_path.with_name(previous_metadata["availability"]).unlink(
+            missing_ok=True
+        )
+    return cache_path
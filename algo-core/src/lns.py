@@ -0,0 +1,425 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import concurrent.futures
+import math
+import multiprocessing
+import random
+import signal
+import threading
+import time
+import numpy as np
+from ortools.sat.python import cp_model
+
+from .metrics import timed
+from .search import (
+    ObjectiveTracker,
+    is_stalled,
+    solve_interruptibly,
+    stop_on_signals,
+)
+from .solver_profiles import get_solver_parameters, set_solver_parameters
+
+# Large neighbourhood search (LNS): starting from an incumbent solution,
+# repeatedly free a neighbourhood of the veterans' (day, slot, agent) cells,
+# fix all other cells to the incumbent via variable bounds, and re-solve
+# with a short time limit, hinted with the incumbent. Neighbourhoods are
+# solved in parallel in a process pool; improvements found on an older
+# incumbent are merged into the current one and checked by the solver.
+# Like the solver of the full model, LNS stops early on SIGINT or SIGTERM,
+# at the relative gap limit or when the objective stalls; neighbourhoods
+# that are being solved are finished first.
+
+# In the code below, the following abbreviations are used:
+# d: day
+# h: Github handle
+# i: position of handle h in agent_categories["veterans"]
+# s: slot number
+# s_i: position of slot s in range(config["start_slot"], config["end_slot"])
+
+neighbourhood_kinds = ["day", "slot_block", "fair_share", "random_agents"]
+
+# Model of the worker process, set up by init_lns_worker():
+worker_state = {}
+
+
+def find_slot_occupancy(var_veterans, agent_categories, config):
+    """Find the model variables that put a veteran on a slot.
+
+    Returns {(d, s_i, i): [variable index, ...]}, where at most one of the
+    variables of a cell can be true.
+    """
+    slot_occupancy = {}
+    if config["veteran_formulation"] == "patterns":
+        v_p = var_veterans["p"]
+        v_dh = var_veterans["dh"]
+        for p, (d, h, start, end) in enumerate(v_p.labels[0]):
+            i = v_dh.pos("handle", h)
+            for s in range(start, end):
+                slot_occupancy.setdefault(
+                    (d, s - config["start_slot"], i), []
+                ).append(v_p["is_selected"][p].Index())
+        return slot_occupancy
+
+    v_dsh = var_veterans["dsh"]
+    for d in range(config["num_days"]):
+        for s_i in range(len(v_dsh.labels[1])):
+            for i in range(len(agent_categories["veterans"])):
+                x = v_dsh["is_agent_on_slot"][d, s_i, i]
+                if x is not None:
+                    slot_occupancy[(d, s_i, i)] = [x.Index()]
+    return slot_occupancy
+
+
+def find_is_on(solution, slot_occupancy, shape):
+    """Find the (d, s_i, i) cells that veterans are on in a solution."""
+    is_on = np.zeros(shape, np.int8)
+    for cell, indices in slot_occupancy.items():
+        is_on[cell] = sum(solution[j] for j in indices)
+    return is_on
+
+
+def fix_cells(proto, slot_occupancy, is_on, free):
+    """Fix the occupancy of all cells that are not free."""
+    for cell, indices in slot_occupancy.items():
+        if free[cell]:
+            continue
+        if is_on[cell] == 0 or len(indices) == 1:
+            for j in indices:
+                proto.variables[j].domain.clear()
+                proto.variables[j].domain.extend([is_on[cell]] * 2)
+        else:
+            constraint = proto.constraints.add()
+            constraint.linear.vars.extend(indices)
+            constraint.linear.coeffs.extend([1] * len(indices))
+            constraint.linear.domain.extend([1, 1])
+
+
+def solve_fixed(
+    model, slot_occupancy, solution, is_on, free, time_limit, num_workers, seed
+):
+    """Solve a copy of the model with the cells outside free fixed.
+
+    The copy is hinted with the given solution. Returns [solver, status].
+    """
+    model = model.clone()
+    proto = model.Proto()
+    proto.clear_solution_hint()
+    proto.solution_hint.vars.extend(range(len(solution)))
+    proto.solution_hint.values.extend(solution)
+    fix_cells(proto, slot_occupancy, is_on, free)
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    solver.parameters.num_search_workers = num_workers
+    solver.parameters.random_seed = seed
+    status = solver.Solve(model)
+    return [solver, status]
+
+
+def add_objective_cutoff(model, cutoff):
+    """Only accept solutions with an objective of at most cutoff."""
+    objective = model.Proto().objective
+    constraint = model.Proto().constraints.add()
+    constraint.linear.vars.extend(objective.vars)
+    constraint.linear.coeffs.extend(objective.coeffs)
+    constraint.linear.domain.extend(
+        [cp_model.INT_MIN, math.floor(cutoff - objective.offset)]
+    )
+
+
+def setup_initial_solver(parameters, config):
+    """Set up the solver for the initial solution of the full model.
+
+    Like run_solver(), it uses the parameters of the solver profile, but it
+    stops at the first solution.
+    """
+    solver = cp_model.CpSolver()
+    set_solver_parameters(solver, parameters)
+    solver.parameters.max_time_in_seconds = config["optimization_timeout"]
+    solver.parameters.stop_after_first_solution = True
+    # SIGINT is handled by solve_interruptibly() instead:
+    solver.parameters.catch_sigint_signal = False
+    return solver
+
+
+def init_lns_worker(model_text, slot_occupancy):
+    """Set up the model in a worker process of the pool.
+
+    Signals are left to the main process, which stops the search; CP-SAT
+    still stops a running solve on SIGINT.
+    """
+    for signum in [signal.SIGINT, signal.SIGTERM]:
+        signal.signal(signum, signal.SIG_IGN)
+    model = cp_model.CpModel()
+    model.Proto().merge_text_format(model_text)
+    worker_state["model"] = model
+    worker_state["slot_occupancy"] = slot_occupancy
+
+
+def solve_neighbourhood(solution, is_on, free, time_limit, num_workers, seed):
+    """Re-solve a neighbourhood in a worker process.
+
+    Returns [objective, solution], or [None, None] if no solution was found.
+    """
+    [solver, status] = solve_fixed(
+        worker_state["model"],
+        worker_state["slot_occupancy"],
+        solution,
+        is_on,
+        free,
+        time_limit,
+        num_workers,
+        seed,
+    )
+    if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+        return [None, None]
+    return [solver.ObjectiveValue(), list(solver.ResponseProto().solution)]
+
+
+def choose_neighbourhood(kind, is_on, rng, df_agents, agent_categories):
+    """Choose the cells to free, for the given kind of neighbourhood."""
+    [num_days, num_slots, num_agents] = is_on.shape
+    free = np.zeros(is_on.shape, bool)
+    if kind == "day":
+        free[rng.randrange(num_days)] = True
+    elif kind == "slot_block":
+        width = max(num_slots // 4, 1)
+        start = rng.randrange(num_slots - width + 1)
+        free[:, start:start + width] = True
+    elif kind == "fair_share":
+        # Agents most above their fair share, and those most below it, who
+        # could take over some of their slots:
+        fair_share = df_agents.loc[
+            agent_categories["veterans"], "fair_share"
+        ].to_numpy()
+        overshoot = is_on.sum(axis=(0, 1)) - fair_share
+        num_freed = max(num_agents // 10, 1)
+        order = np.argsort(overshoot)
+        free[:, :, order[-num_freed:]] = True
+        free[:, :, order[:num_freed]] = True
+    else:
+        agents = rng.sample(range(num_agents), max(num_agents // 5, 1))
+        free[:, :, agents] = True
+    return free
+
+
+def should_stop(stopped, progress, bound, elapsed, gap_limit, config):
+    """Check whether LNS should stop before the timeout.
+
+    LNS stops once the event stopped is set by a signal, once the relative
+    gap between the incumbent and the bound of the initial solve is within
+    gap_limit, or once the objective hasn't improved for
+    config["stall_timeout"] seconds.
+    """
+    if stopped.is_set():
+        return True
+    objective = progress[-1][1]
+    if gap_limit is not None and abs(objective - bound) <= gap_limit * max(
+        1, abs(objective)
+    ):
+        print(f"\nLNS: relative gap within {gap_limit}, stopping search.")
+        return True
+    if is_stalled(progress, elapsed, config):
+        print(
+            f"\nNo improvement for {config['stall_timeout']} s, "
+            "stopping search."
+        )
+        return True
+    return False
+
+
+@timed
+def run_lns(
+    model, var_veterans, df_agents, agent_categories, config, writer=None
+):
+    """Improve the solution of the model by large neighbourhood search.
+
+    The model needs to have its objective set; the objective cutoff of the
+    solver profile, if any, is added to it. Each improving solution is
+    written by the writer (a SolutionWriter), if given. Returns [solver,
+    status, progress], where solver holds the final solution and progress
+    lists the (wall time, objective) of each improvement. The solver's
+    bound and wall time are those of the final solve, in which everything
+    is fixed.
+    """
+    start = time.perf_counter()
+    deadline = start + config["optimization_timeout"]
+    time_limit = config["lns_neighbourhood_timeout"]
+    num_processes = config["lns_workers"]
+    num_workers = max(config["num_cores"] // num_processes, 1)
+    slot_occupancy = find_slot_occupancy(
+        var_veterans, agent_categories, config
+    )
+    shape = (
+        config["num_days"],
+        config["end_slot"] - config["start_slot"],
+        len(agent_categories["veterans"]),
+    )
+    no_free = np.zeros(shape, bool)
+    rng = random.Random(config["random_seed"] or 0)
+    progress = []
+
+    parameters = get_solver_parameters(config)
+    num_full_workers = parameters["num_search_workers"]
+    stopped = threading.Event()
+
+    # Only accept solutions below the cutoff, as in run_solver():
+    if parameters["objective_cutoff"] is not None:
+        add_objective_cutoff(model, parameters["objective_cutoff"])
+
+    # Initial solution, from a solve of the full model that stops at the
+    # first solution:
+    solver = setup_initial_solver(parameters, config)
+    status = solve_interruptibly(
+        solver, model, writer or ObjectiveTracker(), config, stopped
+    )
+    if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+        return [solver, status, progress]
+    if status == cp_model.OPTIMAL:
+        print("\nLNS: initial solution is optimal.")
+        return [solver, status, progress]
+    objective = solver.ObjectiveValue()
+    bound = solver.BestObjectiveBound()
+    solution = list(solver.ResponseProto().solution)
+    is_on = find_is_on(solution, slot_occupancy, shape)
+    version = 0
+    progress.append((time.perf_counter() - start, objective))
+    print(
+        f"\nLNS: initial objective {objective} after {progress[0][0]:.1f} s."
+    )
+    if stopped.is_set():
+        return [solver, status, progress]
+
+    # Re-solve neighbourhoods in parallel until the timeout, or until the
+    # search is stopped early:
+    executor = concurrent.futures.ProcessPoolExecutor(
+        max_workers=num_processes,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=init_lns_worker,
+        initargs=(str(model.Proto()), slot_occupancy),
+    )
+    pending = {}
+    num_tasks = 0
+    num_improvements = 0
+    is_stopping = False
+    with stop_on_signals(stopped.set):
+        while True:
+            is_stopping = is_stopping or should_stop(
+                stopped,
+                progress,
+                bound,
+                time.perf_counter() - start,
+                parameters.get("relative_gap_limit"),
+                config,
+            )
+            remaining = deadline - time.perf_counter()
+            while (
+                not is_stopping
+                and remaining > 1
+                and len(pending) < num_processes
+            ):
+                kind = neighbourhood_kinds[
+                    num_tasks % len(neighbourhood_kinds)
+                ]
+                free = choose_neighbourhood(
+                    kind, is_on, rng, df_agents, agent_categories
+                )
+                future = executor.submit(
+                    solve_neighbourhood,
+                    solution,
+                    is_on,
+                    free,
+                    min(time_limit, remaining),
+                    num_workers,
+                    num_tasks,
+                )
+                pending[future] = (kind, free, version)
+                num_tasks += 1
+            if not pending:
+                break
+            # Wait with a timeout, to check for signals meanwhile:
+            done, _ = concurrent.futures.wait(
+                pending,
+                timeout=0.5,
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            for future in done:
+                (kind, free, base_version) = pending.pop(future)
+                [new_objective, new_solution] = future.result()
+                if new_objective is None or new_objective >= objective:
+                    continue
+                new_is_on = find_is_on(new_solution, slot_occupancy, shape)
+                if base_version != version:
+                    # Merge the neighbourhood into the current incumbent,
+                    # which the solver then has to complete and check:
+                    new_is_on = np.where(free, new_is_on, is_on)
+                    [merge_solver, merge_status] = solve_fixed(
+                        model,
+                        slot_occupancy,
+                        new_solution,
+                        new_is_on,
+                        no_free,
+                        min(
+                            time_limit, max(deadline - time.perf_counter(), 1)
+                        ),
+                        num_workers,
+                        0,
+                    )
+                    if merge_status not in [
+                        cp_model.OPTIMAL,
+                        cp_model.FEASIBLE,
+                    ]:
+                        continue
+                    new_objective = merge_solver.ObjectiveValue()
+                    new_solution = list(merge_solver.ResponseProto().solution)
+                    if new_objective >= objective:
+                        continue
+                objective = new_objective
+                solution = new_solution
+                is_on = new_is_on
+                version += 1
+                num_improvements += 1
+                progress.append((time.perf_counter() - start, objective))
+                print(
+                    f"LNS: objective {objective} after "
+                    f"{progress[-1][0]:.1f} s ({kind} neighbourhood)."
+                )
+                if writer is not None:
+                    writer.write_solution(
+                        solution, objective, None, progress[-1][0]
+                    )
+    executor.shutdown()
+    print(
+        f"LNS: {num_improvements} improvements in {num_tasks} "
+        "neighbourhoods."
+    )
+
+    # Final solution, with all cells fixed to the incumbent:
+    [solver, status] = solve_fixed(
+        model,
+        slot_occupancy,
+        solution,
+        is_on,
+        no_free,
+        time_limit,
+        num_full_workers,
+        0,
+    )
+    # The fixed model is solved to optimality, but the LNS solution is only
+    # known to be feasible:
+    if status == cp_model.OPTIMAL:
+        status = cp_model.FEASIBLE
+    return [solver, status, progress]
@@ -0,0 +1,137 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import cProfile
+import contextlib
+import functools
+import json
+import resource
+import time
+import tracemalloc
+from pathlib import Path
+
+# Instrumentation of a scheduler run: phases are timed with nestable timers
+# (the phase() context manager, or the @timed decorator for functions), and
+# collected into a tree that write_metrics() saves as JSON. Repeated phases
+# under the same parent are aggregated. Optionally, memory deltas are
+# traced, and each top-level phase is profiled with cProfile. Memory deltas
+# only cover Python allocations (traced by tracemalloc); memory held by the
+# solver itself shows in the peak resident set size (max_rss).
+
+settings = {"memory": False, "profile": False}
+
+# Tree of phases, and the path to the phase currently running:
+root_phase = {"seconds": 0.0, "calls": 0, "phases": {}}
+phase_stack = [root_phase]
+
+# cProfile profilers, per top-level phase:
+profilers = {}
+
+
+def enable_metrics(memory=False, profile=False):
+    """Enable tracing of memory and/or profiling of top-level phases."""
+    settings["memory"] = memory
+    settings["profile"] = profile
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def reset_metrics():
+    """Discard the metrics collected so far, e.g. in a reused process."""
+    root_phase["phases"].clear()
+    profilers.clear()
+
+
+@contextlib.contextmanager
+def phase(name):
+    """Time a phase of the run, nested within the current phase."""
+    record = phase_stack[-1]["phases"].setdefault(
+        name, {"seconds": 0.0, "calls": 0, "phases": {}}
+    )
+    profiler = None
+    if settings["profile"] and len(phase_stack) == 1:
+        profiler = profilers.setdefault(name, cProfile.Profile())
+    is_tracing_memory = settings["memory"] and tracemalloc.is_tracing()
+    if is_tracing_memory:
+        memory_before = tracemalloc.get_traced_memory()[0]
+    phase_stack.append(record)
+    if profiler is not None:
+        profiler.enable()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record["seconds"] += time.perf_counter() - start
+        record["calls"] += 1
+        if profiler is not None:
+            profiler.disable()
+        if is_tracing_memory:
+            record["memory_delta"] = (
+                record.get("memory_delta", 0)
+                + tracemalloc.get_traced_memory()[0]
+                - memory_before
+            )
+        phase_stack.pop()
+
+
+def timed(function):
+    """Time each call of a function as a phase."""
+
+    @functools.wraps(function)
+    def timed_function(*args, **kwargs):
+        with phase(function.__name__):
+            return function(*args, **kwargs)
+
+    return timed_function
+
+
+def format_phases(phases):
+    """Convert phase records into a JSON-compatible list."""
+    return [
+        {
+            "name": name,
+            **{key: value for key, value in record.items() if key != "phases"},
+            "phases": format_phases(record["phases"]),
+        }
+        for name, record in phases.items()
+    ]
+
+
+def get_metrics():
+    """Return the metrics collected so far."""
+    metrics = {
+        "total_seconds": sum(
+            record["seconds"] for record in root_phase["phases"].values()
+        ),
+        # Peak resident set size of the process, in kB (on Linux):
+        "max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "phases": format_phases(root_phase["phases"]),
+    }
+    if settings["memory"] and tracemalloc.is_tracing():
+        metrics["max_traced_memory"] = tracemalloc.get_traced_memory()[1]
+    return metrics
+
+
+def write_metrics(folder):
+    """Write the metrics, and any profiles, to the given folder.
+
+    Profiles are written as profile_<phase>.prof, which can be viewed with
+    e.g. snakeviz, or converted to flame graphs with flameprof.
+    """
+    with open(Path(folder, "metrics.json"), "w") as outfile:
+        outfile.write(json.dumps(get_metrics(), indent=4))
+    for name, profiler in profilers.items():
+        profiler.dump_stats(Path(folder, f"profile_{name}.prof"))
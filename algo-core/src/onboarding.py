@@ -15,7 +15,12 @@ limitations under the License.
 """
 
 from ortools.sat.python import cp_model
-import pandas as pd
+import numpy as np
+
+from .sparsity import find_reachable_slots, find_shift_tracks
+from .var_grid import VarGrid
+from .veterans import constraint_prefix_slot_cost, find_prefix_slot_costs
+from .metrics import timed
 
 # Onboarding (given in terms of number of 30-min slots):
 onboarding_shift_length = 4
@@ -24,70 +29,52 @@ onboarding_weekly_slots = 8
 # In the model below, the following abbreviations are used:
 # d: day
 # h: Github handle
+# i: position of handle h in agent_categories["onboarding"]
+# m: Github handle of mentor
+# j_m: position of mentor m in agent_categories["mentors"]
 # s: slot number
+# s_i: position of slot s in range(config["start_slot"], config["end_slot"])
+
 
+@timed
+def setup_var_grids_onboarding(agent_categories, config):
+    """Create grids that will contain model variables for onboarders."""
+    days = range(config["num_days"])
+    slots = range(config["start_slot"], config["end_slot"])
+    handles = agent_categories["onboarding"]
 
-def setup_var_dataframes_onboarding(agent_categories, config):
-    """Create dataframes that will contain model variables for onboarders."""
     var_onboarding = {}
 
-    # var_onboarding["mentors"] dataframe will contain onboarding
+    # var_onboarding["mentors"] grid will contain onboarding
     # agent - mentor associations:
-    mentors_indices = pd.MultiIndex.from_product(
-        [
-            [d for d in range(config["num_days"])],
-            agent_categories["onboarding"],
-        ],
-        names=("day", "agent"),
-    )
-
-    var_onboarding["mentors"] = pd.DataFrame(
-        data=None, index=mentors_indices, columns=agent_categories["mentors"]
+    var_onboarding["mentors"] = VarGrid(
+        {"day": days, "agent": handles, "mentor": agent_categories["mentors"]},
+        ["is_mentor"],
     )
 
     # h:
-    var_onboarding["h"] = pd.DataFrame(
-        data=None,
-        index=agent_categories["onboarding"],
-        columns=["total_week_slots"],
-    )
+    var_onboarding["h"] = VarGrid({"handle": handles}, ["total_week_slots"])
 
     # dh:
-    dh_multi_index_on = pd.MultiIndex.from_product(
+    var_onboarding["dh"] = VarGrid(
+        {"day": days, "handle": handles},
         [
-            [d for d in range(config["num_days"])],
-            [h for h in agent_categories["onboarding"]],
-        ],
-        names=("day", "handle"),
-    )
-
-    var_onboarding["dh"] = pd.DataFrame(
-        data=None,
-        index=dh_multi_index_on,
-        columns=[
             "shift_start",
             "shift_end",
             "shift_duration",
             "interval",
             "is_agent_on",
             "is_in_pref_range",
+            "start_prefix_cost",
+            "end_prefix_cost",
+            "slot_cost",
         ],
     )
 
     # dhs:
-    dhs_multi_index_on = pd.MultiIndex.from_product(
+    var_onboarding["dhs"] = VarGrid(
+        {"day": days, "handle": handles, "slot": slots},
         [
-            [d for d in range(config["num_days"])],
-            [h for h in agent_categories["onboarding"]],
-            [s for s in range(config["start_slot"], config["end_slot"])],
-        ],
-        names=("day", "handle", "slot"),
-    )
-
-    var_onboarding["dhs"] = pd.DataFrame(
-        data=None,
-        index=dhs_multi_index_on,
-        columns=[
             "is_start_smaller_equal_hour",
             "is_end_greater_than_hour",
             "is_slot_cost",
@@ -97,114 +84,139 @@ def setup_var_dataframes_onboarding(agent_categories, config):
     return var_onboarding
 
 
-def fill_var_dataframes_onboarding(
+@timed
+def fill_var_grids_onboarding(
     model, custom_domains, var_onboarding, df_agents, agent_categories, config
 ):
-    """Fill onboarding variable dataframes with OR-Tools model variables."""
+    """Fill onboarding variable grids with OR-Tools model variables."""
+    v_mentors = var_onboarding["mentors"]
+    v_h = var_onboarding["h"]
+    v_dh = var_onboarding["dh"]
+    v_dhs = var_onboarding["dhs"]
+    slot_ranges = df_agents["slot_ranges"].to_dict()
+    # In the sparse model, variables are only created where needed:
+    reachable = find_reachable_slots(
+        df_agents,
+        agent_categories["onboarding"],
+        onboarding_shift_length,
+        config,
+    )
+    is_reachable_day = reachable.any(axis=1)
+    mentor_tracks = find_shift_tracks(
+        df_agents, agent_categories["mentors"], config
+    )
+
     # Onboarding mentors:
     for d in range(config["num_days"]):
-        for h in agent_categories["onboarding"]:
-            for m in agent_categories["mentors"]:
-                var_onboarding["mentors"].loc[(d, h), m] = model.NewBoolVar(
+        for i, h in enumerate(agent_categories["onboarding"]):
+            if not is_reachable_day[d, i]:
+                continue
+            for j_m, m in enumerate(agent_categories["mentors"]):
+                if mentor_tracks[d, j_m] == 0:
+                    continue
+                v_mentors["is_mentor"][d, i, j_m] = model.NewBoolVar(
                     f"mentor_{d}_{h}_{m}"
                 )
 
     # h:
-    for h in var_onboarding["h"].index:
+    for i, h in enumerate(agent_categories["onboarding"]):
         # total_week_slots
-        var_onboarding["h"].loc[h, "total_week_slots"] = (
-            model.NewIntVarFromDomain(
-                cp_model.Domain.FromValues([0, onboarding_weekly_slots]),
-                f"total_week_slots_{h}",
-            )
+        v_h["total_week_slots"][i] = model.NewIntVarFromDomain(
+            cp_model.Domain.FromValues([0, onboarding_weekly_slots]),
+            f"total_week_slots_{h}",
         )
 
     # dh:
     print("")
 
     for d in range(config["num_days"]):
-        for h in agent_categories["onboarding"]:
+        for i, h in enumerate(agent_categories["onboarding"]):
+            if not is_reachable_day[d, i]:
+                continue
             # shift_start, shift_end, duration, interval
             if h in agent_categories["unavailable"][d]:
                 # Then the onboarder is unavailable this week, and onboarding
                 # is skipped:
-                var_onboarding["dh"].loc[(d, h), "shift_start"] = (
-                    model.NewIntVar(8, 8, f"shift_start_{d}_{h}")
+                v_dh["shift_start"][d, i] = model.NewIntVar(
+                    8, 8, f"shift_start_{d}_{h}"
                 )
-                var_onboarding["dh"].loc[(d, h), "shift_end"] = (
-                    model.NewIntVar(8, 8, f"shift_end_{d}_{h}")
+                v_dh["shift_end"][d, i] = model.NewIntVar(
+                    8, 8, f"shift_end_{d}_{h}"
                 )
-                var_onboarding["dh"].loc[(d, h), "shift_duration"] = (
-                    model.NewIntVar(0, 0, f"shift_duration_{d}_{h}")
+                v_dh["shift_duration"][d, i] = model.NewIntVar(
+                    0, 0, f"shift_duration_{d}_{h}"
                 )
 
             else:
-                var_onboarding["dh"].loc[(d, h), "shift_start"] = (
-                    model.NewIntVarFromDomain(
-                        custom_domains["prefs"].loc[(d, h)],
-                        f"shift_start_{d}_{h}",
-                    )
+                v_dh["shift_start"][d, i] = model.NewIntVarFromDomain(
+                    custom_domains["prefs"][(d, h)],
+                    f"shift_start_{d}_{h}",
                 )
-                var_onboarding["dh"].loc[(d, h), "shift_end"] = (
-                    model.NewIntVarFromDomain(
-                        custom_domains["prefs"].loc[(d, h)],
-                        f"shift_end_{d}_{h}",
-                    )
+                v_dh["shift_end"][d, i] = model.NewIntVarFromDomain(
+                    custom_domains["prefs"][(d, h)],
+                    f"shift_end_{d}_{h}",
                 )
-                var_onboarding["dh"].loc[(d, h), "shift_duration"] = (
-                    model.NewIntVarFromDomain(
-                        cp_model.Domain.FromValues(
-                            [0, onboarding_shift_length]
-                        ),
-                        f"shift_duration_{d}_{h}",
-                    )
+                v_dh["shift_duration"][d, i] = model.NewIntVarFromDomain(
+                    cp_model.Domain.FromValues([0, onboarding_shift_length]),
+                    f"shift_duration_{d}_{h}",
                 )
 
-            var_onboarding["dh"].loc[(d, h), "interval"] = (
-                model.NewIntervalVar(
-                    var_onboarding["dh"].loc[(d, h), "shift_start"],
-                    var_onboarding["dh"].loc[(d, h), "shift_duration"],
-                    var_onboarding["dh"].loc[(d, h), "shift_end"],
-                    f"interval_{d}_{h}",
-                )
+            v_dh["interval"][d, i] = model.NewIntervalVar(
+                v_dh["shift_start"][d, i],
+                v_dh["shift_duration"][d, i],
+                v_dh["shift_end"][d, i],
+                f"interval_{d}_{h}",
             )
             # is_agent_on
-            var_onboarding["dh"].loc[(d, h), "is_agent_on"] = model.NewBoolVar(
+            v_dh["is_agent_on"][d, i] = model.NewBoolVar(
                 f"is_agent_on_{d}_{h}"
             )
             # is_in_pref_range
-            var_onboarding["dh"].loc[(d, h), "is_in_pref_range"] = [
+            v_dh["is_in_pref_range"][d, i] = [
                 model.NewBoolVar(f"is_in_pref_range_{d}_{h}_{j}")
-                for (j, _) in enumerate(df_agents.loc[h, "slot_ranges"][d])
+                for (j, _) in enumerate(slot_ranges[h][d])
             ]
+            if config["slot_cost_encoding"] == "prefix_sums":
+                # start_prefix_cost, end_prefix_cost, slot_cost
+                for name in [
+                    "start_prefix_cost",
+                    "end_prefix_cost",
+                    "slot_cost",
+                ]:
+                    v_dh[name][d, i] = model.NewIntVarFromDomain(
+                        custom_domains["shift_slot_cost"], f"{name}_{d}_{h}"
+                    )
 
-    # dhs:
+    # dhs (only needed for the per-slot cost):
+    if config["slot_cost_encoding"] != "per_slot":
+        return [model, var_onboarding]
     for d in range(config["num_days"]):
-        for h in agent_categories["onboarding"]:
-            for s in range(config["start_slot"], config["end_slot"]):
+        for i, h in enumerate(agent_categories["onboarding"]):
+            for s_i, s in enumerate(v_dhs.labels[2]):
+                if not reachable[d, s_i, i]:
+                    continue
                 # is_start_smaller_equal_hour
-                var_onboarding["dhs"].loc[
-                    (d, h, s), "is_start_smaller_equal_hour"
-                ] = model.NewBoolVar(
-                    f"is_start_smaller_equal_hour_{d}_{h}_{s}"
+                v_dhs["is_start_smaller_equal_hour"][d, i, s_i] = (
+                    model.NewBoolVar(
+                        f"is_start_smaller_equal_hour_{d}_{h}_{s}"
+                    )
                 )
                 # is_end_greater_than_hour
-                var_onboarding["dhs"].loc[
-                    (d, h, s), "is_end_greater_than_hour"
-                ] = model.NewBoolVar(f"is_end_greater_than_hour_{d}_{h}_{s}")
+                v_dhs["is_end_greater_than_hour"][d, i, s_i] = (
+                    model.NewBoolVar(f"is_end_greater_than_hour_{d}_{h}_{s}")
+                )
                 # is_slot_cost
-                var_onboarding["dhs"].loc[(d, h, s), "is_slot_cost"] = (
-                    model.NewBoolVar(f"is_slot_cost_{d}_{h}_{s}")
+                v_dhs["is_slot_cost"][d, i, s_i] = model.NewBoolVar(
+                    f"is_slot_cost_{d}_{h}_{s}"
                 )
                 # slot_cost
-                var_onboarding["dhs"].loc[(d, h, s), "slot_cost"] = (
-                    model.NewIntVarFromDomain(
-                        custom_domains["slot_cost"], f"slot_cost_{d}_{h}_{s}"
-                    )
+                v_dhs["slot_cost"][d, i, s_i] = model.NewIntVarFromDomain(
+                    custom_domains["slot_cost"], f"slot_cost_{d}_{h}_{s}"
                 )
     return [model, var_onboarding]
 
 
+@timed
 def constraint_honour_agent_availability_onboarding(
     model, var_onboarding, df_agents, agent_categories, config
 ):
@@ -212,63 +224,56 @@ def constraint_honour_agent_availability_onboarding(
 
     Each shift must start and end within that agent's available hours.
     """
+    v_dh = var_onboarding["dh"]
+    slot_ranges = df_agents["slot_ranges"].to_dict()
     for d in range(config["num_days"]):
-        for h in agent_categories["onboarding"]:
+        for i, h in enumerate(agent_categories["onboarding"]):
+            if v_dh["is_agent_on"][d, i] is None:
+                continue
             if not (h in agent_categories["unavailable"][d]):
-                model.AddBoolOr(
-                    var_onboarding["dh"].loc[(d, h), "is_in_pref_range"]
-                ).OnlyEnforceIf(
-                    var_onboarding["dh"].loc[(d, h), "is_agent_on"]
+                model.AddBoolOr(v_dh["is_in_pref_range"][d, i]).OnlyEnforceIf(
+                    v_dh["is_agent_on"][d, i]
                 )
-                for j, sec in enumerate(df_agents.loc[h, "slot_ranges"][d]):
+                for j, sec in enumerate(slot_ranges[h][d]):
                     model.Add(
-                        var_onboarding["dh"].loc[(d, h), "shift_start"]
-                        >= sec[0]
-                    ).OnlyEnforceIf(
-                        var_onboarding["dh"].loc[(d, h), "is_in_pref_range"][j]
-                    )
-                    model.Add(
-                        var_onboarding["dh"].loc[(d, h), "shift_end"] <= sec[1]
-                    ).OnlyEnforceIf(
-                        var_onboarding["dh"].loc[(d, h), "is_in_pref_range"][j]
+                        v_dh["shift_start"][d, i] >= sec[0]
+                    ).OnlyEnforceIf(v_dh["is_in_pref_range"][d, i][j])
+                    model.Add(v_dh["shift_end"][d, i] <= sec[1]).OnlyEnforceIf(
+                        v_dh["is_in_pref_range"][d, i][j]
                     )
     return model
 
 
+@timed
 def constraint_setup_onboarding_hours(
     model, var_onboarding, agent_categories, config
 ):
     """Define shift length for onboarders, as well as total weekly support."""
+    v_h = var_onboarding["h"]
+    v_dh = var_onboarding["dh"]
     # If agent is on, the shift length must be <onboarding_shift_length> hours:
     for d in range(config["num_days"]):
-        for h in agent_categories["onboarding"]:
+        for i, h in enumerate(agent_categories["onboarding"]):
+            if v_dh["is_agent_on"][d, i] is None:
+                continue
             model.Add(
-                var_onboarding["dh"].loc[(d, h), "shift_duration"]
-                == onboarding_shift_length
-            ).OnlyEnforceIf(var_onboarding["dh"].loc[(d, h), "is_agent_on"])
-            model.Add(
-                var_onboarding["dh"].loc[(d, h), "shift_duration"] == 0
-            ).OnlyEnforceIf(
-                var_onboarding["dh"].loc[(d, h), "is_agent_on"].Not()
+                v_dh["shift_duration"][d, i] == onboarding_shift_length
+            ).OnlyEnforceIf(v_dh["is_agent_on"][d, i])
+            model.Add(v_dh["shift_duration"][d, i] == 0).OnlyEnforceIf(
+                v_dh["is_agent_on"][d, i].Not()
             )
 
     # Agent is only scheduled for <onboarding_weekly_slots> hours for the week:
-    for h in agent_categories["onboarding"]:
-        model.Add(
-            var_onboarding["h"].loc[h, "total_week_slots"]
-            == sum(
-                var_onboarding["dh"]["shift_duration"]
-                .xs(h, axis=0, level=1, drop_level=False)
-                .values.tolist()
-            )
-        )
+    for i, h in enumerate(agent_categories["onboarding"]):
         model.Add(
-            var_onboarding["h"].loc[h, "total_week_slots"]
-            == onboarding_weekly_slots
+            v_h["total_week_slots"][i]
+            == sum(v_dh.values("shift_duration", np.s_[:, i]))
         )
+        model.Add(v_h["total_week_slots"][i] == onboarding_weekly_slots)
     return model
 
 
+@timed
 def constraint_avoid_onboarding_before_Monday_1400(
     model, var_onboarding, agent_categories
 ):
@@ -277,14 +282,18 @@ def constraint_avoid_onboarding_before_Monday_1400(
     This is to allow the Monday morning veterans to focus on clearing
     up the tickets that have piled up over the weekend.
     """
+    v_dh = var_onboarding["dh"]
     # Constraint: There will be no onboarding on Mondays (d=0) before 14:00:
-    for h in agent_categories["onboarding"]:
-        model.Add(
-            var_onboarding["dh"].loc[(0, h), "shift_start"] >= 28
-        ).OnlyEnforceIf(var_onboarding["dh"].loc[(0, h), "is_agent_on"])
+    for i, h in enumerate(agent_categories["onboarding"]):
+        if v_dh["is_agent_on"][0, i] is None:
+            continue
+        model.Add(v_dh["shift_start"][0, i] >= 28).OnlyEnforceIf(
+            v_dh["is_agent_on"][0, i]
+        )
     return model
 
 
+@timed
 def constraint_avoid_simultaneous_onboarding(model, var_onboarding, config):
     """At most one agent should be onboarded at any given time.
 
@@ -293,68 +302,74 @@ def constraint_avoid_simultaneous_onboarding(model, var_onboarding, config):
     if len(var_onboarding["dh"]) > 0:
         for d in range(config["num_days"]):
             model.AddNoOverlap(
-                var_onboarding["dh"].loc[d, "interval"].values.tolist()
+                var_onboarding["dh"].values("interval", np.s_[d])
             )
 
     return model
 
 
+@timed
 def constraint_configure_mentoring(
     model, var_veterans, var_onboarding, agent_categories, config
 ):
     """Configure the mentoring of onboarders appropriately."""
+    v_mentors = var_onboarding["mentors"]
+    v_dh = var_onboarding["dh"]
+    v_dh_vet = var_veterans["dh"]
+    v_dhk_vet = var_veterans["dhk"]
+    # Positions of mentors among the veterans:
+    mentor_pos = [
+        v_dh_vet.pos("handle", m) for m in agent_categories["mentors"]
+    ]
     # If agent is on, he/she to be paired with exactly 1 mentor:
     for d in range(config["num_days"]):
-        for h in agent_categories["onboarding"]:
+        for i, h in enumerate(agent_categories["onboarding"]):
+            if v_dh["is_agent_on"][d, i] is None:
+                continue
             # If onboarder is scheduled, there should be exactly on mentor:
             model.Add(
-                sum(var_onboarding["mentors"].loc[(d, h)].values.tolist()) == 1
-            ).OnlyEnforceIf(var_onboarding["dh"].loc[(d, h), "is_agent_on"])
+                sum(v_mentors.values("is_mentor", np.s_[d, i, :])) == 1
+            ).OnlyEnforceIf(v_dh["is_agent_on"][d, i])
             # If onboarder is not scheduled, there should not be an
             # associated mentor:
             model.Add(
-                sum(var_onboarding["mentors"].loc[(d, h)].values.tolist()) == 0
-            ).OnlyEnforceIf(
-                var_onboarding["dh"].loc[(d, h), "is_agent_on"].Not()
-            )
+                sum(v_mentors.values("is_mentor", np.s_[d, i, :])) == 0
+            ).OnlyEnforceIf(v_dh["is_agent_on"][d, i].Not())
 
-            for m in var_onboarding["mentors"].columns:
+            for j_m, i_m in enumerate(mentor_pos):
+                is_mentor = v_mentors["is_mentor"][d, i, j_m]
+                if is_mentor is None:
+                    continue
                 # For simplicity, if a veteran acts as mentor for an
                 # onboarder, the veteran should have exactly one shift
                 # on that day:
-                model.Add(
-                    var_veterans["dh"].loc[(d, m), "num_shifts"] == 1
-                ).OnlyEnforceIf(var_onboarding["mentors"].loc[(d, h), m])
+                model.Add(v_dh_vet["num_shifts"][d, i_m] == 1).OnlyEnforceIf(
+                    is_mentor
+                )
 
                 for k in range(config["max_shifts_per_agent_per_day"]):
+                    if v_dhk_vet["is_agent_on"][d, i_m, k] is None:
+                        continue
                     # The mentor and onboarder start at the same time:
                     model.Add(
-                        var_onboarding["dh"].loc[(d, h), "shift_start"]
-                        == var_veterans["dhk"].loc[(d, m, k), "shift_start"]
+                        v_dh["shift_start"][d, i]
+                        == v_dhk_vet["shift_start"][d, i_m, k]
                     ).OnlyEnforceIf(
-                        [
-                            var_onboarding["mentors"].loc[(d, h), m],
-                            var_veterans["dhk"].loc[(d, m, k), "is_agent_on"],
-                        ]
+                        [is_mentor, v_dhk_vet["is_agent_on"][d, i_m, k]]
                     )
                     # Mentor's shift may not be shorter than onboarder's:
                     model.Add(
-                        var_onboarding["dh"].loc[(d, h), "shift_duration"]
-                        - var_veterans["dhk"].loc[(d, m, k), "shift_duration"]
+                        v_dh["shift_duration"][d, i]
+                        - v_dhk_vet["shift_duration"][d, i_m, k]
                         <= 0
                     ).OnlyEnforceIf(
-                        [
-                            var_onboarding["mentors"].loc[(d, h), m],
-                            var_veterans["dhk"].loc[(d, m, k), "is_agent_on"],
-                        ]
+                        [is_mentor, v_dhk_vet["is_agent_on"][d, i_m, k]]
                     )
 
     # A mentor should not have to mentor more than 1 onboarder per day:
     for d in range(config["num_days"]):
-        for m in var_onboarding["mentors"].columns:
-            model.Add(
-                sum(var_onboarding["mentors"].loc[(d,), m].values.tolist()) < 2
-            )
+        for j_m, m in enumerate(agent_categories["mentors"]):
+            model.Add(sum(v_mentors.values("is_mentor", np.s_[d, :, j_m])) < 2)
 
     # To avoid overloading mentors, constrain weekly hours to <= 10 hours:
     #    for h in agents_mentors:
@@ -363,92 +378,90 @@ def constraint_configure_mentoring(
     return model
 
 
+@timed
 def cost_hours_onboarding(
     model, var_onboarding, coefficients, df_agents, agent_categories, config
 ):
-    """Define onboarders' cost for assigned hours based on availability."""
+    """Define onboarders' cost for assigned hours based on availability.
+
+    With the prefix_sums encoding, the cost follows from the shift's start
+    and end, as for veterans (see cost_hours_veterans).
+    """
+    v_dh = var_onboarding["dh"]
+    v_dhs = var_onboarding["dhs"]
+    agent_slots = df_agents["slots"].to_dict()
+    if config["slot_cost_encoding"] == "prefix_sums":
+        for d in range(config["num_days"]):
+            for i, h in enumerate(agent_categories["onboarding"]):
+                if v_dh["slot_cost"][d, i] is None:
+                    continue
+                model = constraint_prefix_slot_cost(
+                    model,
+                    find_prefix_slot_costs(
+                        coefficients, agent_slots[h][d], config
+                    ),
+                    v_dh["shift_start"][d, i],
+                    v_dh["shift_end"][d, i],
+                    v_dh["start_prefix_cost"][d, i],
+                    v_dh["end_prefix_cost"][d, i],
+                    v_dh["slot_cost"][d, i],
+                )
+        return model
     for d in range(config["num_days"]):
-        for h in agent_categories["onboarding"]:
-            for s_count, s_cost in enumerate(
-                df_agents.loc[h, "slots"][d][
-                    config["start_slot"]:config["end_slot"]
-                ]
+        for i, h in enumerate(agent_categories["onboarding"]):
+            for s_i, s_cost in enumerate(
+                agent_slots[h][d][config["start_slot"]:config["end_slot"]]
             ):
-                s = s_count + config["start_slot"]
+                if v_dhs["slot_cost"][d, i, s_i] is None:
+                    continue
+                s = s_i + config["start_slot"]
+                is_start_smaller_equal_hour = v_dhs[
+                    "is_start_smaller_equal_hour"
+                ][d, i, s_i]
+                is_end_greater_than_hour = v_dhs["is_end_greater_than_hour"][
+                    d, i, s_i
+                ]
+                is_slot_cost = v_dhs["is_slot_cost"][d, i, s_i]
 
-                model.Add(
-                    var_onboarding["dh"].loc[(d, h), "shift_start"] <= s
-                ).OnlyEnforceIf(
-                    var_onboarding["dhs"].loc[
-                        (d, h, s), "is_start_smaller_equal_hour"
-                    ]
+                model.Add(v_dh["shift_start"][d, i] <= s).OnlyEnforceIf(
+                    is_start_smaller_equal_hour
                 )
-                model.Add(
-                    var_onboarding["dh"].loc[(d, h), "shift_start"] > s
-                ).OnlyEnforceIf(
-                    var_onboarding["dhs"]
-                    .loc[(d, h, s), "is_start_smaller_equal_hour"]
-                    .Not()
+                model.Add(v_dh["shift_start"][d, i] > s).OnlyEnforceIf(
+                    is_start_smaller_equal_hour.Not()
                 )
 
-                model.Add(
-                    var_onboarding["dh"].loc[(d, h), "shift_end"] > s
-                ).OnlyEnforceIf(
-                    var_onboarding["dhs"].loc[
-                        (d, h, s), "is_end_greater_than_hour"
-                    ]
+                model.Add(v_dh["shift_end"][d, i] > s).OnlyEnforceIf(
+                    is_end_greater_than_hour
                 )
-                model.Add(
-                    var_onboarding["dh"].loc[(d, h), "shift_end"] <= s
-                ).OnlyEnforceIf(
-                    var_onboarding["dhs"]
-                    .loc[(d, h, s), "is_end_greater_than_hour"]
-                    .Not()
+                model.Add(v_dh["shift_end"][d, i] <= s).OnlyEnforceIf(
+                    is_end_greater_than_hour.Not()
                 )
 
                 model.AddBoolAnd(
-                    [
-                        var_onboarding["dhs"].loc[
-                            (d, h, s), "is_start_smaller_equal_hour"
-                        ],
-                        var_onboarding["dhs"].loc[
-                            (d, h, s), "is_end_greater_than_hour"
-                        ],
-                    ]
-                ).OnlyEnforceIf(
-                    var_onboarding["dhs"].loc[(d, h, s), "is_slot_cost"]
-                )
+                    [is_start_smaller_equal_hour, is_end_greater_than_hour]
+                ).OnlyEnforceIf(is_slot_cost)
 
                 model.AddBoolOr(
                     [
-                        var_onboarding["dhs"]
-                        .loc[(d, h, s), "is_start_smaller_equal_hour"]
-                        .Not(),
-                        var_onboarding["dhs"]
-                        .loc[(d, h, s), "is_end_greater_than_hour"]
-                        .Not(),
+                        is_start_smaller_equal_hour.Not(),
+                        is_end_greater_than_hour.Not(),
                     ]
-                ).OnlyEnforceIf(
-                    var_onboarding["dhs"].loc[(d, h, s), "is_slot_cost"].Not()
-                )
+                ).OnlyEnforceIf(is_slot_cost.Not())
                 # For "preferred", (s_cost - 1) = 0, so no hourly cost.
                 # For "non_preferred", (s_cost - 1) = 1.
                 model.Add(
-                    var_onboarding["dhs"].loc[(d, h, s), "slot_cost"]
+                    v_dhs["slot_cost"][d, i, s_i]
                     == coefficients["non_preferred"] * (s_cost - 1)
-                ).OnlyEnforceIf(
-                    var_onboarding["dhs"].loc[(d, h, s), "is_slot_cost"]
-                )
+                ).OnlyEnforceIf(is_slot_cost)
 
-                model.Add(
-                    var_onboarding["dhs"].loc[(d, h, s), "slot_cost"] == 0
-                ).OnlyEnforceIf(
-                    var_onboarding["dhs"].loc[(d, h, s), "is_slot_cost"].Not()
+                model.Add(v_dhs["slot_cost"][d, i, s_i] == 0).OnlyEnforceIf(
+                    is_slot_cost.Not()
                 )
 
     return model
 
 
+@timed
 def extend_model_onboarding(
     model,
     var_veterans,
@@ -466,8 +479,8 @@ def extend_model_onboarding(
     with the necessary variables and constraints for onboarding.
     """
     # Configure model variables:
-    var_onboarding = setup_var_dataframes_onboarding(agent_categories, config)
-    [model, var_onboarding] = fill_var_dataframes_onboarding(
+    var_onboarding = setup_var_grids_onboarding(agent_categories, config)
+    [model, var_onboarding] = fill_var_grids_onboarding(
         model,
         custom_domains,
         var_onboarding,
@@ -502,6 +515,8 @@ def extend_model_onboarding(
     )
     # Extend list of cost terms:
     full_cost_list = (
-        full_cost_list + var_onboarding["dhs"]["slot_cost"].values.tolist()
+        full_cost_list
+        + var_onboarding["dhs"].values("slot_cost")
+        + var_onboarding["dh"].values("slot_cost")
     )
     return [model, var_veterans, var_onboarding, full_cost_list]
@@ -0,0 +1,359 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from .var_grid import VarGrid
+from .veterans import (
+    constraint_weekly_custom_conditions,
+    cost_multiple_shifts_per_day,
+    cost_total_agent_hours_for_week,
+    define_weekly_and_daily_relationships_veterans,
+    fill_weekly_and_daily_vars_veterans,
+    find_allowed_shift_durations,
+    get_duration_cost,
+    setup_weekly_and_daily_var_grids_veterans,
+)
+from .metrics import timed
+
+# Shift-pattern formulation of the veteran model: instead of start, end
+# and duration variables per shift track, every feasible shift
+# (day, handle, start, end) is enumerated up front and selected with a
+# single boolean. Slot coverage and costs are then fixed per pattern, and
+# all constraints become linear sums over the pattern booleans.
+
+# In the model below, the following abbreviations are used:
+# d: day
+# h: Github handle
+# i: position of handle h in agent_categories["veterans"]
+# p: position of a shift pattern in var_veterans["p"]
+# s: slot number
+
+
+def get_pattern_cost(pattern, agent_slots, ideal_shift_length, coefficients):
+    """Calculate the slot and duration cost of a single shift pattern."""
+    d, h, start, end = pattern
+    slot_cost = coefficients["non_preferred"] * sum(
+        agent_slots[h][d][s] - 1 for s in range(start, end)
+    )
+    duration_cost = get_duration_cost(
+        end - start, ideal_shift_length[h], coefficients
+    )
+    return [slot_cost, duration_cost]
+
+
+@timed
+def enumerate_shift_patterns(
+    custom_domains, coefficients, df_agents, agent_categories, config
+):
+    """List every feasible veteran shift as (day, handle, start, end).
+
+    A shift has to lie within one of the agent's available ranges (and
+    within support hours), may only use allowed slots, and has to last
+    between min_duration and max_duration (or agentsMaxHoursShift). As in
+    the interval formulation, its duration cost has to fall within the
+    duration_cost domain.
+    """
+    agent_slots = df_agents["slots"].to_dict()
+    slot_ranges = df_agents["slot_ranges"].to_dict()
+    allowed_durations = find_allowed_shift_durations(
+        custom_domains, coefficients, df_agents, config
+    )
+
+    # (Ranges may be listed more than once, so collect into a dict:)
+    patterns = {}
+    for d in range(config["num_days"]):
+        for h in agent_categories["veterans"]:
+            if h in agent_categories["unavailable"][d]:
+                continue
+            day_slots = agent_slots[h][d]
+            max_duration = max(allowed_durations[h], default=0)
+            for range_start, range_end in slot_ranges[h][d]:
+                range_end = min(range_end, config["end_slot"])
+                for start in range(range_start, range_end):
+                    for end in range(
+                        start + 1, min(start + max_duration, range_end) + 1
+                    ):
+                        if (
+                            day_slots[end - 1]
+                            not in config["allowed_availabilities"]
+                        ):
+                            break
+                        if end - start in allowed_durations[h]:
+                            patterns[(d, h, start, end)] = None
+    return list(patterns)
+
+
+def group_patterns(var_veterans):
+    """Group pattern positions by (day, handle) and by (day, slot)."""
+    v_p = var_veterans["p"]
+    v_dh = var_veterans["dh"]
+    by_day_handle = {}
+    by_day_slot = {}
+    for p, (d, h, start, end) in enumerate(v_p.labels[0]):
+        by_day_handle.setdefault((d, v_dh.pos("handle", h)), []).append(p)
+        for s in range(start, end):
+            by_day_slot.setdefault((d, s), []).append(p)
+    return [by_day_handle, by_day_slot]
+
+
+@timed
+def setup_var_grids_patterns(patterns, agent_categories, config):
+    """Create grids that will contain pattern model variables for veterans."""
+    # h, dh:
+    var_veterans = setup_weekly_and_daily_var_grids_veterans(
+        agent_categories, config
+    )
+
+    # dhk:
+    # (Only the first track, and only for mentors, so that onboarders'
+    # shifts can be linked to their mentors' as in the interval model.)
+    var_veterans["dhk"] = VarGrid(
+        {
+            "day": range(config["num_days"]),
+            "handle": agent_categories["veterans"],
+            "shift_track": range(config["max_shifts_per_agent_per_day"]),
+        },
+        ["shift_start", "shift_duration", "is_agent_on"],
+    )
+
+    # p:
+    var_veterans["p"] = VarGrid({"pattern": patterns}, ["is_selected"])
+    return var_veterans
+
+
+@timed
+def fill_var_grids_patterns(
+    model, custom_domains, var_veterans, agent_categories, config
+):
+    """Fill veteran pattern grids with OR-Tools model variables."""
+    v_p = var_veterans["p"]
+    # h, dh:
+    model = fill_weekly_and_daily_vars_veterans(
+        model, custom_domains, var_veterans, agent_categories, config
+    )
+
+    # p:
+    for p, (d, h, start, end) in enumerate(v_p.labels[0]):
+        v_p["is_selected"][p] = model.NewBoolVar(
+            f"is_pattern_selected_{d}_{h}_{start}_{end}"
+        )
+
+    # dhk:
+    v_dhk = var_veterans["dhk"]
+    for d in range(config["num_days"]):
+        for m in agent_categories["mentors"]:
+            if m in agent_categories["unavailable"][d]:
+                continue
+            i = v_dhk.pos("handle", m)
+            v_dhk["is_agent_on"][d, i, 0] = model.NewBoolVar(
+                f"is_agent_on_{d}_{m}_0"
+            )
+    return model
+
+
+@timed
+def define_general_relationships_patterns(
+    model,
+    var_veterans,
+    by_day_handle,
+    by_day_slot,
+    df_agents,
+    agent_categories,
+    config,
+):
+    """Declare the defining relationships between the model variables."""
+    v_h = var_veterans["h"]
+    v_dh = var_veterans["dh"]
+    v_dhk = var_veterans["dhk"]
+    v_p = var_veterans["p"]
+    is_selected = v_p["is_selected"]
+    pattern_labels = v_p.labels[0]
+
+    # h, dh:
+    model = define_weekly_and_daily_relationships_veterans(
+        model, var_veterans, df_agents, agent_categories, config
+    )
+
+    # total_week_slots
+    week_slots = {i: [] for i in range(len(agent_categories["veterans"]))}
+    for (d, i), positions in by_day_handle.items():
+        week_slots[i] += [
+            (pattern_labels[p][3] - pattern_labels[p][2]) * is_selected[p]
+            for p in positions
+        ]
+    for i, terms in week_slots.items():
+        model.Add(v_h["total_week_slots"][i] == sum(terms))
+
+    # num_shifts
+    for d in range(config["num_days"]):
+        for i, h in enumerate(agent_categories["veterans"]):
+            model.Add(
+                v_dh["num_shifts"][d, i]
+                == sum(is_selected[p] for p in by_day_handle.get((d, i), []))
+            )
+
+    # Shifts of the same agent on the same day may not overlap:
+    if config["max_shifts_per_agent_per_day"] > 1:
+        for (d, s), positions in by_day_slot.items():
+            by_handle = {}
+            for p in positions:
+                by_handle.setdefault(pattern_labels[p][1], []).append(p)
+            for same_agent in by_handle.values():
+                if len(same_agent) > 1:
+                    model.AddAtMostOne(is_selected[p] for p in same_agent)
+
+    # dhk (mentors only):
+    # Mentors have exactly one shift on days that they mentor, so that
+    # start and duration of the first track follow from the patterns:
+    for d in range(config["num_days"]):
+        for i, h in enumerate(agent_categories["veterans"]):
+            if v_dhk["is_agent_on"][d, i, 0] is None:
+                continue
+            positions = by_day_handle.get((d, i), [])
+            v_dhk["shift_start"][d, i, 0] = sum(
+                pattern_labels[p][2] * is_selected[p] for p in positions
+            )
+            v_dhk["shift_duration"][d, i, 0] = sum(
+                (pattern_labels[p][3] - pattern_labels[p][2]) * is_selected[p]
+                for p in positions
+            )
+            model.Add(v_dh["num_shifts"][d, i] >= 1).OnlyEnforceIf(
+                v_dhk["is_agent_on"][d, i, 0]
+            )
+            model.Add(v_dh["num_shifts"][d, i] == 0).OnlyEnforceIf(
+                v_dhk["is_agent_on"][d, i, 0].Not()
+            )
+    return model
+
+
+@timed
+def constraint_hours_coverage_patterns(model, var_veterans, config):
+    """Ensure adequate coverage as specified by hoursCoverage."""
+    v_p = var_veterans["p"]
+    for h_cover in config["hours_coverage"]:
+        total_slots = sum(
+            (end - start) * v_p["is_selected"][p]
+            for p, (d, h, start, end) in enumerate(v_p.labels[0])
+            if h_cover["start_day"] <= d <= h_cover["end_day"]
+        )
+        model.Add(total_slots >= h_cover["min_slots"])
+        model.Add(total_slots <= h_cover["max_slots"])
+    return model
+
+
+@timed
+def constraint_agent_distribution_patterns(
+    model, var_veterans, by_day_slot, df_agents, config
+):
+    """Ensure the specified agentDistribution is adhered to."""
+    v_p = var_veterans["p"]
+    is_support_engineer = df_agents["is_support_engineer"].to_dict()
+    for a_distribution in config["agent_distribution"]:
+        for d in range(
+            a_distribution["start_day"], a_distribution["end_day"] + 1
+        ):
+            for s in range(
+                a_distribution["start_slot"], a_distribution["end_slot"]
+            ):
+                positions = by_day_slot.get((d, s), [])
+                num_simultaneous_agents = sum(
+                    v_p["is_selected"][p] for p in positions
+                )
+                model.Add(
+                    num_simultaneous_agents >= a_distribution["min_agents"]
+                )
+                model.Add(
+                    num_simultaneous_agents <= a_distribution["max_agents"]
+                )
+                # Add engineers constraint only if min_support_engineers
+                # are specified in agent distributions
+                if "min_support_engineers" in a_distribution:
+                    num_simultaneous_engineers = sum(
+                        v_p["is_selected"][p]
+                        for p in positions
+                        if is_support_engineer[v_p.labels[0][p][1]]
+                    )
+                    model.Add(
+                        num_simultaneous_engineers
+                        >= a_distribution["min_support_engineers"]
+                    )
+    return model
+
+
+@timed
+def cost_shift_patterns(var_veterans, coefficients, df_agents):
+    """Determine the slot and duration cost terms of the shift patterns."""
+    v_p = var_veterans["p"]
+    agent_slots = df_agents["slots"].to_dict()
+    ideal_shift_length = df_agents["ideal_shift_length"].to_dict()
+    cost_terms = []
+    for p, pattern in enumerate(v_p.labels[0]):
+        pattern_cost = sum(
+            get_pattern_cost(
+                pattern, agent_slots, ideal_shift_length, coefficients
+            )
+        )
+        if pattern_cost > 0:
+            cost_terms.append(pattern_cost * v_p["is_selected"][p])
+    return cost_terms
+
+
+@timed
+def setup_model_veterans_patterns(
+    model, custom_domains, coefficients, df_agents, agent_categories, config
+):
+    """Set up the shift-pattern model for veteran agents."""
+    patterns = enumerate_shift_patterns(
+        custom_domains, coefficients, df_agents, agent_categories, config
+    )
+    print(f"\nEnumerated {len(patterns)} veteran shift patterns.")
+
+    # Configure model variables and constraints:
+    var_veterans = setup_var_grids_patterns(patterns, agent_categories, config)
+    model = fill_var_grids_patterns(
+        model, custom_domains, var_veterans, agent_categories, config
+    )
+    [by_day_handle, by_day_slot] = group_patterns(var_veterans)
+    model = define_general_relationships_patterns(
+        model,
+        var_veterans,
+        by_day_handle,
+        by_day_slot,
+        df_agents,
+        agent_categories,
+        config,
+    )
+    model = constraint_hours_coverage_patterns(model, var_veterans, config)
+    model = constraint_agent_distribution_patterns(
+        model, var_veterans, by_day_slot, df_agents, config
+    )
+    model = constraint_weekly_custom_conditions(
+        model, var_veterans, df_agents, agent_categories, config
+    )
+    # Configure cost:
+    model = cost_total_agent_hours_for_week(
+        model, var_veterans, coefficients, df_agents, agent_categories, config
+    )
+    model = cost_multiple_shifts_per_day(
+        model, var_veterans, coefficients, agent_categories, config
+    )
+
+    # Add together resulting cost terms:
+    full_cost_list = (
+        var_veterans["h"].values("total_week_slots_cost")
+        + cost_shift_patterns(var_veterans, coefficients, df_agents)
+        + var_veterans["dh"].values("multiple_shifts_cost")
+    )
+    return [model, var_veterans, full_cost_list]
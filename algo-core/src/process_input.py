@@ -15,14 +15,21 @@ limitations under the License.
 """
 
 import datetime
-import math
+import os
+import sys
 import pandas as pd
 import numpy as np
 
+from .metrics import timed
+from .solver_profiles import solver_profiles
+
 # A higher value here will compensate more aggressively for historical
 # teamwork balances:
 rebalancing_urgency = 7
 
+# Slots per day of availability given as availableRanges (27 hours):
+slots_per_day = 54
+
 # def tracks_hours_to_slots(tracks):
 #     for track in tracks:
 #         track["start_slot"] = track["start_hour"] * 2
@@ -58,67 +65,128 @@ def get_datetime_days(start_date, num_days):
     return days
 
 
-def slots_to_range(available_slots, end_slot, allowed_availabilities):
-    """Convert per-hour availability flags into ranges format."""
-    slot_ranges = []
-
-    for day_slots in available_slots:
-        day_ranges = []
-        start = None
-
-        for i, value in enumerate(day_slots):
-            # Start of new range:
-            if start is None and value != 0:
-                start = i
-                continue
-
-            # End of range:
-            # (A range will end if either the current slot is unavailable
-            # (value 0) or if the current slot is the last one.)
-            if start is not None:
-                if value not in allowed_availabilities:  # Unavailable
-                    day_ranges.append([start, i])
-                    start = None
-                elif i == end_slot - 1:  # Last slot
-                    day_ranges.append([start, end_slot])
-                else:
-                    continue
-
-        slot_ranges.append(day_ranges)
-    return slot_ranges
-
+def find_next(mask):
+    """Find, for each position along the last axis, the next True position.
 
-def get_unavailable_agents(df_agents, day):
-    """Determine agents with no availability for a given day."""
-    day_number = day.weekday()
-    unavailable = set()
-
-    for handle in df_agents.index:
-        if len(df_agents.loc[handle, "slot_ranges"][day_number]) == 0:
-            unavailable.add(handle)
+    Two positions are appended past the end, and positions without a next
+    True position get the length of the last axis.
+    """
+    length = mask.shape[-1]
+    positions = np.where(mask, np.arange(length), length)
+    positions = np.concatenate(
+        [positions, np.full(mask.shape[:-1] + (2,), length)], axis=-1
+    )
+    return np.minimum.accumulate(positions[..., ::-1], axis=-1)[..., ::-1]
 
-    print(f"\nUnavailable employees for day starting on {day}")
-    [print(e) for e in unavailable]
-    return unavailable
 
+def find_slot_ranges(availability, in_row, end_slot, allowed_availabilities):
+    """Convert availability flags into ranges format, for all agent-days.
 
-def remove_agents_not_available_this_week(
-    unavailable_agents, df_agents, num_days
-):
-    """Agents not available at all this week are removed from the model."""
-    print("")
-    original_handles = df_agents.index.tolist()
+    A range starts at a slot with non-zero availability, and ends at the
+    next slot whose availability is not allowed, or just after end_slot - 1
+    if that slot is allowed. Ranges are found for all agent-days at once, by
+    jumping from each range start to the next possible end, and from there
+    to the next possible start. Ranges that reach the end of a day's slots
+    without ending are dropped. Returns a list of ranges per agent-day.
+    """
+    num_slots = availability.shape[-1]
+    flags = availability.reshape(-1, num_slots)
+    in_row = in_row.reshape(-1, num_slots)
+    is_allowed = np.isin(flags, allowed_availabilities)
+    next_start = find_next((flags != 0) & in_row)
+    next_end = find_next(
+        (~is_allowed | (np.arange(num_slots) == end_slot - 1)) & in_row
+    )
+    ranges = [[] for _ in range(len(flags))]
+    # Rows with an open range, its start, and the slot to search its end from:
+    rows = np.flatnonzero(next_start[:, 0] < num_slots)
+    start = next_start[rows, 0]
+    search = start + 1
+    while rows.size > 0:
+        end = next_end[rows, search]
+        is_ended = end < num_slots
+        [rows, start, end] = [rows[is_ended], start[is_ended], end[is_ended]]
+        # A range including the last slot of the day stays open after it,
+        # and ends again at the next slot that is not allowed:
+        is_last = (end == end_slot - 1) & is_allowed[rows, end]
+        for row, range_start, range_end in zip(
+            rows.tolist(),
+            start.tolist(),
+            np.where(is_last, end_slot, end).tolist(),
+        ):
+            ranges[row].append([range_start, range_end])
+        start = np.where(is_last, start, next_start[rows, end + 1])
+        search = np.where(is_last, end, start) + 1
+        is_open = start < num_slots
+        [rows, start, search] = [
+            rows[is_open],
+            start[is_open],
+            search[is_open],
+        ]
+    return ranges
+
+
+def fill_availability_ranges(availability, agents):
+    """Fill in the availability of agents given as availableRanges."""
+    ranges = np.array(
+        [
+            [a, d, *day_range]
+            for a, agent in enumerate(agents)
+            for d, day_ranges in enumerate(agent.get("availableRanges", []))
+            for day_range in day_ranges
+        ],
+        np.int64,
+    ).reshape(-1, 5)
+    [a, d, start, end, level] = ranges.T
+    widths = np.clip(end - start, 0, None)
+    # Slots of all ranges, one after the other:
+    offsets = np.repeat(np.cumsum(widths) - widths - start, widths)
+    slots = np.arange(widths.sum()) - offsets
+    availability[np.repeat(a, widths), np.repeat(d, widths), slots] = (
+        np.repeat(level, widths)
+    )
 
-    for handle in original_handles:
-        out = True
 
-        for d in range(num_days):
-            out = out and (handle in unavailable_agents[d])
+def load_availability(agents):
+    """Load the agents' availability into an agents × days × slots array.
 
-        if out:
-            df_agents.drop(index=handle, inplace=True)
-            print(handle, "was removed for this week.")
-    return df_agents
+    Days with fewer slots than the longest are padded with zeros. Returns
+    [availability, in_row], where in_row marks the slots of the input.
+    (availableSlots can also be a days × slots array, as read from the
+    input cache. Agents with availableRanges have slots_per_day slots.)
+    """
+    lengths = np.array(
+        [
+            (
+                [slots_per_day] * len(agent["availableRanges"])
+                if "availableRanges" in agent
+                else (
+                    [agent["availableSlots"].shape[1]]
+                    * len(agent["availableSlots"])
+                    if isinstance(agent["availableSlots"], np.ndarray)
+                    else [
+                        len(day_slots) for day_slots in agent["availableSlots"]
+                    ]
+                )
+            )
+            for agent in agents
+        ]
+    ).reshape(len(agents), -1)
+    num_slots = lengths.max(initial=0)
+    is_ranges = ["availableRanges" in agent for agent in agents]
+    if not any(is_ranges) and (lengths == num_slots).all():
+        availability = np.array(
+            [agent["availableSlots"] for agent in agents], np.int8
+        ).reshape(lengths.shape + (num_slots,))
+    else:
+        availability = np.zeros(lengths.shape + (num_slots,), np.int8)
+        for a, agent in enumerate(agents):
+            if not is_ranges[a]:
+                for d, day_slots in enumerate(agent["availableSlots"]):
+                    availability[a, d, :len(day_slots)] = day_slots
+        fill_availability_ranges(availability, agents)
+    in_row = np.arange(num_slots) < lengths[:, :, np.newaxis]
+    return [availability, in_row]
 
 
 def calculate_fair_shares(df_agents, total_slots_covered):
@@ -145,71 +213,64 @@ def calculate_fair_shares(df_agents, total_slots_covered):
     df_agents["fair_share"] = (
         df_agents["fair_share"] - df_agents["next_week_credit"]
     )
-    df_agents["fair_share"] = df_agents["fair_share"].apply(
-        lambda x: x if x >= 0 else 0
+    df_agents["fair_share"] = df_agents["fair_share"].where(
+        df_agents["fair_share"] >= 0, 0
     )
     rescaling_factor2 = total_slots_covered / df_agents["fair_share"].sum()
     df_agents["fair_share"] = df_agents["fair_share"] * rescaling_factor2
-    df_agents["fair_share"] = df_agents["fair_share"].apply(
-        lambda x: math.trunc(x)
-    )
+    df_agents["fair_share"] = np.trunc(df_agents["fair_share"]).astype(int)
     print("\nFair shares (hours per week):\n")
-    print((df_agents["fair_share"] / 2.0).to_string())
+    # (Fair shares are whole slots, i.e. whole or half hours.)
+    print(
+        (df_agents["fair_share"] / 2.0).to_string(
+            float_format=" {:.1f}".format
+        )
+    )
     return df_agents
 
 
 def setup_agents_dataframe(agents, config):
-    """Set up dataframe containing the relevant properties of each agent."""
-    df_agents = pd.DataFrame(
-        data=None,
-        columns=[
-            "handle",
-            "email",
-            "weight",
-            "is_support_engineer",
-            "teamwork_balance",
-            "next_week_credit",
-            "ideal_shift_length",
-            "slots",
-            "slot_ranges",
-        ],
-    )
+    """Set up dataframe containing the relevant properties of each agent.
 
-    # Fill dataframes per agent:
-    for agent in agents:
-        available_slots = agent["availableSlots"]
-
-        for d, _ in enumerate(available_slots):
-            # Set availability to 0 outside balena support hours:
-            for i in range(config["start_slot"]):
-                available_slots[d][i] = 0
-            # For agents with fixed hours, remove all availability:
-            # TODO: when volunteered shifts are reconfigured,
-            # we need to make sure these are not zeroed out below:
-            if ("agentsFixHours" in config["special_agent_conditions"]) and (
-                agent["handle"]
-                in config["special_agent_conditions"]["agentsFixHours"]
-            ):
-                for s in range(0, config["end_slot"]):
-                    available_slots[d][s] = 0
-
-        slot_ranges = slots_to_range(
-            available_slots,
-            config["end_slot"],
-            config["allowed_availabilities"],
-        )
+    Availability is processed for all agents and days at once, as an
+    agents × days × slots array.
+    """
+    handles = [agent["handle"] for agent in agents]
+    [availability, in_row] = load_availability(agents)
+    # Set availability to 0 outside balena support hours:
+    availability[:, :, :config["start_slot"]] = 0
+    # For agents with fixed hours, remove all availability:
+    # TODO: when volunteered shifts are reconfigured,
+    # we need to make sure these are not zeroed out below:
+    is_fixed = np.isin(
+        handles,
+        config["special_agent_conditions"].get("agentsFixHours", []),
+    )
+    availability[is_fixed, :, :config["end_slot"]] = 0
 
-        df_agents.loc[len(df_agents)] = {
-            "handle": agent["handle"],
-            "email": agent["email"],
-            "weight": agent["weight"],
-            "is_support_engineer": int(agent["isSupportEngineer"]),
-            "teamwork_balance": 2 * float(agent["teamworkBalance"]),
-            "next_week_credit": 2 * float(agent["nextWeekCredit"]),
-            "ideal_shift_length": agent["idealShiftLength"] * 2,
-            "slots": available_slots,
-            "slot_ranges": slot_ranges,
-        }
+    day_ranges = find_slot_ranges(
+        availability,
+        in_row,
+        config["end_slot"],
+        config["allowed_availabilities"],
+    )
+    num_weekdays = availability.shape[1]
+    slot_ranges = [
+        day_ranges[a * num_weekdays:(a + 1) * num_weekdays]
+        for a in range(len(agents))
+    ]
+    if in_row.all():
+        slots = availability.tolist()
+    else:
+        slots = [
+            [
+                day_slots[:length]
+                for day_slots, length in zip(agent_slots, agent_lengths)
+            ]
+            for agent_slots, agent_lengths in zip(
+                availability.tolist(), in_row.sum(axis=2).tolist()
+            )
+        ]
 
     # slots: list of 5 lists, each of which has items that mark the
     # availability of each slot (e.g.
@@ -220,27 +281,59 @@ def setup_agents_dataframe(agents, config):
     # support (e.g. [ [[8,12], [16, 24]], [], [...], [...], [...])
     # NB: e.g. [8,12] indicates agent is available 8-12, NOT 8-13.
 
-    df_agents.set_index("handle", inplace=True)
-
-    # Determine unavailable agents for each day, and remove these
-    # dataframe entries:
+    # Determine unavailable agents for each day:
+    is_unavailable = np.array(
+        [len(ranges) == 0 for ranges in day_ranges], bool
+    ).reshape(len(agents), num_weekdays)
     unavailable_agents = []
-
     for d in range(config["num_days"]):
+        day = config["days"][d]
         unavailable_agents.append(
-            get_unavailable_agents(df_agents, config["days"][d])
+            {
+                handles[a]
+                for a in np.flatnonzero(is_unavailable[:, day.weekday()])
+            }
         )
+        print(f"\nUnavailable employees for day starting on {day}")
+        [print(e) for e in unavailable_agents[d]]
 
     # Remove agents from the model who are not available at all this week:
-    df_agents = remove_agents_not_available_this_week(
-        unavailable_agents, df_agents, config["num_days"]
+    print("")
+    weekdays = [day.weekday() for day in config["days"]]
+    is_absent = is_unavailable[:, weekdays].all(axis=1)
+    for a in np.flatnonzero(is_absent):
+        print(handles[a], "was removed for this week.")
+    kept = np.flatnonzero(~is_absent).tolist()
+
+    df_agents = pd.DataFrame(
+        {
+            "handle": [handles[a] for a in kept],
+            "email": [agents[a]["email"] for a in kept],
+            "weight": [float(agents[a]["weight"]) for a in kept],
+            "is_support_engineer": [
+                int(agents[a]["isSupportEngineer"]) for a in kept
+            ],
+            "teamwork_balance": [
+                2 * float(agents[a]["teamworkBalance"]) for a in kept
+            ],
+            "next_week_credit": [
+                2 * float(agents[a]["nextWeekCredit"]) for a in kept
+            ],
+            "ideal_shift_length": [
+                agents[a]["idealShiftLength"] * 2 for a in kept
+            ],
+            "slots": [slots[a] for a in kept],
+            "slot_ranges": [slot_ranges[a] for a in kept],
+        }
     )
+    df_agents.set_index("handle", inplace=True)
 
     # Calculate fair shares per agent:
     df_agents = calculate_fair_shares(df_agents, config["total_slots_covered"])
     return [df_agents, unavailable_agents]
 
 
+@timed
 def process_input_data(input_json, sr_onboarding, sr_mentors):
     """Convert json input to convenient Python variables."""
     # Properties derived from input:
@@ -289,6 +382,77 @@ def process_input_data(input_json, sr_onboarding, sr_mentors):
         input_json["options"]["maxShiftsPerAgentPerDay"]
     )
 
+    # Only create model variables where agents can actually be scheduled:
+    config["sparse_model"] = input_json["options"].get("sparseModel", False)
+    config["veteran_formulation"] = input_json["options"].get(
+        "veteranFormulation", "intervals"
+    )
+    config["fair_share_encoding"] = input_json["options"].get(
+        "fairShareEncoding", "multiplication"
+    )
+    config["duration_cost_encoding"] = input_json["options"].get(
+        "durationCostEncoding", "reified"
+    )
+    config["slot_cost_encoding"] = input_json["options"].get(
+        "slotCostEncoding", "per_slot"
+    )
+    config["agent_distribution_encoding"] = input_json["options"].get(
+        "agentDistributionEncoding", "slots"
+    )
+    config["hours_coverage_encoding"] = input_json["options"].get(
+        "hoursCoverageEncoding", "slots"
+    )
+    config["symmetry_breaking"] = input_json["options"].get(
+        "symmetryBreaking", False
+    )
+    if (
+        config["symmetry_breaking"]
+        and config["veteran_formulation"] != "intervals"
+    ):
+        print(
+            "symmetryBreaking is only supported with the intervals "
+            "veteranFormulation."
+        )
+        sys.exit(1)
+    config["fast_mode"] = input_json["options"].get("fastMode", False)
+    config["greedy_hint"] = input_json["options"].get("greedyHint", False)
+    # CPU cores available to the run (less than all in a batch run, see
+    # solve_batch.py):
+    config["num_cores"] = os.cpu_count() or 1
+    # Solver parameters, see solver_profiles.py:
+    config["solver_profiles"] = {
+        **solver_profiles,
+        **input_json["options"].get("solverProfiles", {}),
+    }
+    config["solver_profile"] = input_json["options"].get(
+        "solverProfile", "balanced"
+    )
+    if config["solver_profile"] not in config["solver_profiles"]:
+        print(f"Unknown solver profile {config['solver_profile']}.")
+        sys.exit(1)
+    config["num_search_workers"] = input_json["options"].get(
+        "numSearchWorkers"
+    )
+    config["objective_cutoff"] = input_json["options"].get("objectiveCutoff")
+    config["lns_mode"] = input_json["options"].get("lnsMode", False)
+    config["lns_workers"] = input_json["options"].get(
+        "lnsWorkers", min(config["num_cores"], 4)
+    )
+    config["lns_neighbourhood_timeout"] = input_json["options"].get(
+        "lnsNeighbourhoodTimeout", 20
+    )
+    config["checkpoint_interval"] = input_json["options"].get(
+        "checkpointInterval", 5
+    )
+    config["relative_gap_limit"] = input_json["options"].get(
+        "relativeGapLimit"
+    )
+    config["stall_timeout"] = input_json["options"].get("stallTimeout")
+    config["random_seed"] = input_json["options"].get("randomSeed")
+    # Outputs are written to the logs folder of the run, unless redirected
+    # (e.g. by the replay benchmark):
+    config["output_folder"] = None
+
     config["total_slots_covered"] = get_total_slots_covered(
         config["hours_coverage"]
     )
@@ -21,9 +21,14 @@ import jsonschema
 import pandas as pd
 from pathlib import Path
 
+from .input_cache import find_input_hash, read_input_cache, write_input_cache
+from .metrics import enable_metrics, timed
+
 # Input filenames:
+filename_input = "support-shift-scheduler-input.json"
 filename_onboarding = "onboarding_agents.txt"
 filename_mentors = "mentors.txt"
+filename_output = "support-shift-scheduler-output.json"
 
 
 def get_project_root() -> Path:
@@ -31,29 +36,112 @@ def get_project_root() -> Path:
     return Path(__file__).parent.parent.parent
 
 
-def parse_json_input():
-    """Read, validate and return json scheduler input."""
-    # Get input file name:
+def parse_arguments():
+    """Parse command line arguments of the scheduler run."""
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "-i", "--input", help="Scheduler input JSON file path", required=True
     )
-    args = parser.parse_args()
-    input_filename = args.input.strip()
-
-    # Load and validate JSON input:
-    input_json = json.load(open(input_filename))
-    path_to_schema = Path(
-        get_project_root() / "lib/schemas/",
-        "support-shift-scheduler-input.schema.json",
+    parser.add_argument(
+        "-w",
+        "--warm-start",
+        nargs="+",
+        default=[],
+        help="Previous scheduler output JSON files (or logs folders "
+        "containing them) to warm-start the solver from",
+    )
+    parser.add_argument(
+        "--revalidate",
+        action="store_true",
+        help="Parse and validate the input JSON, even if it is cached",
+    )
+    parser.add_argument(
+        "--solver-profile",
+        help="Solver profile, overriding the solverProfile option",
+    )
+    parser.add_argument(
+        "--solver-profiles",
+        help="JSON file of solver profiles (e.g. written by "
+        "benchmarks/tuning.py), added to the solverProfiles option",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Write a cProfile dump per phase of the run to the logs folder",
     )
-    input_json_schema = json.load(open(path_to_schema))
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Include memory deltas per phase in the metrics",
+    )
+    return parser.parse_args()
+
+
+def get_schema_path(schema_filename):
+    """Return the path of one of the JSON schemas."""
+    return Path(get_project_root() / "lib/schemas/", schema_filename)
+
+
+def validate_json(json_data, schema_filename, description):
+    """Validate JSON against one of the schemas, exiting if invalid."""
+    json_schema = json.load(open(get_schema_path(schema_filename)))
     try:
-        jsonschema.validate(input_json, input_json_schema)
+        jsonschema.validate(json_data, json_schema)
     except jsonschema.exceptions.ValidationError as err:
-        print("Input JSON validation error", err)
+        print(f"{description} validation error", err)
         sys.exit(1)
-    return input_json
+
+
+def read_json_input(input_filename, revalidate=False):
+    """Read scheduler input, from its cache if it was validated before.
+
+    Otherwise, or with revalidate, the input is parsed and validated, and
+    its cache is (re)written. Returns [input_json, is_cached].
+    """
+    input_bytes = Path(input_filename).read_bytes()
+    input_hash = find_input_hash(
+        input_bytes,
+        get_schema_path("support-shift-scheduler-input.schema.json"),
+    )
+    if not revalidate and (
+        input_json := read_input_cache(input_filename, input_hash)
+    ):
+        return [input_json, True]
+    input_json = json.loads(input_bytes)
+    validate_json(
+        input_json, "support-shift-scheduler-input.schema.json", "Input JSON"
+    )
+    try:
+        write_input_cache(input_json, input_filename, input_hash)
+    except OSError as err:
+        print("Input cache could not be written:", err)
+    return [input_json, False]
+
+
+def read_previous_outputs(paths):
+    """Read and validate previous scheduler outputs, for a warm start."""
+    previous_outputs = []
+    for path in paths:
+        if (path := Path(path.strip())).is_dir():
+            path = path / filename_output
+        previous_output = json.load(open(path))
+        validate_json(
+            previous_output,
+            "support-shift-scheduler-output.schema.json",
+            f"Previous output JSON {path}",
+        )
+        previous_outputs.append(previous_output)
+    return previous_outputs
+
+
+def get_input_folder(input_json):
+    """Find the logs folder of an input, with its onboarding files."""
+    return (
+        get_project_root()
+        / "logs"
+        / f'{input_json["options"]["startMondayDate"]}_'
+        f'{input_json["options"]["modelName"]}'
+    )
 
 
 def read_onboarding_files(input_folder):
@@ -76,14 +164,23 @@ def read_onboarding_files(input_folder):
     return [ser_o, ser_m]
 
 
+@timed
 def read_input_files():
     """Read all input for scheduler run from relevant logs folder."""
-    input_json = parse_json_input()
-    input_folder = (
-        get_project_root()
-        / "logs"
-        / f'{input_json["options"]["startMondayDate"]}_'
-        f'{input_json["options"]["modelName"]}'
+    args = parse_arguments()
+    enable_metrics(memory=args.trace_memory, profile=args.profile)
+    [input_json, _] = read_json_input(
+        args.input.strip(), revalidate=args.revalidate
+    )
+    if args.solver_profile is not None:
+        input_json["options"]["solverProfile"] = args.solver_profile
+    if args.solver_profiles is not None:
+        input_json["options"]["solverProfiles"] = {
+            **input_json["options"].get("solverProfiles", {}),
+            **json.load(open(args.solver_profiles))["solverProfiles"],
+        }
+    [sr_onboarding, sr_mentors] = read_onboarding_files(
+        get_input_folder(input_json)
     )
-    [sr_onboarding, sr_mentors] = read_onboarding_files(input_folder)
-    return [input_json, sr_onboarding, sr_mentors]
+    previous_outputs = read_previous_outputs(args.warm_start)
+    return [input_json, sr_onboarding, sr_mentors, previous_outputs]
@@ -0,0 +1,115 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import contextlib
+import signal
+import threading
+import time
+from ortools.sat.python import cp_model
+
+# Running and stopping a search, shared by the solver of the full model and
+# by large neighbourhood search (LNS): a search stops early on SIGINT or
+# SIGTERM, or once the objective stalls, keeping the best solution found.
+
+
+class ObjectiveTracker(cp_model.CpSolverSolutionCallback):
+    """Record the (wall time, objective) of each improving solution."""
+
+    def __init__(self):
+        """Initialize callback."""
+        cp_model.CpSolverSolutionCallback.__init__(self)
+        self.progress = []
+
+    def on_solution_callback(self):
+        """Store the wall time and objective of the solution."""
+        self.progress.append((self.WallTime(), self.ObjectiveValue()))
+
+    @property
+    def first_solution_time(self):
+        """Wall time at which the first solution was found, if any."""
+        return self.progress[0][0] if self.progress else None
+
+
+@contextlib.contextmanager
+def stop_on_signals(stop):
+    """Call stop() on SIGINT or SIGTERM, instead of exiting.
+
+    The previous signal handlers are restored when leaving the context.
+    """
+
+    def handle_signal(signum, frame):
+        print(f"\nReceived {signal.Signals(signum).name}, stopping search.")
+        stop()
+
+    previous_handlers = {
+        signum: signal.signal(signum, handle_signal)
+        for signum in [signal.SIGINT, signal.SIGTERM]
+    }
+    try:
+        yield
+    finally:
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+
+
+def is_stalled(progress, elapsed, config):
+    """Check whether the objective hasn't improved for too long.
+
+    progress lists the (wall time, objective) of each improvement, and
+    elapsed is the wall time now.
+    """
+    return (
+        config["stall_timeout"] is not None
+        and len(progress) > 0
+        and elapsed - progress[-1][0] > config["stall_timeout"]
+    )
+
+
+def solve_interruptibly(solver, model, tracker, config, stopped=None):
+    """Solve the model, stopping the search early when asked to.
+
+    The search stops on SIGINT or SIGTERM, or once the objective hasn't
+    improved for config["stall_timeout"] seconds; the best solution found
+    so far is kept. The solver runs in a separate thread, so that the
+    signal handlers can run meanwhile. The event stopped, if given, is set
+    when a signal stops the search.
+    """
+    result = {}
+    if stopped is None:
+        stopped = threading.Event()
+
+    def stop_search():
+        stopped.set()
+        solver.StopSearch()
+
+    thread = threading.Thread(
+        target=lambda: result.update(status=solver.Solve(model, tracker))
+    )
+    start = time.perf_counter()
+    with stop_on_signals(stop_search):
+        thread.start()
+        while thread.is_alive():
+            thread.join(0.5)
+            if is_stalled(
+                tracker.progress, time.perf_counter() - start, config
+            ):
+                print(
+                    "\nNo improvement for "
+                    f"{config['stall_timeout']} s, stopping search."
+                )
+                solver.StopSearch()
+                thread.join()
+    return result["status"]
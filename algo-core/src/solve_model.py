@@ -15,15 +15,34 @@ limitations under the License.
 """
 
 from ortools.sat.python import cp_model
+import collections
+import functools
 import json
+import os
 from pathlib import Path
 import jsonschema
+import numpy as np
 import sys
+import time
 
 from .custom_var_domains import define_custom_var_domains
 from .veterans import setup_model_veterans
+from .patterns import setup_model_veterans_patterns
+from .automaton import setup_model_veterans_automaton
 from .onboarding import extend_model_onboarding
+from .greedy import (
+    calculate_schedule_cost,
+    construct_greedy_schedule,
+    find_schedule_violations,
+)
+from .hints import add_schedule_hints, find_agent_day_shifts
+from .warm_start import find_warm_start_shifts
+from .lns import run_lns
+from .verify import print_summary, verify_schedule
 from .read_input import get_project_root
+from .metrics import timed
+from .search import ObjectiveTracker, solve_interruptibly
+from .solver_profiles import get_solver_parameters, set_solver_parameters
 
 # Cost coefficients assigned to various soft constraints:
 coefficients = {
@@ -34,111 +53,29 @@ coefficients = {
     "shorter_than_pref": 2,
 }
 
+# Veteran model formulations, selectable with config["veteran_formulation"]:
+veteran_formulations = {
+    "intervals": setup_model_veterans,
+    "patterns": setup_model_veterans_patterns,
+    "automaton": setup_model_veterans_automaton,
+}
+
 
-# TODO: split the verification out to a separate python script, so
-# that it can be run independently after possible manual changes to the
-# output json.
+@timed
 def verify_solution(
-    objective,
-    sol_shifts,
-    daily_shift_count_per_agent,
-    df_agents,
-    agent_categories,
-    config,
+    objective, sol_shifts, df_agents, agent_categories, config
 ):
-    """Verify schedule against availability, and verify cost."""
-    slot_cost = 0
-    shift_length_cost = 0
-    total_week_slots_cost = 0
-    multiple_shifts_cost = 0
-    total_week_slots_by_veteran = {}
-    # Verify that agents were only scheduled when they are available:
-    for d in range(config["num_days"]):
-        for shift in sol_shifts[d]["shifts"]:
-            handle = shift["agentName"]
-            ideal_length = df_agents.loc[handle, "ideal_shift_length"]
-            shift_length = shift["end"] - shift["start"]
-
-            if handle in agent_categories["veterans"]:
-                # Find total slots per week cost per agent:
-                if handle in total_week_slots_by_veteran.keys():
-                    total_week_slots_by_veteran[handle] += shift_length
-                else:
-                    total_week_slots_by_veteran[handle] = shift_length
-                # Find cost due to non-ideal shift lengths:
-                shift_delta = shift_length - ideal_length
-                if shift_delta > 0:
-                    shift_length_cost += (
-                        coefficients["longer_than_pref"] * shift_delta
-                    )
-                    print(
-                        f"{handle} has a shift {shift_delta/2} "
-                        "hours longer than preferred."
-                    )
-                elif shift_delta < 0:
-                    shift_length_cost += coefficients["shorter_than_pref"] * (
-                        -shift_delta
-                    )
-                    print(
-                        f"{handle} has a shift {-shift_delta/2} "
-                        "hours shorter than preferred."
-                    )
-            for slot in range(shift["start"], shift["end"]):
-                slot_value = df_agents.loc[handle, "slots"][d][slot]
-                if slot_value in config["allowed_availabilities"]:
-                    slot_delta = slot_value - 1
-                    slot_cost += slot_delta
-                    if slot_delta == 1:
-                        print(
-                            "30 minutes of non-preferred "
-                            f"time was used for {handle}."
-                        )
-                    elif slot_delta == 2:
-                        print(
-                            "30 minutes of 'ask-me-nicely' "
-                            f"time was used for {handle}."
-                        )
-                else:
-                    print(
-                        f"ERROR: Agent {handle} was scheduled for slot {slot}"
-                        f" on day {config['days'][d].strftime('%Y-%m-%d')}, "
-                        "but is not available!"
-                    )
-                    sys.exit(1)
-        # Calculate cost from veterans receiving more than 1 shift per day:
-        for handle, num_shifts in daily_shift_count_per_agent[d].items():
-            if num_shifts >= 2:
-                multiple_shifts_cost += coefficients[
-                    "multiple_shifts_per_day"
-                ] * (num_shifts - 1)
-                print(
-                    f"{handle} scheduled for {num_shifts} shifts on day {d}."
-                )
-    print("VERIFIED: Agents only scheduled when available.")
-    slot_cost = coefficients["non_preferred"] * slot_cost
-
-    for handle in total_week_slots_by_veteran.keys():
-        if (
-            total_week_slots_by_veteran[handle]
-            > df_agents.loc[handle, "fair_share"]
-        ):
-            slots_more_than_fair_share = (
-                total_week_slots_by_veteran[handle]
-                - df_agents.loc[handle, "fair_share"]
-            )
-            total_week_slots_cost += (
-                coefficients["fair_share"] * slots_more_than_fair_share**2
-            )
-            print(
-                f"{handle} was scheduled for {slots_more_than_fair_share*0.5}"
-                " hours more than their fair share."
-            )
-    total_cost = (
-        total_week_slots_cost
-        + shift_length_cost
-        + slot_cost
-        + multiple_shifts_cost
+    """Verify schedule against availability, and verify cost.
+
+    Returns the cost calculated from the schedule.
+    """
+    summary = verify_schedule(
+        sol_shifts, coefficients, df_agents, agent_categories, config
     )
+    print_summary(summary)
+    if not summary["valid"]:
+        sys.exit(1)
+    total_cost = summary["total_cost"]
     if total_cost == objective:
         print(f"VERIFIED: Minimized cost of {total_cost} is correct.")
     else:
@@ -146,119 +83,423 @@ def verify_solution(
             f"WARNING: The solver found a minimized cost of {objective}, "
             f"while the calculated cost is {total_cost}!"
         )
+    return total_cost
 
 
-def write_output_files(sol_shifts, sol_mentoring, config):
-    """Write output files containing solution of solver run."""
-    # Write shifts:
-    input_folder = (
+def get_output_folder(config):
+    """Find the logs folder of the scheduler run."""
+    if config["output_folder"] is not None:
+        return Path(config["output_folder"])
+    return (
         get_project_root()
         / "logs"
         / f'{config["start_date"].strftime("%Y-%m-%d")}_{config["model_name"]}'
     )
 
-    with open(
-        Path(input_folder, "support-shift-scheduler-output.json"), "w"
-    ) as outfile:
-        outfile.write(json.dumps(sol_shifts, indent=4))
 
+def write_json_atomically(path, json_data):
+    """Write JSON to a file, replacing any previous version atomically."""
+    temp_path = path.with_name(f"{path.name}.tmp")
+    with open(temp_path, "w") as outfile:
+        outfile.write(json.dumps(json_data, indent=4))
+    os.replace(temp_path, path)
+
+
+@timed
+def write_output_files(sol_shifts, sol_mentoring, solution_info, config):
+    """Write output files containing solution of solver run.
+
+    solution_info holds the status, objective, bound and verified cost of
+    the solution.
+    """
+    input_folder = get_output_folder(config)
+    # Write shifts:
+    write_json_atomically(
+        Path(input_folder, "support-shift-scheduler-output.json"), sol_shifts
+    )
     # Write mentoring:
-    with open(Path(input_folder, "onboarding_pairings.json"), "w") as outfile:
-        outfile.write(json.dumps(sol_mentoring, indent=4))
+    write_json_atomically(
+        Path(input_folder, "onboarding_pairings.json"), sol_mentoring
+    )
+    # Write solution info, last, so that it matches the files above:
+    write_json_atomically(
+        Path(input_folder, "solution_info.json"), solution_info
+    )
+
+
+class SolutionWriter(ObjectiveTracker):
+    """Write improving solutions to the output files while solving.
+
+    To keep this cheap, a solution is only written if the previous write
+    was at least config["checkpoint_interval"] seconds earlier; the final
+    solution is written after solving as usual.
+    """
+
+    def __init__(
+        self, var_veterans, var_onboarding, df_agents, agent_categories, config
+    ):
+        """Initialize callback."""
+        ObjectiveTracker.__init__(self)
+        self.var_veterans = var_veterans
+        self.var_onboarding = var_onboarding
+        self.df_agents = df_agents
+        self.agent_categories = agent_categories
+        self.config = config
+        self.last_write_time = None
+        # Solutions are read by variable index, looked up once here:
+        self.indices = find_solution_indices(
+            var_veterans, var_onboarding, config
+        )
+
+    def on_solution_callback(self):
+        """Record the solution, and write it if the interval has passed."""
+        ObjectiveTracker.on_solution_callback(self)
+        self.write_solution(
+            self,
+            self.ObjectiveValue(),
+            self.BestObjectiveBound(),
+            self.WallTime(),
+        )
+
+    def write_solution(self, solution, objective, bound, wall_time):
+        """Write a solution, if the interval has passed.
 
+        solution can be this callback, while solving, or a list with the
+        values of all model variables, e.g. an incumbent of LNS.
+        """
+        if (
+            self.last_write_time is not None
+            and wall_time - self.last_write_time
+            < self.config["checkpoint_interval"]
+        ):
+            return
+        self.last_write_time = wall_time
+        [sol_shifts, sol_mentoring, _] = extract_solution(
+            solution,
+            self.var_veterans,
+            self.var_onboarding,
+            self.df_agents,
+            self.agent_categories,
+            self.config,
+            self.indices,
+        )
+        write_output_files(
+            sol_shifts,
+            sol_mentoring,
+            {
+                "status": "INTERMEDIATE",
+                "objective": objective,
+                "bound": bound,
+                "wall_time": wall_time,
+            },
+            self.config,
+        )
+        print(
+            f"Wrote intermediate solution with cost {objective} "
+            f"after {wall_time:.1f} s."
+        )
+
+
+@timed
+def run_solver(model, full_cost_list, config, tracker=None):
+    """Given the defined model, solve by minizing defined cost function.
 
-def run_solver(model, full_cost_list, config):
-    """Given the defined model, solve by minizing defined cost function."""
+    The tracker, if given, is called for each solution found.
+    """
+    parameters = get_solver_parameters(config)
     model.Minimize(sum(full_cost_list))
+    # Only accept solutions below the cutoff:
+    if parameters["objective_cutoff"] is not None:
+        model.Add(sum(full_cost_list) <= parameters["objective_cutoff"])
     print(model.Validate())
 
-    # Solve model:
+    # Solve model, with the parameters of the solver profile:
+    print(f"\nSolver profile: {config['solver_profile']}")
     solver = cp_model.CpSolver()
+    set_solver_parameters(solver, parameters)
     solver.parameters.max_time_in_seconds = config["optimization_timeout"]
-    solver.parameters.log_search_progress = True
-    solver.parameters.num_search_workers = 8
-    status = solver.Solve(model)
+    # SIGINT is handled by solve_interruptibly() instead:
+    solver.parameters.catch_sigint_signal = False
+    if tracker is None:
+        tracker = ObjectiveTracker()
+    status = solve_interruptibly(solver, model, tracker, config)
+    if tracker.first_solution_time is not None:
+        print(
+            "\nFirst solution found after "
+            f"{tracker.first_solution_time:.2f} s."
+        )
     return [solver, status]
 
 
+def get_solution_values(solver, indices):
+    """Read the values of the solution variables in a single batch.
+
+    solver can be a CpSolver after solving, a solution callback, or the
+    list of values of all model variables. Values are read directly from
+    the solution in the solver's response, which is much cheaper than a
+    solver.Value() call per variable. Returns an array
+    over all model variables, in which only the solution variables (see
+    find_solution_indices()) are filled in.
+    """
+    if isinstance(solver, cp_model.CpSolverSolutionCallback):
+        solution = solver.Response().solution
+    elif isinstance(solver, cp_model.CpSolver):
+        solution = solver.ResponseProto().solution
+    else:
+        solution = solver
+    values = np.zeros(len(solution), np.int64)
+    values[indices["all"]] = [solution[j] for j in indices["all"]]
+    return values
+
+
+def find_var_indices(variables):
+    """Return the model indices of an array of variables, -1 for None."""
+    return np.array(
+        [-1 if x is None else x.Index() for x in variables.ravel()], np.int64
+    ).reshape(variables.shape)
+
+
+def read_values(values, indices):
+    """Look up variable values by index, with 0 for missing variables."""
+    return np.where(indices >= 0, values[indices], 0)
+
+
+def find_solution_indices(var_veterans, var_onboarding, config):
+    """Find the indices of the variables that make up a schedule.
+
+    These are looked up once, so that each solution can then be read with
+    array indexing, instead of a solver call per variable.
+    """
+    if config["veteran_formulation"] == "patterns":
+        indices = {
+            "is_selected": find_var_indices(var_veterans["p"]["is_selected"])
+        }
+    elif config["veteran_formulation"] == "automaton":
+        indices = {
+            column: find_var_indices(var_veterans["dsh"][column])
+            for column in ["is_agent_on_slot", "is_shift_end"]
+        }
+    else:
+        indices = {
+            column: find_var_indices(var_veterans["dhk"][column])
+            for column in ["shift_start", "shift_end", "shift_duration"]
+        }
+    if var_onboarding is not None:
+        indices["onboarding"] = {
+            column: find_var_indices(var_onboarding["dh"][column])
+            for column in ["shift_start", "shift_end", "shift_duration"]
+        }
+        indices["is_mentor"] = find_var_indices(
+            var_onboarding["mentors"]["is_mentor"]
+        )
+    indices["all"] = np.unique(
+        np.concatenate(
+            [
+                array.ravel()
+                for array in [
+                    *indices.values(),
+                    *indices.get("onboarding", {}).values(),
+                ]
+                if isinstance(array, np.ndarray)
+            ]
+        )
+    )
+    indices["all"] = indices["all"][indices["all"] >= 0].tolist()
+    return indices
+
+
+def group_shifts_by_day(shifts, config):
+    """Group (day, handle, start, end) shifts into a list per day."""
+    schedule = [[] for _ in range(config["num_days"])]
+    for d, h, start, end in shifts:
+        schedule[d].append((h, int(start), int(end)))
+    return schedule
+
+
+def fetch_veteran_schedule(
+    values, indices, var_veterans, agent_categories, config
+):
+    """List, per day, the (handle, start, end) of the veterans' shifts."""
+    veterans = agent_categories["veterans"]
+    if config["veteran_formulation"] == "patterns":
+        pattern_labels = var_veterans["p"].labels[0]
+        selected = np.flatnonzero(
+            read_values(values, indices["is_selected"]) == 1
+        )
+        return group_shifts_by_day(
+            (pattern_labels[p] for p in selected), config
+        )
+
+    if config["veteran_formulation"] == "automaton":
+        # Shifts are the runs of consecutive slots that an agent is on,
+        # which start where the occupancy steps up, or right after the end
+        # of a back-to-back shift:
+        slots = var_veterans["dsh"].labels[1]
+        slot_bounds = np.append(slots, slots[-1] + 1)
+        is_on = read_values(values, indices["is_agent_on_slot"]) == 1
+        is_end = read_values(values, indices["is_shift_end"]) == 1
+        is_continued = np.zeros_like(is_on)
+        is_continued[:, 1:] = is_on[:, :-1] & ~is_end[:, :-1]
+        [d_up, s_up, i_up] = np.nonzero(is_on & ~is_continued)
+        [d_down, s_down, i_down] = np.nonzero(is_end)
+        # Pair each run's start and end, sorting both by day, agent and slot:
+        up = np.lexsort((s_up, i_up, d_up))
+        down = np.lexsort((s_down, i_down, d_down))
+        return group_shifts_by_day(
+            zip(
+                d_up[up],
+                [veterans[i] for i in i_up[up]],
+                slot_bounds[s_up[up]],
+                slot_bounds[s_down[down] + 1],
+            ),
+            config,
+        )
+
+    durations = read_values(values, indices["shift_duration"])
+    [days, positions, ks] = np.nonzero(durations)
+    return group_shifts_by_day(
+        zip(
+            days,
+            [veterans[i] for i in positions],
+            values[indices["shift_start"][days, positions, ks]],
+            values[indices["shift_end"][days, positions, ks]],
+        ),
+        config,
+    )
+
+
+def fetch_onboarding_schedule(values, indices, agent_categories, config):
+    """List, per day, the onboarders' shifts and (onboarder, mentor) pairs."""
+    onboarders = agent_categories["onboarding"]
+    mentors = agent_categories["mentors"]
+    v_indices = indices["onboarding"]
+    durations = read_values(values, v_indices["shift_duration"])
+    [days, positions] = np.nonzero(durations)
+    onboarding_schedule = group_shifts_by_day(
+        zip(
+            days,
+            [onboarders[i] for i in positions],
+            values[v_indices["shift_start"][days, positions]],
+            values[v_indices["shift_end"][days, positions]],
+        ),
+        config,
+    )
+    mentoring_schedule = [[] for _ in range(config["num_days"])]
+    for d, i, j_m in zip(
+        *np.nonzero(read_values(values, indices["is_mentor"]) == 1)
+    ):
+        mentoring_schedule[d].append((onboarders[i], mentors[j_m]))
+    return [onboarding_schedule, mentoring_schedule]
+
+
+@timed
 def extract_solution(
-    solver, var_veterans, var_onboarding, df_agents, agent_categories, config
+    solver,
+    var_veterans,
+    var_onboarding,
+    df_agents,
+    agent_categories,
+    config,
+    indices=None,
+):
+    """Extract resulting shifts from optimized parameters found by solver.
+
+    solver can be anything that get_solution_values() reads. The indices of
+    the solution variables (see find_solution_indices()) can be given, if
+    they are reused for several solutions.
+    """
+    if indices is None:
+        indices = find_solution_indices(var_veterans, var_onboarding, config)
+    values = get_solution_values(solver, indices)
+    veteran_schedule = fetch_veteran_schedule(
+        values, indices, var_veterans, agent_categories, config
+    )
+    [onboarding_schedule, mentoring_schedule] = [None, None]
+    if var_onboarding is not None:
+        [onboarding_schedule, mentoring_schedule] = fetch_onboarding_schedule(
+            values, indices, agent_categories, config
+        )
+    return format_solution(
+        veteran_schedule,
+        onboarding_schedule,
+        mentoring_schedule,
+        df_agents,
+        agent_categories,
+        config,
+    )
+
+
+@functools.cache
+def get_output_validator():
+    """Load the output JSON schema into a validator, once per run.
+
+    Checking the schema and setting up the validator is what dominates the
+    cost of jsonschema.validate(), which matters when intermediate
+    solutions are written during the search.
+    """
+    output_json_schema = json.load(
+        open(
+            Path(
+                get_project_root() / "lib/schemas/",
+                "support-shift-scheduler-output.schema.json",
+            )
+        )
+    )
+    validator_class = jsonschema.validators.validator_for(output_json_schema)
+    validator_class.check_schema(output_json_schema)
+    return validator_class(output_json_schema)
+
+
+def format_solution(
+    veteran_schedule,
+    onboarding_schedule,
+    mentoring_schedule,
+    df_agents,
+    agent_categories,
+    config,
 ):
-    """Extract resulting shifts from optimized parameters found by solver."""
-    # Extract solution:
+    """Convert a schedule into validated output JSON.
+
+    Shifts are given as a list with, per day, a list of (handle, start,
+    end), for veterans and (if any) onboarders, and mentoring as a list
+    with, per day, a list of (onboarder, mentor).
+    """
     sol_shifts = []
     # TODO: Change agent, agentName to simply handle and email.
     sol_mentoring = []
     daily_shift_count_per_agent = []
+    emails = df_agents["email"].to_dict()
     for d in range(config["num_days"]):
-        # day_shifts = {"start_date": config["days"][d], "shifts": []}
-        day_shifts = {
-            "start_date": config["days"][d].strftime("%Y-%m-%d"),
-            "shifts": [],
-        }
-        day_mentoring = {
-            "start_date": config["days"][d].strftime("%Y-%m-%d"),
-            "shifts": [],
-        }
-        shift_count_per_agent = {}
-        # Fetch shifts for veterans:
-        for h in agent_categories["veterans"]:
-            for k in range(config["max_shifts_per_agent_per_day"]):
-                if (
-                    solver.Value(
-                        var_veterans["dhk"].loc[(d, h, k), "shift_duration"]
-                    )
-                    != 0
-                ):
-                    day_shifts["shifts"].append(
-                        {
-                            "agent": f"{h} <{df_agents.loc[h, 'email']}>",
-                            "agentName": h,
-                            "start": solver.Value(
-                                var_veterans["dhk"].loc[
-                                    (d, h, k), "shift_start"
-                                ]
-                            ),
-                            "end": solver.Value(
-                                var_veterans["dhk"].loc[(d, h, k), "shift_end"]
-                            ),
-                        }
-                    )
-                    if h in shift_count_per_agent:
-                        shift_count_per_agent[h] += 1
-                    else:
-                        shift_count_per_agent[h] = 1
-        daily_shift_count_per_agent.append(shift_count_per_agent)
-
-        # Fetch shifts for onboarders:
-        for h in agent_categories["onboarding"]:
-            if (
-                solver.Value(
-                    var_onboarding["dh"].loc[(d, h), "shift_duration"]
-                )
-                != 0
-            ):
-                day_shifts["shifts"].append(
-                    {
-                        "agent": f"{h} <{df_agents.loc[h, 'email']}>",
-                        "agentName": h,
-                        "start": solver.Value(
-                            var_onboarding["dh"].loc[(d, h), "shift_start"]
-                        ),
-                        "end": solver.Value(
-                            var_onboarding["dh"].loc[(d, h), "shift_end"]
-                        ),
-                    }
-                )
-
-            for m in var_onboarding["mentors"].columns:
-                if solver.Value(var_onboarding["mentors"].loc[(d, h), m]) == 1:
-                    day_mentoring["shifts"].append(
-                        {"onboarder": h, "mentor": m}
+        day_shifts = [
+            {
+                "agent": f"{h} <{emails[h]}>",
+                "agentName": h,
+                "start": start,
+                "end": end,
+            }
+            for h, start, end in veteran_schedule[d]
+            + (onboarding_schedule[d] if onboarding_schedule else [])
+        ]
+        sol_shifts.append(
+            {
+                "start_date": config["days"][d].strftime("%Y-%m-%d"),
+                "shifts": day_shifts,
+            }
+        )
+        sol_mentoring.append(
+            {
+                "start_date": config["days"][d].strftime("%Y-%m-%d"),
+                "shifts": [
+                    {"onboarder": h, "mentor": m}
+                    for h, m in (
+                        mentoring_schedule[d] if mentoring_schedule else []
                     )
-
-        sol_shifts.append(day_shifts)
-        sol_mentoring.append(day_mentoring)
+                ],
+            }
+        )
+        daily_shift_count_per_agent.append(
+            dict(collections.Counter(h for h, _, _ in veteran_schedule[d]))
+        )
 
     # Sort shifts by start times to improve output readability:
     for i in range(len(sol_shifts)):
@@ -267,17 +508,8 @@ def extract_solution(
         sol_shifts[i]["shifts"] = sorted_shifts
 
     # Validate shifts:
-    output_json_schema = json.load(
-        open(
-            Path(
-                get_project_root() / "lib/schemas/",
-                "support-shift-scheduler-output.schema.json",
-            )
-        )
-    )
-
     try:
-        jsonschema.validate(sol_shifts, output_json_schema)
+        get_output_validator().validate(sol_shifts)
     except jsonschema.exceptions.ValidationError as err:
         print("Output JSON validation error", err)
         sys.exit(1)
@@ -286,14 +518,18 @@ def extract_solution(
     return [sol_shifts, sol_mentoring, daily_shift_count_per_agent]
 
 
-def generate_solution(df_agents, agent_categories, config):
-    """Construct and solve CpModel, verify and output solution."""
+@timed
+def setup_model(df_agents, agent_categories, config):
+    """Construct the CpModel and its cost terms for the given input."""
     # Define custom variable domains:
     custom_domains = define_custom_var_domains(coefficients, df_agents, config)
     # Initialize model:
     model = cp_model.CpModel()
     # Set up model for veterans:
-    [model, var_veterans, full_cost_list] = setup_model_veterans(
+    setup_model_veterans_formulation = veteran_formulations[
+        config["veteran_formulation"]
+    ]
+    [model, var_veterans, full_cost_list] = setup_model_veterans_formulation(
         model,
         custom_domains,
         coefficients,
@@ -319,28 +555,155 @@ def generate_solution(df_agents, agent_categories, config):
             agent_categories,
             config,
         )
-    # Solve:
-    [solver, status] = run_solver(model, full_cost_list, config)
-    if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
-        # Extract solution:
-        [sol_shifts, sol_mentoring, daily_shift_count_per_agent] = (
-            extract_solution(
-                solver,
-                var_veterans,
-                var_onboarding,
+    return [model, var_veterans, var_onboarding, full_cost_list]
+
+
+@timed
+def run_greedy_heuristic(df_agents, agent_categories, config):
+    """Construct a veteran schedule with the greedy heuristic."""
+    custom_domains = define_custom_var_domains(coefficients, df_agents, config)
+    start = time.perf_counter()
+    schedule = construct_greedy_schedule(
+        custom_domains, coefficients, df_agents, agent_categories, config
+    )
+    print(
+        "\nGreedy heuristic finished in "
+        f"{(time.perf_counter() - start) * 1000:.0f} ms."
+    )
+    violations = find_schedule_violations(
+        schedule,
+        custom_domains,
+        coefficients,
+        df_agents,
+        agent_categories,
+        config,
+    )
+    for violation in violations:
+        print(f"WARNING: {violation}")
+    cost = calculate_schedule_cost(
+        schedule, coefficients, df_agents, agent_categories, config
+    )
+    print(
+        f"Greedy schedule is {'infeasible' if violations else 'feasible'}, "
+        f"with a cost of {cost}."
+    )
+    return [schedule, cost]
+
+
+def generate_solution(
+    df_agents, agent_categories, config, previous_outputs=()
+):
+    """Construct and solve CpModel, verify and output solution.
+
+    Shifts of previous outputs, if given, are used to warm-start the solver.
+    Returns the solution info written with the output, or None if no
+    solution was found.
+    """
+    if config["fast_mode"] or config["greedy_hint"]:
+        [greedy_schedule, greedy_cost] = run_greedy_heuristic(
+            df_agents, agent_categories, config
+        )
+    if config["fast_mode"]:
+        # Output the greedy schedule, without running the solver:
+        if len(agent_categories["onboarding"]) > 0:
+            print("WARNING: Onboarders are not scheduled in fast mode.")
+        [sol_shifts, sol_mentoring, _] = format_solution(
+            greedy_schedule,
+            None,
+            None,
+            df_agents,
+            agent_categories,
+            config,
+        )
+        verified_cost = verify_solution(
+            greedy_cost,
+            sol_shifts,
+            df_agents,
+            agent_categories,
+            config,
+        )
+        solution_info = {
+            "status": "HEURISTIC",
+            "objective": greedy_cost,
+            "bound": None,
+            "verified_cost": verified_cost,
+        }
+        write_output_files(sol_shifts, sol_mentoring, solution_info, config)
+        return solution_info
+
+    [model, var_veterans, var_onboarding, full_cost_list] = setup_model(
+        df_agents, agent_categories, config
+    )
+    # Hint the greedy schedule and/or previous shifts, the latter taking
+    # precedence:
+    agent_day_shifts = {}
+    if config["greedy_hint"]:
+        agent_day_shifts.update(
+            find_agent_day_shifts(greedy_schedule, agent_categories, config)
+        )
+    if previous_outputs:
+        agent_day_shifts.update(
+            find_warm_start_shifts(
+                previous_outputs,
+                coefficients,
                 df_agents,
                 agent_categories,
                 config,
             )
         )
+    if agent_day_shifts:
+        model = add_schedule_hints(
+            model,
+            var_veterans,
+            agent_day_shifts,
+            coefficients,
+            df_agents,
+            agent_categories,
+            config,
+        )
+    # Solve, writing improving solutions meanwhile:
+    writer = SolutionWriter(
+        var_veterans, var_onboarding, df_agents, agent_categories, config
+    )
+    if config["lns_mode"]:
+        model.Minimize(sum(full_cost_list))
+        start = time.perf_counter()
+        [solver, status, _] = run_lns(
+            model, var_veterans, df_agents, agent_categories, config, writer
+        )
+        # LNS has no overall bound, and its final solve only checks the
+        # solution:
+        [bound, wall_time] = [None, time.perf_counter() - start]
+    else:
+        [solver, status] = run_solver(model, full_cost_list, config, writer)
+        [bound, wall_time] = [solver.BestObjectiveBound(), solver.WallTime()]
+    if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+        # Extract solution:
+        [sol_shifts, sol_mentoring, _] = extract_solution(
+            solver,
+            var_veterans,
+            var_onboarding,
+            df_agents,
+            agent_categories,
+            config,
+        )
         # Verify solution:
-        verify_solution(
+        verified_cost = verify_solution(
             solver.ObjectiveValue(),
             sol_shifts,
-            daily_shift_count_per_agent,
             df_agents,
             agent_categories,
             config,
         )
         # Write output:
-        write_output_files(sol_shifts, sol_mentoring, config)
+        solution_info = {
+            "status": solver.StatusName(status),
+            "objective": solver.ObjectiveValue(),
+            "bound": bound,
+            "wall_time": wall_time,
+            "verified_cost": verified_cost,
+        }
+        write_output_files(sol_shifts, sol_mentoring, solution_info, config)
+        return solution_info
+    print(f"\nNo solution found (status {solver.StatusName(status)}).")
+    return None
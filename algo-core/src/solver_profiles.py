@@ -0,0 +1,111 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import os
+
+# Solver profiles: named sets of CP-SAT parameters (see sat_parameters.proto
+# of OR-Tools), applied on top of the base parameters below. Besides CP-SAT
+# parameters, a profile can set an objective_cutoff, i.e. an upper bound on
+# the cost of accepted solutions. Workers and memory can be set to "auto",
+# to size them to the cores and memory available to the run. Profiles can
+# be added or redefined with the solverProfiles option, and the options
+# numSearchWorkers, randomSeed, relativeGapLimit and objectiveCutoff take
+# precedence over the selected profile.
+
+base_parameters = {"num_search_workers": 8, "log_search_progress": True}
+
+solver_profiles = {
+    # Quick feedback, e.g. while preparing the input: light presolve, no
+    # LP relaxation or symmetry detection, stop within 5% of the bound.
+    "fast-preview": {
+        "max_presolve_iterations": 1,
+        "linearization_level": 0,
+        "symmetry_level": 0,
+        "relative_gap_limit": 0.05,
+    },
+    # The solver's defaults, as used before profiles were introduced:
+    "balanced": {},
+    # Spend the full time limit on proving optimality:
+    "exhaustive": {
+        "max_presolve_iterations": 10,
+        "linearization_level": 2,
+        "symmetry_level": 3,
+        "relative_gap_limit": 0.0,
+    },
+    # The defaults, with workers and memory sized to the machine (or to
+    # the run's share of it, in a batch run):
+    "auto": {"num_search_workers": "auto", "max_memory_in_mb": "auto"},
+}
+
+# Fraction of the available memory that the solver may use with "auto":
+auto_memory_fraction = 0.8
+
+
+def get_available_memory_mb():
+    """Return the memory available for new processes, in MB."""
+    try:
+        with open("/proc/meminfo") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // 2**20
+
+
+def get_solver_parameters(config):
+    """Resolve the solver parameters of the run's profile.
+
+    Returns the CP-SAT parameters, plus objective_cutoff (None if unset).
+    """
+    parameters = {
+        **base_parameters,
+        "objective_cutoff": None,
+        **config["solver_profiles"][config["solver_profile"]],
+    }
+    for key in [
+        "num_search_workers",
+        "random_seed",
+        "relative_gap_limit",
+        "objective_cutoff",
+    ]:
+        if config[key] is not None:
+            parameters[key] = config[key]
+    # Size to the cores of the run, and to their share of the memory:
+    if parameters["num_search_workers"] == "auto":
+        parameters["num_search_workers"] = config["num_cores"]
+    if parameters.get("max_memory_in_mb") == "auto":
+        parameters["max_memory_in_mb"] = int(
+            auto_memory_fraction
+            * get_available_memory_mb()
+            * config["num_cores"]
+            / (os.cpu_count() or 1)
+        )
+    return parameters
+
+
+def set_solver_parameters(solver, parameters):
+    """Set the CP-SAT parameters of a solver (except objective_cutoff).
+
+    Enum parameters are given by name, e.g. "search_branching":
+    "PORTFOLIO_SEARCH".
+    """
+    for key, value in parameters.items():
+        if key == "objective_cutoff":
+            continue
+        if isinstance(value, str):
+            value = getattr(solver.parameters, value)
+        setattr(solver.parameters, key, value)
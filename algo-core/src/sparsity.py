@@ -0,0 +1,77 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import numpy as np
+
+# When config["sparse_model"] is set, model variables are only created for
+# the parts of the week where an agent could actually be scheduled. The
+# functions below determine those parts; without the option, everything is
+# flagged as reachable, so that the full (dense) model is built.
+
+
+def find_reachable_slots(df_agents, handles, shift_length, config):
+    """Flag the (day, slot, handle) combinations that a shift could cover.
+
+    A slot can only be covered if it lies within one of the agent's
+    available ranges that is long enough to hold a shift of at least
+    shift_length slots.
+    """
+    num_slots = config["end_slot"] - config["start_slot"]
+    reachable = np.zeros(
+        (config["num_days"], num_slots, len(handles)), dtype=bool
+    )
+    if not config["sparse_model"]:
+        reachable[:] = True
+        return reachable
+
+    slot_ranges = df_agents["slot_ranges"].to_dict()
+    for i, h in enumerate(handles):
+        for d in range(config["num_days"]):
+            for start, end in slot_ranges[h][d]:
+                if end - start < shift_length:
+                    continue
+                # Positions of the range's slots within the support hours:
+                first = max(start, config["start_slot"]) - config["start_slot"]
+                last = min(end, config["end_slot"]) - config["start_slot"]
+                if last > first:
+                    reachable[d, first:last, i] = True
+    return reachable
+
+
+def find_shift_tracks(df_agents, handles, config):
+    """Determine the number of shift tracks needed per (day, handle).
+
+    This is max_shifts_per_agent_per_day, unless fewer shifts of minimum
+    duration fit into the agent's available ranges for the day (none, if
+    the agent is unavailable).
+    """
+    num_tracks = np.full(
+        (config["num_days"], len(handles)),
+        config["max_shifts_per_agent_per_day"],
+        dtype=int,
+    )
+    if not config["sparse_model"]:
+        return num_tracks
+
+    slot_ranges = df_agents["slot_ranges"].to_dict()
+    for i, h in enumerate(handles):
+        for d in range(config["num_days"]):
+            capacity = sum(
+                (end - start) // config["min_duration"]
+                for start, end in slot_ranges[h][d]
+            )
+            num_tracks[d, i] = min(num_tracks[d, i], capacity)
+    return num_tracks
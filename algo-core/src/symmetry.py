@@ -0,0 +1,135 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from .metrics import timed
+
+# When config["symmetry_breaking"] is set, equivalent solutions of the
+# intervals formulation are ruled out, so that the solver does not explore
+# them all:
+# - The shift tracks of an agent-day are interchangeable, so active tracks
+#   come first, in order of their start times.
+# - Agents who only differ by their handle are interchangeable, so their
+#   schedules are put in lexicographic order.
+
+# In the model below, the following abbreviations are used:
+# d: day
+# h: Github handle
+# i: position of handle h in agent_categories["veterans"]
+# k: shift track
+
+
+def find_equivalent_agents(df_agents, agent_categories, config):
+    """Group the veterans that are interchangeable in the model.
+
+    Veterans are interchangeable if they have the same availability,
+    weight, ideal shift length, fair share and engineer flag. Mentors, and
+    agents with special agent conditions, are never interchangeable.
+    Returns lists of positions in agent_categories["veterans"], for groups
+    of at least two agents.
+    """
+    special_handles = {
+        agent["handle"]
+        for agents in config["special_agent_conditions"].values()
+        for agent in agents
+    }
+    classes = {}
+    for i, h in enumerate(agent_categories["veterans"]):
+        if h in special_handles or h in agent_categories["mentors"]:
+            continue
+        agent = df_agents.loc[h]
+        key = (
+            tuple(map(tuple, agent["slots"])),
+            agent["weight"],
+            agent["ideal_shift_length"],
+            agent["fair_share"],
+            agent["is_support_engineer"],
+        )
+        classes.setdefault(key, []).append(i)
+    return [positions for positions in classes.values() if len(positions) > 1]
+
+
+def constraint_lexicographic_order(model, xs, ys, name):
+    """Constrain the sequence xs to be lexicographically <= ys."""
+    # is_equal[t]: xs and ys are equal before position t.
+    is_equal = [model.NewConstant(1)] + [
+        model.NewBoolVar(f"{name}_is_equal_{t}") for t in range(1, len(xs))
+    ]
+    for t in range(len(xs)):
+        if t + 1 < len(xs):
+            model.AddImplication(is_equal[t + 1], is_equal[t])
+            model.Add(xs[t] == ys[t]).OnlyEnforceIf(is_equal[t + 1])
+            model.Add(xs[t] < ys[t]).OnlyEnforceIf(
+                [is_equal[t], is_equal[t + 1].Not()]
+            )
+        else:
+            model.Add(xs[t] <= ys[t]).OnlyEnforceIf(is_equal[t])
+    return model
+
+
+@timed
+def constraint_order_shift_tracks(
+    model, var_veterans, agent_categories, config
+):
+    """Order each agent-day's active shift tracks first, by start time."""
+    v_dhk = var_veterans["dhk"]
+    for d in range(config["num_days"]):
+        for i, h in enumerate(agent_categories["veterans"]):
+            for k in range(config["max_shifts_per_agent_per_day"] - 1):
+                if v_dhk["is_agent_on"][d, i, k + 1] is None:
+                    break
+                model.AddImplication(
+                    v_dhk["is_agent_on"][d, i, k + 1],
+                    v_dhk["is_agent_on"][d, i, k],
+                )
+                model.Add(
+                    v_dhk["shift_end"][d, i, k]
+                    <= v_dhk["shift_start"][d, i, k + 1]
+                ).OnlyEnforceIf(v_dhk["is_agent_on"][d, i, k + 1])
+    return model
+
+
+@timed
+def constraint_order_equivalent_agents(
+    model, var_veterans, df_agents, agent_categories, config
+):
+    """Order the schedules of interchangeable veterans lexicographically.
+
+    A schedule is compared by its weekly slots first, and then by the
+    duration and start of each shift.
+    """
+    v_h = var_veterans["h"]
+    v_dhk = var_veterans["dhk"]
+
+    def schedule(i):
+        return [v_h["total_week_slots"][i]] + [
+            x
+            for d in range(config["num_days"])
+            for k in range(config["max_shifts_per_agent_per_day"])
+            for x in [
+                v_dhk["shift_duration"][d, i, k],
+                v_dhk["shift_start"][d, i, k],
+            ]
+            if x is not None
+        ]
+
+    for positions in find_equivalent_agents(
+        df_agents, agent_categories, config
+    ):
+        for i, i_next in zip(positions, positions[1:]):
+            model = constraint_lexicographic_order(
+                model, schedule(i_next), schedule(i), f"lex_{i}_{i_next}"
+            )
+    return model
@@ -0,0 +1,82 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import numpy as np
+
+
+class VarGrid:
+    """Dense store of model variables over a labelled index grid.
+
+    This takes the place of the pandas DataFrames over MultiIndexes that
+    were used previously: every column is a NumPy object array with one
+    axis per index level (e.g. day, slot, handle), so that variables are
+    addressed positionally, e.g. grid["is_agent_on_slot"][d, s_i, i], and
+    whole slices can be taken at once, e.g. all agents on a given day and
+    slot with grid["is_agent_on_slot"][d, s_i, :].
+
+    Labels (handles, slot numbers, ...) are mapped to integer positions
+    once, up front, and can be looked up with pos(); at() offers
+    label-based scalar access for code outside of the hot loops.
+
+    Cells for which no variable is created (e.g. in the sparse model)
+    are left as None; values() skips these.
+    """
+
+    __slots__ = ("axes", "labels", "shape", "columns", "_codes")
+
+    def __init__(self, index, columns):
+        """Set up empty columns, given {axis name: labels} and column names."""
+        self.axes = tuple(index.keys())
+        self.labels = tuple(list(labels) for labels in index.values())
+        self.shape = tuple(len(labels) for labels in self.labels)
+        self._codes = tuple(
+            {label: i for i, label in enumerate(labels)}
+            for labels in self.labels
+        )
+        self.columns = {
+            column: np.full(self.shape, None, dtype=object)
+            for column in columns
+        }
+
+    def __getitem__(self, column):
+        """Return the array of variables for the given column."""
+        return self.columns[column]
+
+    def __len__(self):
+        """Return the number of cells per column."""
+        return int(np.prod(self.shape))
+
+    def pos(self, axis, label):
+        """Return the integer position of a label along the given axis."""
+        return self._codes[self.axes.index(axis)][label]
+
+    def at(self, column, *labels):
+        """Return a single variable, addressed by its labels."""
+        return self.columns[column][
+            tuple(codes[label] for codes, label in zip(self._codes, labels))
+        ]
+
+    def values(self, column, key=()):
+        """Return the (non-empty) variables in a column as a flat list.
+
+        An optional positional key restricts this to part of the grid,
+        e.g. values("shift_duration", np.s_[:, i, :]).
+        """
+        return [
+            x
+            for x in np.asarray(self.columns[column][key]).ravel()
+            if x is not None
+        ]
@@ -0,0 +1,297 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import numpy as np
+
+# Verification of a schedule, independent of the solver: the shifts are
+# converted into an assignment tensor (agents × days × slots), next to the
+# agents' availability as a tensor of the same shape, so that availability
+# violations, each cost term, and the coverage and distribution rules are
+# checked with array operations. The schedule can be an output of the
+# solver, a hand-edited output file (see verify_output.py), or a schedule of
+# the greedy heuristic, whose cost and checks are calculated here too.
+
+# In the code below, the following abbreviations are used:
+# a: agent index
+# d: day
+# h: Github handle
+# s: slot
+
+# Slots per day in the availability tensor (27 hours):
+slots_per_day = 54
+
+
+def find_availability_tensor(df_agents, config):
+    """Return the agents' availability as an agents × days × slots array.
+
+    Days can have fewer slots (e.g. 48 in availableSlots, next to the 54 of
+    availableRanges), and are padded with zeros.
+    """
+    availability = np.zeros(
+        (len(df_agents), config["num_days"], slots_per_day), np.int8
+    )
+    for a, agent_slots in enumerate(df_agents["slots"]):
+        for d, day_slots in enumerate(agent_slots[:config["num_days"]]):
+            availability[a, d, :len(day_slots)] = day_slots
+    return availability
+
+
+def find_shift_arrays(sol_shifts, handles, config):
+    """Convert output shifts into arrays of agent index, day, start and end.
+
+    Shifts of agents that are not in the input, or on dates outside the
+    scheduled days, are returned separately, as (handle, date) pairs.
+    """
+    agent_index = {h: a for a, h in enumerate(handles)}
+    day_index = {
+        day.strftime("%Y-%m-%d"): d for d, day in enumerate(config["days"])
+    }
+    rows = []
+    unknown = []
+    for day_shifts in sol_shifts:
+        d = day_index.get(day_shifts["start_date"])
+        for shift in day_shifts["shifts"]:
+            h = shift["agent"].split(" <")[0]
+            if d is None or h not in agent_index:
+                unknown.append((h, day_shifts["start_date"]))
+                continue
+            rows.append(
+                (agent_index[h], d, int(shift["start"]), int(shift["end"]))
+            )
+    shifts = np.array(rows, np.int64).reshape(-1, 4)
+    return [
+        {
+            "agent": shifts[:, 0],
+            "day": shifts[:, 1],
+            "start": shifts[:, 2],
+            "end": shifts[:, 3],
+        },
+        unknown,
+    ]
+
+
+def find_assignment_tensor(shifts, shape):
+    """Count the shifts of each agent covering each day and slot."""
+    # Mark shift starts and ends, then accumulate along the slots:
+    steps = np.zeros((shape[0], shape[1], shape[2] + 1), np.int64)
+    np.add.at(steps, (shifts["agent"], shifts["day"], shifts["start"]), 1)
+    np.add.at(steps, (shifts["agent"], shifts["day"], shifts["end"]), -1)
+    return np.cumsum(steps, axis=2)[:, :, :-1]
+
+
+def verify_schedule(
+    sol_shifts, coefficients, df_agents, agent_categories, config
+):
+    """Verify a schedule against the input, and calculate its cost.
+
+    Returns a summary with availability violations, overlapping shifts,
+    each cost term, and the checks of hoursCoverage and agentDistribution
+    (which, like the model, only count veterans).
+    """
+    handles = df_agents.index.tolist()
+    availability = find_availability_tensor(df_agents, config)
+    [shifts, unknown] = find_shift_arrays(sol_shifts, handles, config)
+    on_slot = find_assignment_tensor(shifts, availability.shape)
+    is_veteran = np.isin(handles, agent_categories["veterans"])
+    dates = [day.strftime("%Y-%m-%d") for day in config["days"]]
+
+    # Availability, and overlapping shifts of the same agent:
+    is_allowed = np.isin(availability, config["allowed_availabilities"])
+    violations = [
+        {
+            "agent": handles[a],
+            "date": dates[d],
+            "slot": int(s),
+            "availability": int(availability[a, d, s]),
+        }
+        for a, d, s in np.argwhere((on_slot > 0) & ~is_allowed)
+    ]
+    overlaps = [
+        {"agent": handles[a], "date": dates[d], "slot": int(s)}
+        for a, d, s in np.argwhere(on_slot > 1)
+    ]
+
+    # Cost terms, the latter three for veterans only:
+    slot_cost = coefficients["non_preferred"] * int(
+        (on_slot * (availability - 1))[is_allowed].sum()
+    )
+    shift_delta = (shifts["end"] - shifts["start"]) - df_agents[
+        "ideal_shift_length"
+    ].to_numpy()[shifts["agent"]]
+    is_veteran_shift = is_veteran[shifts["agent"]]
+    shift_length_cost = int(
+        coefficients["longer_than_pref"]
+        * np.clip(shift_delta, 0, None)[is_veteran_shift].sum()
+        + coefficients["shorter_than_pref"]
+        * np.clip(-shift_delta, 0, None)[is_veteran_shift].sum()
+    )
+    week_slots = on_slot.sum(axis=(1, 2))
+    fair_share_excess = np.clip(
+        week_slots - df_agents["fair_share"].to_numpy(), 0, None
+    )[is_veteran]
+    fair_share_cost = coefficients["fair_share"] * int(
+        (fair_share_excess**2).sum()
+    )
+    shifts_per_day = np.zeros(availability.shape[:2], np.int64)
+    np.add.at(shifts_per_day, (shifts["agent"], shifts["day"]), 1)
+    multiple_shifts_cost = coefficients["multiple_shifts_per_day"] * int(
+        np.clip(shifts_per_day - 1, 0, None)[is_veteran].sum()
+    )
+
+    # Coverage and distribution of veterans:
+    veterans_on_slot = (on_slot[is_veteran] > 0).sum(axis=0)
+    engineers_on_slot = (
+        on_slot[
+            is_veteran & (df_agents["is_support_engineer"].to_numpy() == 1)
+        ]
+        > 0
+    ).sum(axis=0)
+    coverage = []
+    for h_cover in config["hours_coverage"]:
+        num_slots = int(
+            veterans_on_slot[
+                h_cover["start_day"]:h_cover["end_day"] + 1,
+                config["start_slot"]:config["end_slot"],
+            ].sum()
+        )
+        coverage.append(
+            {
+                "start_day": h_cover["start_day"],
+                "end_day": h_cover["end_day"],
+                "hours": num_slots / 2,
+                "met": bool(
+                    h_cover["min_slots"] <= num_slots <= h_cover["max_slots"]
+                ),
+            }
+        )
+    distribution = []
+    for a_distribution in config["agent_distribution"]:
+        days = np.s_[
+            a_distribution["start_day"]:a_distribution["end_day"] + 1
+        ]
+        slots = np.s_[
+            a_distribution["start_slot"]:a_distribution["end_slot"]
+        ]
+        num_agents = veterans_on_slot[days, slots]
+        is_unmet = (num_agents < a_distribution["min_agents"]) | (
+            num_agents > a_distribution["max_agents"]
+        )
+        if "min_support_engineers" in a_distribution:
+            is_unmet |= (
+                engineers_on_slot[days, slots]
+                < a_distribution["min_support_engineers"]
+            )
+        distribution.append(
+            {
+                "start_day": a_distribution["start_day"],
+                "end_day": a_distribution["end_day"],
+                "start_hour": a_distribution["start_hour"],
+                "end_hour": a_distribution["end_hour"],
+                "unmet_slots": [
+                    {
+                        "date": dates[a_distribution["start_day"] + d],
+                        "slot": int(a_distribution["start_slot"] + s),
+                        "agents": int(num_agents[d, s]),
+                    }
+                    for d, s in np.argwhere(is_unmet)
+                ],
+            }
+        )
+
+    costs = {
+        "slot": slot_cost,
+        "shift_length": shift_length_cost,
+        "fair_share": fair_share_cost,
+        "multiple_shifts": multiple_shifts_cost,
+    }
+    return {
+        "valid": not (violations or overlaps or unknown),
+        "violations": violations,
+        "overlaps": overlaps,
+        "unknown_shifts": [{"agent": h, "date": date} for h, date in unknown],
+        "costs": costs,
+        "total_cost": sum(costs.values()),
+        "coverage": coverage,
+        "distribution": distribution,
+    }
+
+
+def verify_veteran_schedule(
+    schedule, coefficients, df_agents, agent_categories, config
+):
+    """Verify a schedule given as, per day, a list of (handle, start, end).
+
+    This is the format of fetch_veteran_schedule() and of the greedy
+    heuristic. Returns the summary of verify_schedule().
+    """
+    sol_shifts = [
+        {
+            "start_date": day.strftime("%Y-%m-%d"),
+            "shifts": [
+                {"agent": h, "start": start, "end": end}
+                for h, start, end in day_shifts
+            ],
+        }
+        for day, day_shifts in zip(config["days"], schedule)
+    ]
+    return verify_schedule(
+        sol_shifts, coefficients, df_agents, agent_categories, config
+    )
+
+
+def print_summary(summary):
+    """Print a human-readable summary of a verification."""
+    for violation in summary["violations"]:
+        print(
+            f"ERROR: Agent {violation['agent']} was scheduled for slot "
+            f"{violation['slot']} on day {violation['date']}, but is not "
+            "available!"
+        )
+    for overlap in summary["overlaps"]:
+        print(
+            f"ERROR: Agent {overlap['agent']} has overlapping shifts in slot "
+            f"{overlap['slot']} on day {overlap['date']}!"
+        )
+    for shift in summary["unknown_shifts"]:
+        print(
+            f"ERROR: Shift of {shift['agent']} on day {shift['date']} is "
+            "not part of this week's input!"
+        )
+    if summary["valid"]:
+        print("VERIFIED: Agents only scheduled when available.")
+    print(
+        "Cost terms: "
+        + ", ".join(
+            f"{name.replace('_', ' ')} {cost}"
+            for name, cost in summary["costs"].items()
+        )
+        + f" (total {summary['total_cost']})."
+    )
+    for h_cover in summary["coverage"]:
+        if not h_cover["met"]:
+            print(
+                f"WARNING: hoursCoverage of days {h_cover['start_day']}-"
+                f"{h_cover['end_day']} not met ({h_cover['hours']} hours)."
+            )
+    for a_distribution in summary["distribution"]:
+        if a_distribution["unmet_slots"]:
+            print(
+                "WARNING: agentDistribution of days "
+                f"{a_distribution['start_day']}-{a_distribution['end_day']}, "
+                f"{a_distribution['start_hour']}-"
+                f"{a_distribution['end_hour']}h not met in "
+                f"{len(a_distribution['unmet_slots'])} slots."
+            )
@@ -15,61 +15,165 @@ limitations under the License.
 """
 
 from ortools.sat.python import cp_model
-import pandas as pd
+import numpy as np
+
+from .sparsity import find_reachable_slots, find_shift_tracks
+from .symmetry import (
+    constraint_order_equivalent_agents,
+    constraint_order_shift_tracks,
+)
+from .var_grid import VarGrid
+from .metrics import timed
 
 week_working_slots = 80
 
 # In the model below, the following abbreviations are used:
 # d: day
 # h: Github handle
+# i: position of handle h in agent_categories["veterans"]
+# k: shift track
 # s: slot number
+# s_i: position of slot s in range(config["start_slot"], config["end_slot"])
 
 
-def setup_var_dataframes_veterans(agent_categories, config):
-    """Create dataframes that will contain model variables for veterans."""
-    # h:
+def find_max_shift_durations(df_agents, config):
+    """Determine the maximum shift duration (in slots) per agent.
+
+    This is max_duration, unless lowered by agentsMaxHoursShift.
+    """
+    max_duration = {h: config["max_duration"] for h in df_agents.index}
+    for agent in config["special_agent_conditions"].get(
+        "agentsMaxHoursShift", []
+    ):
+        if agent["handle"] in max_duration:
+            max_duration[agent["handle"]] = min(
+                max_duration[agent["handle"]], int(agent["value"] * 2)
+            )
+    return max_duration
+
+
+def get_duration_cost(duration, ideal_shift_length, coefficients):
+    """Calculate the cost of a shift duration deviating from the ideal."""
+    duration_delta = duration - ideal_shift_length
+    if duration_delta < 0:
+        return coefficients["shorter_than_pref"] * -duration_delta
+    return coefficients["longer_than_pref"] * duration_delta
+
+
+def find_prefix_slot_costs(coefficients, day_slots, config):
+    """Sum the costs of an agent-day's support slots, up to each slot.
+
+    Entry s is the cost of the allowed slots before slot s, so that a shift
+    from start to end costs entry end minus entry start.
+    """
+    day_slots = np.asarray(day_slots)
+    slot_costs = np.zeros(max(config["end_slot"], len(day_slots)) + 1, int)
+    for s in range(
+        config["start_slot"], min(config["end_slot"], len(day_slots))
+    ):
+        if day_slots[s] in config["allowed_availabilities"]:
+            slot_costs[s + 1] = coefficients["non_preferred"] * (
+                day_slots[s] - 1
+            )
+    return np.cumsum(slot_costs).tolist()
+
+
+def find_allowed_shift_durations(
+    custom_domains, coefficients, df_agents, config
+):
+    """Determine the durations that each agent's shifts may have.
+
+    Returns {handle: {duration: duration cost}}. Durations range from
+    min_duration to the agent's maximum, and their cost has to fall within
+    the duration_cost domain.
+    """
+    max_duration = find_max_shift_durations(df_agents, config)
+    ideal_shift_length = df_agents["ideal_shift_length"].to_dict()
+    allowed_durations = {}
+    for h in df_agents.index:
+        allowed_durations[h] = {}
+        for duration in range(config["min_duration"], max_duration[h] + 1):
+            cost = get_duration_cost(
+                duration, ideal_shift_length[h], coefficients
+            )
+            if custom_domains["duration_cost"].contains(cost):
+                allowed_durations[h][duration] = cost
+    return allowed_durations
+
+
+def find_weekly_slot_limits(df_agents, agent_categories, config):
+    """Determine the weekly slot limits from agentsMin/MaxHoursWeek.
+
+    The hours given are for a 5-day week, and are prorated to the days
+    that the agent is available. Returns {"min": {handle: slots},
+    "max": {handle: slots}}.
+    """
+    weekly_slot_limits = {"min": {}, "max": {}}
+    for limit, condition in [
+        ("min", "agentsMinHoursWeek"),
+        ("max", "agentsMaxHoursWeek"),
+    ]:
+        for agent in config["special_agent_conditions"].get(condition, []):
+            handle = agent["handle"]
+            slots = int(agent["value"] * 2)
+            if handle in df_agents.index:
+                agent_daily_quota = (
+                    slots / 5
+                )  # slots per week converted to per day
+                agent_weekly_limit = 0
+
+                for d in range(config["num_days"]):
+                    if not (handle in agent_categories["unavailable"][d]):
+                        agent_weekly_limit += agent_daily_quota
+
+                weekly_slot_limits[limit][handle] = round(agent_weekly_limit)
+    return weekly_slot_limits
+
+
+@timed
+def setup_weekly_and_daily_var_grids_veterans(agent_categories, config):
+    """Create the per-agent (h) and per-agent-day (dh) veteran grids."""
+    days = range(config["num_days"])
+    handles = agent_categories["veterans"]
+
     var_veterans = {}
-    col_names = [
-        "more_than_fair_share",
-        "total_week_slots",
-        "total_week_slots_squared",
-        "total_week_slots_cost",
-    ]
-    var_veterans["h"] = pd.DataFrame(
-        data=None,
-        index=agent_categories["veterans"],
-        columns=col_names,
+    # h:
+    var_veterans["h"] = VarGrid(
+        {"handle": handles},
+        [
+            "more_than_fair_share",
+            "total_week_slots",
+            "total_week_slots_squared",
+            "fair_share_overshoot",
+            "total_week_slots_cost",
+        ],
     )
 
     # dh:
-    dh_tuple = []
-    for d in range(config["num_days"]):
-        for h in agent_categories["veterans"]:
-            dh_tuple.append((d, h))
-    dh_multi_index = pd.MultiIndex.from_tuples(
-        dh_tuple,
-        names=("day", "handle"),
+    var_veterans["dh"] = VarGrid(
+        {"day": days, "handle": handles},
+        ["num_shifts", "multiple_shifts_cost", "has_multiple_shifts"],
     )
-    var_veterans["dh"] = pd.DataFrame(
-        data=None,
-        index=dh_multi_index,
-        columns=["num_shifts", "multiple_shifts_cost", "has_multiple_shifts"],
+    return var_veterans
+
+
+@timed
+def setup_var_grids_veterans(agent_categories, config):
+    """Create grids that will contain model variables for veterans."""
+    days = range(config["num_days"])
+    slots = range(config["start_slot"], config["end_slot"])
+    handles = agent_categories["veterans"]
+    tracks = range(config["max_shifts_per_agent_per_day"])
+
+    # h, dh:
+    var_veterans = setup_weekly_and_daily_var_grids_veterans(
+        agent_categories, config
     )
 
     # dhk:
-    dhk_tuple = []
-    for d in range(config["num_days"]):
-        for h in agent_categories["veterans"]:
-            for k in range(config["max_shifts_per_agent_per_day"]):
-                dhk_tuple.append((d, h, k))
-    dhk_multi_index = pd.MultiIndex.from_tuples(
-        dhk_tuple,
-        names=("day", "handle", "shift_track"),
-    )
-    var_veterans["dhk"] = pd.DataFrame(
-        data=None,
-        index=dhk_multi_index,
-        columns=[
+    var_veterans["dhk"] = VarGrid(
+        {"day": days, "handle": handles, "shift_track": tracks},
+        [
             "shift_start",
             "shift_end",
             "shift_duration",
@@ -78,24 +182,16 @@ def setup_var_dataframes_veterans(agent_categories, config):
             "is_duration_shorter_than_ideal",
             "duration_cost",
             "is_in_pref_range",
+            "start_prefix_cost",
+            "end_prefix_cost",
+            "slot_cost",
         ],
     )
-    # dsh:
-    dsh_tuple = []
-
-    for d in range(config["num_days"]):
-        for s in range(config["start_slot"], config["end_slot"]):
-            for h in agent_categories["veterans"]:
-                dsh_tuple.append((d, s, h))
-
-    dsh_multi_index = pd.MultiIndex.from_tuples(
-        dsh_tuple, names=("day", "slot", "handle")
-    )
 
-    var_veterans["dsh"] = pd.DataFrame(
-        data=None,
-        index=dsh_multi_index,
-        columns=[
+    # dsh:
+    var_veterans["dsh"] = VarGrid(
+        {"day": days, "slot": slots, "handle": handles},
+        [
             "is_agent_on_slot",
             "is_agent_on_slot_engineer",
             "slot_cost",
@@ -103,20 +199,9 @@ def setup_var_dataframes_veterans(agent_categories, config):
     )
 
     # dshk:
-    dshk_tuple = []
-    for d in range(config["num_days"]):
-        for s in range(config["start_slot"], config["end_slot"]):
-            for h in agent_categories["veterans"]:
-                for k in range(config["max_shifts_per_agent_per_day"]):
-                    dshk_tuple.append((d, s, h, k))
-    dshk_multi_index = pd.MultiIndex.from_tuples(
-        dshk_tuple,
-        names=("day", "slot", "handle", "shift_track"),
-    )
-    var_veterans["dshk"] = pd.DataFrame(
-        data=None,
-        index=dshk_multi_index,
-        columns=[
+    var_veterans["dshk"] = VarGrid(
+        {"day": days, "slot": slots, "handle": handles, "shift_track": tracks},
+        [
             "interval_covers_slot",
             "is_start_smaller_equal_slot",
             "is_end_greater_than_slot",
@@ -126,410 +211,500 @@ def setup_var_dataframes_veterans(agent_categories, config):
     return var_veterans
 
 
-def fill_var_dataframes_veterans(
-    model,
-    custom_domains,
-    var_veterans,
-    df_agents,
-    agent_categories,
-    config,
+@timed
+def fill_weekly_and_daily_vars_veterans(
+    model, custom_domains, var_veterans, agent_categories, config
 ):
-    """Fill veteran variable dataframes with OR-Tools model variables."""
+    """Fill the per-agent (h) and per-agent-day (dh) veteran variables.
+
+    These are shared by all veteran formulations.
+    """
+    v_h = var_veterans["h"]
+    v_dh = var_veterans["dh"]
+
     # h:
-    for h in var_veterans["h"].index:
-        # more_than_fair_share
-        var_veterans["h"].loc[h, "more_than_fair_share"] = model.NewBoolVar(
-            f"more_than_fair_share_{h}"
-        )
+    for i, h in enumerate(agent_categories["veterans"]):
         # total_week_slots
-        var_veterans["h"].loc[h, "total_week_slots"] = model.NewIntVar(
+        v_h["total_week_slots"][i] = model.NewIntVar(
             0, week_working_slots, f"total_week_slots_{h}"
         )
-        # total_week_slots_squared
-        var_veterans["h"].loc[h, "total_week_slots_squared"] = (
-            model.NewIntVarFromDomain(
+        if config["fair_share_encoding"] == "multiplication":
+            # more_than_fair_share
+            v_h["more_than_fair_share"][i] = model.NewBoolVar(
+                f"more_than_fair_share_{h}"
+            )
+            # total_week_slots_squared
+            v_h["total_week_slots_squared"][i] = model.NewIntVarFromDomain(
                 cp_model.Domain.FromValues(
                     [x**2 for x in range(0, week_working_slots)]
                 ),
                 f"total_week_slots_squared_{h}",
             )
-        )
-        # total_week_slots_cost
-        var_veterans["h"].loc[h, "total_week_slots_cost"] = (
-            model.NewIntVarFromDomain(
-                custom_domains["total_week_slots_cost"],
-                f"total_week_slots_cost_{h}",
+        else:
+            # fair_share_overshoot
+            v_h["fair_share_overshoot"][i] = model.NewIntVar(
+                0, week_working_slots - 1, f"fair_share_overshoot_{h}"
             )
+        # total_week_slots_cost
+        v_h["total_week_slots_cost"][i] = model.NewIntVarFromDomain(
+            custom_domains["total_week_slots_cost"],
+            f"total_week_slots_cost_{h}",
         )
 
     # dh:
     for d in range(config["num_days"]):
-        for h in agent_categories["veterans"]:
+        for i, h in enumerate(agent_categories["veterans"]):
             # num_shifts
-            var_veterans["dh"].loc[(d, h), "num_shifts"] = model.NewIntVar(
+            v_dh["num_shifts"][d, i] = model.NewIntVar(
                 0,
                 config["max_shifts_per_agent_per_day"],
                 f"num_shifts_{d}_{h}",
             )
             # multiple_shifts_cost
-            var_veterans["dh"].loc[(d, h), "multiple_shifts_cost"] = (
-                model.NewIntVarFromDomain(
-                    custom_domains["multiple_shifts_cost"],
-                    f"multiple_shifts_cost_{d}_{h}",
-                )
+            v_dh["multiple_shifts_cost"][d, i] = model.NewIntVarFromDomain(
+                custom_domains["multiple_shifts_cost"],
+                f"multiple_shifts_cost_{d}_{h}",
             )
             # has_multiple_shifts
-            var_veterans["dh"].loc[(d, h), "has_multiple_shifts"] = (
-                model.NewBoolVar(f"has_multiple_shifts_{d}_{h}")
+            v_dh["has_multiple_shifts"][d, i] = model.NewBoolVar(
+                f"has_multiple_shifts_{d}_{h}"
             )
+    return model
+
+
+@timed
+def fill_var_grids_veterans(
+    model,
+    custom_domains,
+    var_veterans,
+    df_agents,
+    agent_categories,
+    config,
+):
+    """Fill veteran variable grids with OR-Tools model variables."""
+    v_dhk = var_veterans["dhk"]
+    v_dsh = var_veterans["dsh"]
+    v_dshk = var_veterans["dshk"]
+    slot_ranges = df_agents["slot_ranges"].to_dict()
+    # In the sparse model, variables are only created where needed:
+    reachable = find_reachable_slots(
+        df_agents, agent_categories["veterans"], config["min_duration"], config
+    )
+    num_tracks = find_shift_tracks(
+        df_agents, agent_categories["veterans"], config
+    )
+
+    # h, dh:
+    model = fill_weekly_and_daily_vars_veterans(
+        model, custom_domains, var_veterans, agent_categories, config
+    )
 
     # dhk:
     print("")
     for d in range(config["num_days"]):
-        for h in agent_categories["veterans"]:
-            for k in range(config["max_shifts_per_agent_per_day"]):
+        for i, h in enumerate(agent_categories["veterans"]):
+            unavailable = h in agent_categories["unavailable"][d]
+            for k in range(num_tracks[d, i]):
                 # shift_start
                 start_dom = (
                     cp_model.Domain.FromValues([12])
-                    if h in agent_categories["unavailable"][d]
-                    else custom_domains["prefs"].loc[(d, h)]
+                    if unavailable
+                    else custom_domains["prefs"][(d, h)]
                 )
-                var_veterans["dhk"].loc[(d, h, k), "shift_start"] = (
-                    model.NewIntVarFromDomain(
-                        start_dom, f"shift_start_{d}_{h}_{k}"
-                    )
+                v_dhk["shift_start"][d, i, k] = model.NewIntVarFromDomain(
+                    start_dom, f"shift_start_{d}_{h}_{k}"
                 )
                 # shift_end
                 end_dom = (
                     cp_model.Domain.FromValues([12])
-                    if h in agent_categories["unavailable"][d]
-                    else custom_domains["prefs"].loc[(d, h)]
+                    if unavailable
+                    else custom_domains["prefs"][(d, h)]
                 )
-                var_veterans["dhk"].loc[(d, h, k), "shift_end"] = (
-                    model.NewIntVarFromDomain(
-                        end_dom, f"shift_end_{d}_{h}_{k}"
-                    )
+                v_dhk["shift_end"][d, i, k] = model.NewIntVarFromDomain(
+                    end_dom, f"shift_end_{d}_{h}_{k}"
                 )
                 # shift_duration
                 dur_domain = (
                     cp_model.Domain.FromValues([0])
-                    if h in agent_categories["unavailable"][d]
+                    if unavailable
                     else custom_domains["duration"]
                 )
-                var_veterans["dhk"].loc[(d, h, k), "shift_duration"] = (
-                    model.NewIntVarFromDomain(
-                        dur_domain, f"shift_duration_{d}_{h}_{k}"
-                    )
+                v_dhk["shift_duration"][d, i, k] = model.NewIntVarFromDomain(
+                    dur_domain, f"shift_duration_{d}_{h}_{k}"
                 )
                 # is_agent_on
-                var_veterans["dhk"].loc[(d, h, k), "is_agent_on"] = (
-                    model.NewBoolVar(f"is_agent_on_{d}_{h}_{k}")
+                v_dhk["is_agent_on"][d, i, k] = model.NewBoolVar(
+                    f"is_agent_on_{d}_{h}_{k}"
                 )
                 # interval
-                var_veterans["dhk"].loc[(d, h, k), "interval"] = (
-                    model.NewIntervalVar(
-                        var_veterans["dhk"].loc[(d, h, k), "shift_start"],
-                        var_veterans["dhk"].loc[(d, h, k), "shift_duration"],
-                        var_veterans["dhk"].loc[(d, h, k), "shift_end"],
-                        f"interval_{d}_{h}_{k}",
-                    )
+                v_dhk["interval"][d, i, k] = model.NewIntervalVar(
+                    v_dhk["shift_start"][d, i, k],
+                    v_dhk["shift_duration"][d, i, k],
+                    v_dhk["shift_end"][d, i, k],
+                    f"interval_{d}_{h}_{k}",
                 )
                 # is_duration_shorter_than_ideal
-                var_veterans["dhk"].loc[
-                    (d, h, k), "is_duration_shorter_than_ideal"
-                ] = model.NewBoolVar(
-                    f"is_duration_shorter_than_ideal_{d}_{h}_{k}"
-                )
-                # duration_cost
-                var_veterans["dhk"].loc[(d, h, k), "duration_cost"] = (
-                    model.NewIntVarFromDomain(
-                        custom_domains["duration_cost"],
-                        f"duration_cost_{d}_{h}_{k}",
+                if config["duration_cost_encoding"] == "reified":
+                    v_dhk["is_duration_shorter_than_ideal"][d, i, k] = (
+                        model.NewBoolVar(
+                            f"is_duration_shorter_than_ideal_{d}_{h}_{k}"
+                        )
                     )
+                # duration_cost
+                v_dhk["duration_cost"][d, i, k] = model.NewIntVarFromDomain(
+                    custom_domains["duration_cost"],
+                    f"duration_cost_{d}_{h}_{k}",
                 )
                 # is_in_pref_range
-                var_veterans["dhk"].loc[(d, h, k), "is_in_pref_range"] = [
+                v_dhk["is_in_pref_range"][d, i, k] = [
                     model.NewBoolVar(f"is_in_pref_range_{d}_{h}_{k}_{j}")
-                    for (j, sec) in enumerate(
-                        df_agents.loc[h, "slot_ranges"][d]
-                    )
+                    for (j, sec) in enumerate(slot_ranges[h][d])
                 ]
+                if config["slot_cost_encoding"] == "prefix_sums":
+                    # start_prefix_cost, end_prefix_cost, slot_cost
+                    for name in [
+                        "start_prefix_cost",
+                        "end_prefix_cost",
+                        "slot_cost",
+                    ]:
+                        v_dhk[name][d, i, k] = model.NewIntVarFromDomain(
+                            custom_domains["shift_slot_cost"],
+                            f"{name}_{d}_{h}_{k}",
+                        )
 
     # dsh:
     for d in range(config["num_days"]):
-        for s in range(config["start_slot"], config["end_slot"]):
-            for h in agent_categories["veterans"]:
+        for s_i, s in enumerate(v_dsh.labels[1]):
+            for i, h in enumerate(agent_categories["veterans"]):
+                if not reachable[d, s_i, i]:
+                    continue
                 # is_agent_on_slot
-                var_veterans["dsh"].loc[(d, s, h), "is_agent_on_slot"] = (
-                    model.NewBoolVar(f"is_agent_on_slot_{d}_{s}_{h}")
+                v_dsh["is_agent_on_slot"][d, s_i, i] = model.NewBoolVar(
+                    f"is_agent_on_slot_{d}_{s}_{h}"
                 )
                 # slot_cost
-                var_veterans["dsh"].loc[(d, s, h), "slot_cost"] = (
-                    model.NewIntVarFromDomain(
+                if config["slot_cost_encoding"] == "per_slot":
+                    v_dsh["slot_cost"][d, s_i, i] = model.NewIntVarFromDomain(
                         custom_domains["slot_cost"],
                         f"slot_cost_{d}_{s}_{h}",
                     )
-                )
                 # is_agent_on_slot_engineer:
-                var_veterans["dsh"].loc[
-                    (d, s, h), "is_agent_on_slot_engineer"
-                ] = model.NewBoolVar(f"is_agent_on_slot_engineer_{d}_{s}_{h}")
+                if config["agent_distribution_encoding"] == "slots":
+                    v_dsh["is_agent_on_slot_engineer"][d, s_i, i] = (
+                        model.NewBoolVar(
+                            f"is_agent_on_slot_engineer_{d}_{s}_{h}"
+                        )
+                    )
 
     # dshk:
     for d in range(config["num_days"]):
-        for s in range(config["start_slot"], config["end_slot"]):
-            for h in agent_categories["veterans"]:
-                for k in range(config["max_shifts_per_agent_per_day"]):
+        for s_i, s in enumerate(v_dshk.labels[1]):
+            for i, h in enumerate(agent_categories["veterans"]):
+                if not reachable[d, s_i, i]:
+                    continue
+                for k in range(num_tracks[d, i]):
                     # is_start_smaller_equal_slot
-                    var_veterans["dshk"].loc[
-                        (d, s, h, k), "is_start_smaller_equal_slot"
-                    ] = model.NewBoolVar(
-                        f"is_start_smaller_equal_slot_{d}_{s}_{h}_{k}"
+                    v_dshk["is_start_smaller_equal_slot"][d, s_i, i, k] = (
+                        model.NewBoolVar(
+                            f"is_start_smaller_equal_slot_{d}_{s}_{h}_{k}"
+                        )
                     )
                     # is_end_greater_than_slot
-                    var_veterans["dshk"].loc[
-                        (d, s, h, k), "is_end_greater_than_slot"
-                    ] = model.NewBoolVar(
-                        f"is_end_greater_than_slot_{d}_{s}_{h}_{k}"
+                    v_dshk["is_end_greater_than_slot"][d, s_i, i, k] = (
+                        model.NewBoolVar(
+                            f"is_end_greater_than_slot_{d}_{s}_{h}_{k}"
+                        )
                     )
                     # interval_covers_slot
-                    var_veterans["dshk"].loc[
-                        (d, s, h, k), "interval_covers_slot"
-                    ] = model.NewBoolVar(
-                        f"interval_covers_slot_{d}_{s}_{h}_{k}"
+                    v_dshk["interval_covers_slot"][d, s_i, i, k] = (
+                        model.NewBoolVar(
+                            f"interval_covers_slot_{d}_{s}_{h}_{k}"
+                        )
                     )
 
     return [model, var_veterans]
 
 
-def define_general_relationships_veterans(
-    model,
-    var_veterans,
-    df_agents,
-    agent_categories,
-    config,
+@timed
+def define_weekly_and_daily_relationships_veterans(
+    model, var_veterans, df_agents, agent_categories, config
 ):
-    """Declare the defining relationships between the model variables."""
+    """Declare the relationships between the h and dh variables.
+
+    How total_week_slots and num_shifts follow from the assigned shifts
+    depends on the formulation, and is declared separately.
+    """
+    v_h = var_veterans["h"]
+    v_dh = var_veterans["dh"]
+    fair_share = df_agents["fair_share"].to_dict()
+
     # h:
-    for h in var_veterans["h"].index:
-        # more_than_fair_share
-        model.Add(
-            var_veterans["h"].loc[h, "total_week_slots"]
-            > df_agents.loc[h, "fair_share"]
-        ).OnlyEnforceIf(var_veterans["h"].loc[h, "more_than_fair_share"])
-        model.Add(
-            var_veterans["h"].loc[h, "total_week_slots"]
-            <= df_agents.loc[h, "fair_share"]
-        ).OnlyEnforceIf(var_veterans["h"].loc[h, "more_than_fair_share"].Not())
-        # total_week_slots
-        model.Add(
-            var_veterans["h"].loc[h, "total_week_slots"]
-            == sum(
-                var_veterans["dhk"]["shift_duration"]
-                .xs(h, axis=0, level="handle")
-                .values.tolist()
+    for i, h in enumerate(agent_categories["veterans"]):
+        if config["fair_share_encoding"] != "multiplication":
+            # fair_share_overshoot
+            model.AddMaxEquality(
+                v_h["fair_share_overshoot"][i],
+                [v_h["total_week_slots"][i] - fair_share[h], 0],
             )
+            continue
+        # more_than_fair_share
+        model.Add(v_h["total_week_slots"][i] > fair_share[h]).OnlyEnforceIf(
+            v_h["more_than_fair_share"][i]
+        )
+        model.Add(v_h["total_week_slots"][i] <= fair_share[h]).OnlyEnforceIf(
+            v_h["more_than_fair_share"][i].Not()
         )
         # total_week_slots_squared
         model.AddMultiplicationEquality(
-            var_veterans["h"].loc[h, "total_week_slots_squared"],
-            [
-                var_veterans["h"].loc[h, "total_week_slots"],
-                var_veterans["h"].loc[h, "total_week_slots"],
-            ],
+            v_h["total_week_slots_squared"][i],
+            [v_h["total_week_slots"][i], v_h["total_week_slots"][i]],
         )
 
     # dh:
     for d in range(config["num_days"]):
-        for h in agent_categories["veterans"]:
-            # num_shifts
-            model.Add(
-                var_veterans["dh"].loc[(d, h), "num_shifts"]
-                == sum(
-                    [
-                        var_veterans["dhk"].loc[(d, h, k), "is_agent_on"]
-                        for k in range(config["max_shifts_per_agent_per_day"])
-                    ]
-                )
-            )
+        for i, h in enumerate(agent_categories["veterans"]):
             # has_multiple_shifts
-            model.Add(
-                var_veterans["dh"].loc[(d, h), "num_shifts"] > 1
-            ).OnlyEnforceIf(
-                var_veterans["dh"].loc[(d, h), "has_multiple_shifts"]
+            model.Add(v_dh["num_shifts"][d, i] > 1).OnlyEnforceIf(
+                v_dh["has_multiple_shifts"][d, i]
+            )
+            model.Add(v_dh["num_shifts"][d, i] <= 1).OnlyEnforceIf(
+                v_dh["has_multiple_shifts"][d, i].Not()
             )
+    return model
+
+
+@timed
+def define_general_relationships_veterans(
+    model,
+    var_veterans,
+    df_agents,
+    agent_categories,
+    config,
+):
+    """Declare the defining relationships between the model variables."""
+    v_h = var_veterans["h"]
+    v_dh = var_veterans["dh"]
+    v_dhk = var_veterans["dhk"]
+    v_dsh = var_veterans["dsh"]
+    v_dshk = var_veterans["dshk"]
+    ideal_shift_length = df_agents["ideal_shift_length"].to_dict()
+    is_support_engineer = df_agents["is_support_engineer"].to_dict()
+
+    # h, dh:
+    model = define_weekly_and_daily_relationships_veterans(
+        model, var_veterans, df_agents, agent_categories, config
+    )
+    # total_week_slots
+    for i, h in enumerate(agent_categories["veterans"]):
+        model.Add(
+            v_h["total_week_slots"][i]
+            == sum(v_dhk.values("shift_duration", np.s_[:, i, :]))
+        )
+    # num_shifts
+    for d in range(config["num_days"]):
+        for i, h in enumerate(agent_categories["veterans"]):
             model.Add(
-                var_veterans["dh"].loc[(d, h), "num_shifts"] <= 1
-            ).OnlyEnforceIf(
-                var_veterans["dh"].loc[(d, h), "has_multiple_shifts"].Not()
+                v_dh["num_shifts"][d, i]
+                == sum(v_dhk.values("is_agent_on", np.s_[d, i, :]))
             )
 
     # dhk:
     for d in range(config["num_days"]):
-        for h in agent_categories["veterans"]:
+        for i, h in enumerate(agent_categories["veterans"]):
             for k in range(config["max_shifts_per_agent_per_day"]):
+                if v_dhk["is_agent_on"][d, i, k] is None:
+                    continue
                 # is_agent_on
-                model.Add(
-                    var_veterans["dhk"].loc[(d, h, k), "shift_duration"] != 0
-                ).OnlyEnforceIf(
-                    var_veterans["dhk"].loc[(d, h, k), "is_agent_on"]
+                model.Add(v_dhk["shift_duration"][d, i, k] != 0).OnlyEnforceIf(
+                    v_dhk["is_agent_on"][d, i, k]
                 )
-                model.Add(
-                    var_veterans["dhk"].loc[(d, h, k), "shift_duration"] == 0
-                ).OnlyEnforceIf(
-                    var_veterans["dhk"].loc[(d, h, k), "is_agent_on"].Not()
+                model.Add(v_dhk["shift_duration"][d, i, k] == 0).OnlyEnforceIf(
+                    v_dhk["is_agent_on"][d, i, k].Not()
                 )
                 # is_duration_shorter_than_ideal
+                if v_dhk["is_duration_shorter_than_ideal"][d, i, k] is None:
+                    continue
                 model.Add(
-                    var_veterans["dhk"].loc[(d, h, k), "shift_duration"]
-                    < df_agents.loc[h, "ideal_shift_length"]
+                    v_dhk["shift_duration"][d, i, k] < ideal_shift_length[h]
                 ).OnlyEnforceIf(
-                    var_veterans["dhk"].loc[
-                        (d, h, k), "is_duration_shorter_than_ideal"
-                    ]
+                    v_dhk["is_duration_shorter_than_ideal"][d, i, k]
                 )
                 model.Add(
-                    var_veterans["dhk"].loc[(d, h, k), "shift_duration"]
-                    >= df_agents.loc[h, "ideal_shift_length"]
+                    v_dhk["shift_duration"][d, i, k] >= ideal_shift_length[h]
                 ).OnlyEnforceIf(
-                    var_veterans["dhk"]
-                    .loc[(d, h, k), "is_duration_shorter_than_ideal"]
-                    .Not()
+                    v_dhk["is_duration_shorter_than_ideal"][d, i, k].Not()
                 )
             # No overlap between any of an agent’s intervals on the same day:
-            model.AddNoOverlap(
-                [
-                    var_veterans["dhk"].loc[(d, h, k), "interval"]
-                    for k in range(config["max_shifts_per_agent_per_day"])
-                ]
-            )
+            model.AddNoOverlap(v_dhk.values("interval", np.s_[d, i, :]))
 
     # dsh:
     for d in range(config["num_days"]):
-        for s in range(config["start_slot"], config["end_slot"]):
-            for h in agent_categories["veterans"]:
+        for s_i, s in enumerate(v_dsh.labels[1]):
+            for i, h in enumerate(agent_categories["veterans"]):
+                if v_dsh["is_agent_on_slot"][d, s_i, i] is None:
+                    continue
+                interval_covers_slot = v_dshk.values(
+                    "interval_covers_slot", np.s_[d, s_i, i, :]
+                )
                 # is_agent_on_slot
-                model.AddBoolOr(
-                    [
-                        var_veterans["dshk"].loc[
-                            (d, s, h, k), "interval_covers_slot"
-                        ]
-                        for k in range(config["max_shifts_per_agent_per_day"])
-                    ]
-                ).OnlyEnforceIf(
-                    var_veterans["dsh"].loc[(d, s, h), "is_agent_on_slot"]
+                model.AddBoolOr(interval_covers_slot).OnlyEnforceIf(
+                    v_dsh["is_agent_on_slot"][d, s_i, i]
                 )
                 model.AddBoolAnd(
-                    [
-                        var_veterans["dshk"]
-                        .loc[(d, s, h, k), "interval_covers_slot"]
-                        .Not()
-                        for k in range(config["max_shifts_per_agent_per_day"])
-                    ]
-                ).OnlyEnforceIf(
-                    var_veterans["dsh"]
-                    .loc[(d, s, h), "is_agent_on_slot"]
-                    .Not()
-                )
+                    [x.Not() for x in interval_covers_slot]
+                ).OnlyEnforceIf(v_dsh["is_agent_on_slot"][d, s_i, i].Not())
                 # is_agent_on_slot_engineer
+                if v_dsh["is_agent_on_slot_engineer"][d, s_i, i] is None:
+                    continue
                 model.Add(
-                    var_veterans["dsh"].loc[
-                        (d, s, h), "is_agent_on_slot_engineer"
-                    ]
-                    == df_agents.loc[h, "is_support_engineer"]
-                    * var_veterans["dsh"].loc[(d, s, h), "is_agent_on_slot"]
+                    v_dsh["is_agent_on_slot_engineer"][d, s_i, i]
+                    == is_support_engineer[h]
+                    * v_dsh["is_agent_on_slot"][d, s_i, i]
                 )
 
     # dshk:
     for d in range(config["num_days"]):
-        for s in range(config["start_slot"], config["end_slot"]):
-            for h in agent_categories["veterans"]:
+        for s_i, s in enumerate(v_dshk.labels[1]):
+            for i, h in enumerate(agent_categories["veterans"]):
                 for k in range(config["max_shifts_per_agent_per_day"]):
+                    if v_dshk["interval_covers_slot"][d, s_i, i, k] is None:
+                        continue
+                    is_start_smaller_equal_slot = v_dshk[
+                        "is_start_smaller_equal_slot"
+                    ][d, s_i, i, k]
+                    is_end_greater_than_slot = v_dshk[
+                        "is_end_greater_than_slot"
+                    ][d, s_i, i, k]
+                    interval_covers_slot = v_dshk["interval_covers_slot"][
+                        d, s_i, i, k
+                    ]
                     # is_start_smaller_equal_slot
                     model.Add(
-                        var_veterans["dhk"].loc[(d, h, k), "shift_start"] <= s
-                    ).OnlyEnforceIf(
-                        var_veterans["dshk"].loc[
-                            (d, s, h, k), "is_start_smaller_equal_slot"
-                        ]
-                    )
-                    model.Add(
-                        var_veterans["dhk"].loc[(d, h, k), "shift_start"] > s
-                    ).OnlyEnforceIf(
-                        var_veterans["dshk"]
-                        .loc[(d, s, h, k), "is_start_smaller_equal_slot"]
-                        .Not()
+                        v_dhk["shift_start"][d, i, k] <= s
+                    ).OnlyEnforceIf(is_start_smaller_equal_slot)
+                    model.Add(v_dhk["shift_start"][d, i, k] > s).OnlyEnforceIf(
+                        is_start_smaller_equal_slot.Not()
                     )
                     # is_end_greater_than_slot
-                    model.Add(
-                        var_veterans["dhk"].loc[(d, h, k), "shift_end"] > s
-                    ).OnlyEnforceIf(
-                        var_veterans["dshk"].loc[
-                            (d, s, h, k), "is_end_greater_than_slot"
-                        ]
+                    model.Add(v_dhk["shift_end"][d, i, k] > s).OnlyEnforceIf(
+                        is_end_greater_than_slot
                     )
-                    model.Add(
-                        var_veterans["dhk"].loc[(d, h, k), "shift_end"] <= s
-                    ).OnlyEnforceIf(
-                        var_veterans["dshk"]
-                        .loc[(d, s, h, k), "is_end_greater_than_slot"]
-                        .Not()
+                    model.Add(v_dhk["shift_end"][d, i, k] <= s).OnlyEnforceIf(
+                        is_end_greater_than_slot.Not()
                     )
                     # interval_covers_slot
                     model.AddBoolAnd(
                         [
-                            var_veterans["dhk"].loc[(d, h, k), "is_agent_on"],
-                            var_veterans["dshk"].loc[
-                                (d, s, h, k), "is_start_smaller_equal_slot"
-                            ],
-                            var_veterans["dshk"].loc[
-                                (d, s, h, k), "is_end_greater_than_slot"
-                            ],
+                            v_dhk["is_agent_on"][d, i, k],
+                            is_start_smaller_equal_slot,
+                            is_end_greater_than_slot,
                         ]
-                    ).OnlyEnforceIf(
-                        var_veterans["dshk"].loc[
-                            (d, s, h, k), "interval_covers_slot"
-                        ]
-                    )
+                    ).OnlyEnforceIf(interval_covers_slot)
                     model.AddBoolOr(
                         [
-                            var_veterans["dhk"]
-                            .loc[(d, h, k), "is_agent_on"]
-                            .Not(),
-                            var_veterans["dshk"]
-                            .loc[(d, s, h, k), "is_start_smaller_equal_slot"]
-                            .Not(),
-                            var_veterans["dshk"]
-                            .loc[(d, s, h, k), "is_end_greater_than_slot"]
-                            .Not(),
+                            v_dhk["is_agent_on"][d, i, k].Not(),
+                            is_start_smaller_equal_slot.Not(),
+                            is_end_greater_than_slot.Not(),
                         ]
-                    ).OnlyEnforceIf(
-                        var_veterans["dshk"]
-                        .loc[(d, s, h, k), "interval_covers_slot"]
-                        .Not()
-                    )
+                    ).OnlyEnforceIf(interval_covers_slot.Not())
     return model
 
 
+@timed
 def constraint_hours_coverage(model, var_veterans, config):
     """Ensure adequate coverage as specified by hoursCoverage."""
     for h_cover in config["hours_coverage"]:
         total_slots = sum(
-            var_veterans["dsh"]
-            .loc[
-                list(range(h_cover["start_day"], h_cover["end_day"] + 1)),
+            var_veterans["dsh"].values(
                 "is_agent_on_slot",
-            ]
-            .values.tolist()
+                np.s_[h_cover["start_day"]:h_cover["end_day"] + 1],
+            )
         )
         model.Add(total_slots >= h_cover["min_slots"])
         model.Add(total_slots <= h_cover["max_slots"])
     return model
 
 
+def find_covered_slots_per_day(
+    model, var_veterans, df_agents, agent_categories, config
+):
+    """Find the number of support slots covered by each day's shifts.
+
+    An agent's shifts on a day do not overlap, so their durations add up to
+    the slots they cover. Shifts may run past end_slot where the agent's
+    availability does, though, so their ends are then clipped to end_slot
+    (shifts never start before start_slot). Returns a linear expression per
+    day.
+    """
+    v_dhk = var_veterans["dhk"]
+    slot_ranges = df_agents["slot_ranges"].to_dict()
+    covered_slots = []
+    for d in range(config["num_days"]):
+        day_terms = []
+        for i, h in enumerate(agent_categories["veterans"]):
+            is_clipped = any(
+                sec[1] > config["end_slot"] for sec in slot_ranges[h][d]
+            )
+            for k in range(config["max_shifts_per_agent_per_day"]):
+                if v_dhk["shift_duration"][d, i, k] is None:
+                    continue
+                if not is_clipped:
+                    day_terms.append(v_dhk["shift_duration"][d, i, k])
+                    continue
+                # Shift start and end, clipped to end_slot:
+                [clipped_start, clipped_end] = [
+                    model.NewIntVar(
+                        0, config["end_slot"], f"{name}_{d}_{h}_{k}"
+                    )
+                    for name in ["clipped_start", "clipped_end"]
+                ]
+                model.AddMinEquality(
+                    clipped_start,
+                    [v_dhk["shift_start"][d, i, k], config["end_slot"]],
+                )
+                model.AddMinEquality(
+                    clipped_end,
+                    [v_dhk["shift_end"][d, i, k], config["end_slot"]],
+                )
+                day_terms.append(clipped_end - clipped_start)
+        covered_slots.append(sum(day_terms))
+    return covered_slots
+
+
+@timed
+def constraint_hours_coverage_durations(
+    model, var_veterans, df_agents, agent_categories, config
+):
+    """Ensure adequate coverage as specified by hoursCoverage.
+
+    The covered slots are found from the shift durations. With the
+    durations_linked encoding, the covered slots of each day are also linked
+    to that day's slot variables, as a redundant constraint.
+    """
+    covered_slots = find_covered_slots_per_day(
+        model, var_veterans, df_agents, agent_categories, config
+    )
+    for h_cover in config["hours_coverage"]:
+        total_slots = sum(
+            covered_slots[h_cover["start_day"]:h_cover["end_day"] + 1]
+        )
+        model.Add(total_slots >= h_cover["min_slots"])
+        model.Add(total_slots <= h_cover["max_slots"])
+    if config["hours_coverage_encoding"] == "durations_linked":
+        for d in range(config["num_days"]):
+            model.Add(
+                covered_slots[d]
+                == sum(
+                    var_veterans["dsh"].values("is_agent_on_slot", np.s_[d])
+                )
+            )
+    return model
+
+
+@timed
 def constraint_agent_distribution(model, var_veterans, config):
     """Ensure the specified agentDistribution is adhered to."""
-    print(var_veterans["dsh"])
+    v_dsh = var_veterans["dsh"]
     for a_distribution in config["agent_distribution"]:
         for d in range(
             a_distribution["start_day"], a_distribution["end_day"] + 1
@@ -537,10 +712,9 @@ def constraint_agent_distribution(model, var_veterans, config):
             for s in range(
                 a_distribution["start_slot"], a_distribution["end_slot"]
             ):
+                s_i = v_dsh.pos("slot", s)
                 num_simultaneous_agents = sum(
-                    var_veterans["dsh"]
-                    .loc[(d, s), "is_agent_on_slot"]
-                    .values.tolist()
+                    v_dsh.values("is_agent_on_slot", np.s_[d, s_i, :])
                 )
                 model.Add(
                     num_simultaneous_agents >= a_distribution["min_agents"]
@@ -552,9 +726,9 @@ def constraint_agent_distribution(model, var_veterans, config):
                 # are specified in agent distributions
                 if "min_support_engineers" in a_distribution:
                     num_simultaneous_engineers = sum(
-                        var_veterans["dsh"]
-                        .loc[(d, s), "is_agent_on_slot_engineer"]
-                        .values.tolist()
+                        v_dsh.values(
+                            "is_agent_on_slot_engineer", np.s_[d, s_i, :]
+                        )
                     )
                     model.Add(
                         num_simultaneous_engineers
@@ -563,6 +737,135 @@ def constraint_agent_distribution(model, var_veterans, config):
     return model
 
 
+def find_slot_requirements(config, num_agents):
+    """Determine agent numbers required per (day, slot) by agentDistribution.
+
+    Returns [min_agents, max_agents, min_engineers], each indexed by day
+    and s_i. Where rules overlap, the strictest one applies.
+    """
+    shape = (config["num_days"], config["end_slot"] - config["start_slot"])
+    min_agents = np.zeros(shape, dtype=int)
+    max_agents = np.full(shape, num_agents, dtype=int)
+    min_engineers = np.zeros(shape, dtype=int)
+    for a_distribution in config["agent_distribution"]:
+        key = np.s_[
+            a_distribution["start_day"]:a_distribution["end_day"] + 1,
+            max(a_distribution["start_slot"] - config["start_slot"], 0):max(
+                a_distribution["end_slot"] - config["start_slot"], 0
+            ),
+        ]
+        min_agents[key] = np.maximum(
+            min_agents[key], a_distribution["min_agents"]
+        )
+        max_agents[key] = np.minimum(
+            max_agents[key], a_distribution["max_agents"]
+        )
+        if "min_support_engineers" in a_distribution:
+            min_engineers[key] = np.maximum(
+                min_engineers[key], a_distribution["min_support_engineers"]
+            )
+    return [min_agents, max_agents, min_engineers]
+
+
+def constraint_capacity_profile(model, intervals, capacities, start, name):
+    """Keep the number of overlapping intervals within a capacity per slot.
+
+    capacities[s_i] is the capacity of slot start + s_i. A cumulative
+    constraint has a single capacity, so slots with less capacity are padded
+    with fixed intervals that use up the difference.
+    """
+    max_capacity = int(max(capacities))
+    if max_capacity >= len(intervals):
+        return model
+    padding = []
+    demands = []
+    s_i = 0
+    while s_i < len(capacities):
+        length = 1
+        while (
+            s_i + length < len(capacities)
+            and capacities[s_i + length] == capacities[s_i]
+        ):
+            length += 1
+        if capacities[s_i] < max_capacity:
+            padding.append(
+                model.NewFixedSizeIntervalVar(
+                    start + s_i, length, f"{name}_padding_{start + s_i}"
+                )
+            )
+            demands.append(max_capacity - int(capacities[s_i]))
+        s_i += length
+    model.AddCumulative(
+        intervals + padding, [1] * len(intervals) + demands, max_capacity
+    )
+    return model
+
+
+@timed
+def constraint_agent_distribution_cumulative(
+    model, var_veterans, df_agents, agent_categories, config
+):
+    """Ensure the specified agentDistribution is adhered to.
+
+    The max_agents bounds are a cumulative constraint on the shift intervals
+    of each day. Support engineers are a second resource: as at least
+    min_support_engineers of the agents on a slot are engineers, at most
+    max_agents - min_support_engineers of them are not. The min_agents and
+    min_support_engineers bounds are kept on the slot variables, where they
+    are not trivial.
+    """
+    v_dhk = var_veterans["dhk"]
+    v_dsh = var_veterans["dsh"]
+    is_support_engineer = df_agents["is_support_engineer"].to_dict()
+    [min_agents, max_agents, min_engineers] = find_slot_requirements(
+        config, len(agent_categories["veterans"])
+    )
+    for d in range(config["num_days"]):
+        # max_agents:
+        model = constraint_capacity_profile(
+            model,
+            v_dhk.values("interval", np.s_[d, :, :]),
+            max_agents[d],
+            config["start_slot"],
+            f"max_agents_{d}",
+        )
+        if min_engineers[d].any():
+            non_engineers = [
+                i
+                for i, h in enumerate(agent_categories["veterans"])
+                if not is_support_engineer[h]
+            ]
+            model = constraint_capacity_profile(
+                model,
+                v_dhk.values("interval", np.s_[d, non_engineers, :]),
+                np.maximum(
+                    max_agents[d] - min_engineers[d],
+                    0,
+                ),
+                config["start_slot"],
+                f"max_non_engineers_{d}",
+            )
+        # min_agents, min_support_engineers:
+        for s_i in range(len(v_dsh.labels[1])):
+            if min_agents[d, s_i] > 0:
+                model.Add(
+                    sum(v_dsh.values("is_agent_on_slot", np.s_[d, s_i, :]))
+                    >= int(min_agents[d, s_i])
+                )
+            if min_engineers[d, s_i] > 0:
+                model.Add(
+                    sum(
+                        v_dsh["is_agent_on_slot"][d, s_i, i]
+                        for i, h in enumerate(agent_categories["veterans"])
+                        if is_support_engineer[h]
+                        and v_dsh["is_agent_on_slot"][d, s_i, i] is not None
+                    )
+                    >= int(min_engineers[d, s_i])
+                )
+    return model
+
+
+@timed
 def constraint_honour_agent_availability_veterans(
     model, var_veterans, df_agents, agent_categories, config
 ):
@@ -570,46 +873,41 @@ def constraint_honour_agent_availability_veterans(
 
     Each shift must start and end within that agent's available hours.
     """
+    v_dhk = var_veterans["dhk"]
+    slot_ranges = df_agents["slot_ranges"].to_dict()
     # Note: AddBoolOr works with just one boolean as well, in which case that
     # boolean has to be true.
     for d in range(config["num_days"]):
-        for h in agent_categories["veterans"]:
+        for i, h in enumerate(agent_categories["veterans"]):
             if not (h in agent_categories["unavailable"][d]):
                 for k in range(config["max_shifts_per_agent_per_day"]):
+                    if v_dhk["is_agent_on"][d, i, k] is None:
+                        continue
                     model.AddBoolOr(
-                        var_veterans["dhk"].loc[(d, h, k), "is_in_pref_range"]
-                    ).OnlyEnforceIf(
-                        var_veterans["dhk"].loc[(d, h, k), "is_agent_on"]
-                    )
-                    for j, sec in enumerate(
-                        df_agents.loc[h, "slot_ranges"][d]
-                    ):
+                        v_dhk["is_in_pref_range"][d, i, k]
+                    ).OnlyEnforceIf(v_dhk["is_agent_on"][d, i, k])
+                    for j, sec in enumerate(slot_ranges[h][d]):
                         if sec[0] < config["end_slot"]:
                             model.Add(
-                                var_veterans["dhk"].loc[
-                                    (d, h, k), "shift_start"
-                                ]
-                                >= sec[0]
+                                v_dhk["shift_start"][d, i, k] >= sec[0]
                             ).OnlyEnforceIf(
-                                var_veterans["dhk"].loc[
-                                    (d, h, k), "is_in_pref_range"
-                                ][j]
+                                v_dhk["is_in_pref_range"][d, i, k][j]
                             )
                             model.Add(
-                                var_veterans["dhk"].loc[(d, h, k), "shift_end"]
-                                <= sec[1]
+                                v_dhk["shift_end"][d, i, k] <= sec[1]
                             ).OnlyEnforceIf(
-                                var_veterans["dhk"].loc[
-                                    (d, h, k), "is_in_pref_range"
-                                ][j]
+                                v_dhk["is_in_pref_range"][d, i, k][j]
                             )
     return model
 
 
+@timed
 def constraint_various_custom_conditions(
     model, var_veterans, df_agents, agent_categories, config
 ):
     """Define custom constraints (usually temporary) as needed."""
+    v_dhk = var_veterans["dhk"]
+
     # Maximum hours per shift
     if "agentsMaxHoursShift" in config["special_agent_conditions"]:
         for agent in config["special_agent_conditions"]["agentsMaxHoursShift"]:
@@ -618,188 +916,243 @@ def constraint_various_custom_conditions(
             for d in range(config["num_days"]):
                 if not (handle in agent_categories["unavailable"][d]):
                     for k in range(config["max_shifts_per_agent_per_day"]):
-                        model.Add(
-                            var_veterans["dhk"].loc[
-                                (d, handle, k), "shift_duration"
-                            ]
-                            <= slots
+                        shift_duration = v_dhk.at(
+                            "shift_duration", d, handle, k
                         )
+                        if shift_duration is not None:
+                            model.Add(shift_duration <= slots)
 
-    # Minimum hours per week
-    if "agentsMinHoursWeek" in config["special_agent_conditions"]:
-        for agent in config["special_agent_conditions"]["agentsMinHoursWeek"]:
-            handle = agent["handle"]
-            slots = int(agent["value"] * 2)
-            if handle in df_agents.index:
-                agent_daily_quota = (
-                    slots / 5
-                )  # slots per week converted to per day
-                agent_weekly_lower_limit = 0
+    model = constraint_weekly_custom_conditions(
+        model, var_veterans, df_agents, agent_categories, config
+    )
+    return model
 
-                for d in range(config["num_days"]):
-                    if not (handle in agent_categories["unavailable"][d]):
-                        agent_weekly_lower_limit += agent_daily_quota
 
-                agent_weekly_lower_limit = round(agent_weekly_lower_limit)
+@timed
+def constraint_weekly_custom_conditions(
+    model, var_veterans, df_agents, agent_categories, config
+):
+    """Define custom constraints on agents' total hours for the week."""
+    v_h = var_veterans["h"]
+    weekly_slot_limits = find_weekly_slot_limits(
+        df_agents, agent_categories, config
+    )
 
-                model.Add(
-                    var_veterans["h"].loc[handle, "total_week_slots"]
-                    >= agent_weekly_lower_limit
-                )
+    # Minimum hours per week
+    for handle, slots in weekly_slot_limits["min"].items():
+        model.Add(v_h.at("total_week_slots", handle) >= slots)
 
     # Maximum hours per week
-    if "agentsMaxHoursWeek" in config["special_agent_conditions"]:
-        for agent in config["special_agent_conditions"]["agentsMaxHoursWeek"]:
-            handle = agent["handle"]
-            slots = int(agent["value"] * 2)
-            if handle in df_agents.index:
-                agent_daily_quota = (
-                    slots / 5
-                )  # slots per week converted to per day
-                agent_weekly_lower_limit = 0
-
-                for d in range(config["num_days"]):
-                    if not (handle in agent_categories["unavailable"][d]):
-                        agent_weekly_lower_limit += agent_daily_quota
-
-                agent_weekly_lower_limit = round(agent_weekly_lower_limit)
-
-                model.Add(
-                    var_veterans["h"].loc[handle, "total_week_slots"]
-                    <= agent_weekly_lower_limit
-                )
+    for handle, slots in weekly_slot_limits["max"].items():
+        model.Add(v_h.at("total_week_slots", handle) <= slots)
     return model
 
 
+@timed
 def cost_total_agent_hours_for_week(
-    model, var_veterans, coefficients, df_agents, agent_categories
+    model, var_veterans, coefficients, df_agents, agent_categories, config
 ):
-    """Define cost associated with total weekly hours per veteran."""
-    for h in agent_categories["veterans"]:
+    """Define cost associated with total weekly hours per veteran.
+
+    The cost is the square of the slots over the fair share. With the
+    element and tangents encodings, the square is looked up in a table,
+    indexed by the overshoot, instead of being a product of variables; the
+    tangents encoding also adds the tangents of the square as linear cuts,
+    for the LP relaxation.
+    """
+    v_h = var_veterans["h"]
+    fair_share = df_agents["fair_share"].to_dict()
+    for i, h in enumerate(agent_categories["veterans"]):
+        if config["fair_share_encoding"] != "multiplication":
+            # As with the domain of total_week_slots_squared, the total
+            # stays below week_working_slots:
+            model.AddElement(
+                v_h["fair_share_overshoot"][i],
+                [
+                    coefficients["fair_share"] * x**2
+                    for x in range(max(week_working_slots - fair_share[h], 1))
+                ],
+                v_h["total_week_slots_cost"][i],
+            )
+            # The tangents at each x, redundant as (overshoot - x)**2 >= 0:
+            if config["fair_share_encoding"] == "tangents":
+                for x in range(1, week_working_slots - fair_share[h]):
+                    model.Add(
+                        v_h["total_week_slots_cost"][i]
+                        >= coefficients["fair_share"]
+                        * (2 * x * v_h["fair_share_overshoot"][i] - x**2)
+                    )
+            continue
         model.Add(
-            var_veterans["h"].loc[h, "total_week_slots_cost"]
+            v_h["total_week_slots_cost"][i]
             == coefficients["fair_share"]
             * (
-                var_veterans["h"].loc[h, "total_week_slots_squared"]
-                - 2
-                * var_veterans["h"].loc[h, "total_week_slots"]
-                * df_agents.loc[h, "fair_share"]
-                + (df_agents.loc[h, "fair_share"]) ** 2
+                v_h["total_week_slots_squared"][i]
+                - 2 * v_h["total_week_slots"][i] * fair_share[h]
+                + (fair_share[h]) ** 2
             )
-        ).OnlyEnforceIf(var_veterans["h"].loc[h, "more_than_fair_share"])
-        model.Add(
-            var_veterans["h"].loc[h, "total_week_slots_cost"] == 0
-        ).OnlyEnforceIf(var_veterans["h"].loc[h, "more_than_fair_share"].Not())
+        ).OnlyEnforceIf(v_h["more_than_fair_share"][i])
+        model.Add(v_h["total_week_slots_cost"][i] == 0).OnlyEnforceIf(
+            v_h["more_than_fair_share"][i].Not()
+        )
     return model
 
 
+@timed
 def cost_shift_duration(
     model, var_veterans, coefficients, df_agents, agent_categories, config
 ):
-    """Define cost associated with the lengths of veterans' assigned shifts."""
+    """Define cost associated with the lengths of veterans' assigned shifts.
+
+    With the element encoding, the cost is looked up in a table of the
+    agent's cost per duration, instead of being defined by whether the
+    shift is shorter or longer than the ideal.
+    """
+    v_dhk = var_veterans["dhk"]
+    ideal_shift_length = df_agents["ideal_shift_length"].to_dict()
     for d in range(config["num_days"]):
-        for h in agent_categories["veterans"]:
+        for i, h in enumerate(agent_categories["veterans"]):
+            # Zero cost for zero duration (which is when the agent is off):
+            duration_costs = [0] + [
+                int(
+                    get_duration_cost(
+                        duration, ideal_shift_length[h], coefficients
+                    )
+                )
+                for duration in range(1, config["max_duration"] + 1)
+            ]
             for k in range(config["max_shifts_per_agent_per_day"]):
+                if v_dhk["is_agent_on"][d, i, k] is None:
+                    continue
+                if config["duration_cost_encoding"] == "element":
+                    model.AddElement(
+                        v_dhk["shift_duration"][d, i, k],
+                        duration_costs,
+                        v_dhk["duration_cost"][d, i, k],
+                    )
+                    continue
                 # Zero cost for zero duration:
-                model.Add(
-                    var_veterans["dhk"].loc[(d, h, k), "duration_cost"] == 0
-                ).OnlyEnforceIf(
-                    var_veterans["dhk"].loc[(d, h, k), "is_agent_on"].Not()
+                model.Add(v_dhk["duration_cost"][d, i, k] == 0).OnlyEnforceIf(
+                    v_dhk["is_agent_on"][d, i, k].Not()
                 )
 
                 # Cost for duration shorter than preference:
                 model.Add(
-                    var_veterans["dhk"].loc[(d, h, k), "duration_cost"]
+                    v_dhk["duration_cost"][d, i, k]
                     == coefficients["shorter_than_pref"]
                     * (
-                        df_agents.loc[h, "ideal_shift_length"]
-                        - var_veterans["dhk"].loc[(d, h, k), "shift_duration"]
+                        ideal_shift_length[h]
+                        - v_dhk["shift_duration"][d, i, k]
                     )
                 ).OnlyEnforceIf(
                     [
-                        var_veterans["dhk"].loc[(d, h, k), "is_agent_on"],
-                        var_veterans["dhk"].loc[
-                            (d, h, k), "is_duration_shorter_than_ideal"
-                        ],
+                        v_dhk["is_agent_on"][d, i, k],
+                        v_dhk["is_duration_shorter_than_ideal"][d, i, k],
                     ]
                 )
 
                 # Cost for duration longer than preference:
                 model.Add(
-                    var_veterans["dhk"].loc[(d, h, k), "duration_cost"]
+                    v_dhk["duration_cost"][d, i, k]
                     == coefficients["longer_than_pref"]
                     * (
-                        var_veterans["dhk"].loc[(d, h, k), "shift_duration"]
-                        - df_agents.loc[h, "ideal_shift_length"]
+                        v_dhk["shift_duration"][d, i, k]
+                        - ideal_shift_length[h]
                     )
                 ).OnlyEnforceIf(
-                    var_veterans["dhk"]
-                    .loc[(d, h, k), "is_duration_shorter_than_ideal"]
-                    .Not()
+                    v_dhk["is_duration_shorter_than_ideal"][d, i, k].Not()
                 )
     return model
 
 
+def constraint_prefix_slot_cost(
+    model, prefix_slot_costs, start, end, start_prefix, end_prefix, slot_cost
+):
+    """Link a shift's slot cost to its start and end, by prefix sums."""
+    model.AddElement(start, prefix_slot_costs, start_prefix)
+    model.AddElement(end, prefix_slot_costs, end_prefix)
+    model.Add(slot_cost == end_prefix - start_prefix)
+    return model
+
+
+@timed
 def cost_hours_veterans(
     model, var_veterans, coefficients, df_agents, agent_categories, config
 ):
-    """Define veterans' cost for assigned hours based on availability."""
+    """Define veterans' cost for assigned hours based on availability.
+
+    With the prefix_sums encoding, the cost of each shift is the difference
+    of the agent-day's prefix sums of slot costs at its end and start,
+    instead of a sum of per-slot costs.
+    """
+    v_dhk = var_veterans["dhk"]
+    v_dsh = var_veterans["dsh"]
+    agent_slots = df_agents["slots"].to_dict()
     for d in range(config["num_days"]):
-        for h in agent_categories["veterans"]:
-            for s_count, s_cost in enumerate(
-                df_agents.loc[h, "slots"][d][
-                    config["start_slot"]:config["end_slot"]
-                ]
+        for i, h in enumerate(agent_categories["veterans"]):
+            if config["slot_cost_encoding"] == "prefix_sums":
+                prefix_slot_costs = find_prefix_slot_costs(
+                    coefficients, agent_slots[h][d], config
+                )
+                for k in range(config["max_shifts_per_agent_per_day"]):
+                    if v_dhk["slot_cost"][d, i, k] is None:
+                        continue
+                    model = constraint_prefix_slot_cost(
+                        model,
+                        prefix_slot_costs,
+                        v_dhk["shift_start"][d, i, k],
+                        v_dhk["shift_end"][d, i, k],
+                        v_dhk["start_prefix_cost"][d, i, k],
+                        v_dhk["end_prefix_cost"][d, i, k],
+                        v_dhk["slot_cost"][d, i, k],
+                    )
+                continue
+            for s_i, s_cost in enumerate(
+                agent_slots[h][d][config["start_slot"]:config["end_slot"]]
             ):
-                s = s_count + config["start_slot"]
+                if v_dsh["slot_cost"][d, s_i, i] is None:
+                    continue
                 # For "preferred", (s_cost - 1) = 0, so no hourly cost.
                 # For "non_preferred", (s_cost - 1) = 1. If 3-slots included,
                 # then (s_cost - 1) = 2.
                 model.Add(
-                    var_veterans["dsh"].loc[(d, s, h), "slot_cost"]
+                    v_dsh["slot_cost"][d, s_i, i]
                     == coefficients["non_preferred"] * (s_cost - 1)
-                ).OnlyEnforceIf(
-                    var_veterans["dsh"].loc[(d, s, h), "is_agent_on_slot"]
-                )
+                ).OnlyEnforceIf(v_dsh["is_agent_on_slot"][d, s_i, i])
 
-                model.Add(
-                    var_veterans["dsh"].loc[(d, s, h), "slot_cost"] == 0
-                ).OnlyEnforceIf(
-                    var_veterans["dsh"]
-                    .loc[(d, s, h), "is_agent_on_slot"]
-                    .Not()
+                model.Add(v_dsh["slot_cost"][d, s_i, i] == 0).OnlyEnforceIf(
+                    v_dsh["is_agent_on_slot"][d, s_i, i].Not()
                 )
     return model
 
 
+@timed
 def cost_multiple_shifts_per_day(
     model, var_veterans, coefficients, agent_categories, config
 ):
     """Define cost for assigning any given agent multiple shifts per day."""
+    v_dh = var_veterans["dh"]
     for d in range(config["num_days"]):
-        for h in agent_categories["veterans"]:
+        for i, h in enumerate(agent_categories["veterans"]):
             model.Add(
-                var_veterans["dh"].loc[(d, h), "multiple_shifts_cost"]
+                v_dh["multiple_shifts_cost"][d, i]
                 == coefficients["multiple_shifts_per_day"]
-                * (var_veterans["dh"].loc[(d, h), "num_shifts"] - 1)
-            ).OnlyEnforceIf(
-                var_veterans["dh"].loc[(d, h), "has_multiple_shifts"]
-            )
-            model.Add(
-                var_veterans["dh"].loc[(d, h), "multiple_shifts_cost"] == 0
-            ).OnlyEnforceIf(
-                var_veterans["dh"].loc[(d, h), "has_multiple_shifts"].Not()
+                * (v_dh["num_shifts"][d, i] - 1)
+            ).OnlyEnforceIf(v_dh["has_multiple_shifts"][d, i])
+            model.Add(v_dh["multiple_shifts_cost"][d, i] == 0).OnlyEnforceIf(
+                v_dh["has_multiple_shifts"][d, i].Not()
             )
     return model
 
 
+@timed
 def setup_model_veterans(
     model, custom_domains, coefficients, df_agents, agent_categories, config
 ):
     """Set up all model variables and constraints for veteran agents."""
     # Configure model variables and constraints:
-    var_veterans = setup_var_dataframes_veterans(agent_categories, config)
-    [model, var_veterans] = fill_var_dataframes_veterans(
+    var_veterans = setup_var_grids_veterans(agent_categories, config)
+    [model, var_veterans] = fill_var_grids_veterans(
         model,
         custom_domains,
         var_veterans,
@@ -814,17 +1167,34 @@ def setup_model_veterans(
         agent_categories,
         config,
     )
-    model = constraint_hours_coverage(model, var_veterans, config)
-    model = constraint_agent_distribution(model, var_veterans, config)
+    if config["hours_coverage_encoding"] == "slots":
+        model = constraint_hours_coverage(model, var_veterans, config)
+    else:
+        model = constraint_hours_coverage_durations(
+            model, var_veterans, df_agents, agent_categories, config
+        )
+    if config["agent_distribution_encoding"] == "cumulative":
+        model = constraint_agent_distribution_cumulative(
+            model, var_veterans, df_agents, agent_categories, config
+        )
+    else:
+        model = constraint_agent_distribution(model, var_veterans, config)
     model = constraint_honour_agent_availability_veterans(
         model, var_veterans, df_agents, agent_categories, config
     )
     model = constraint_various_custom_conditions(
         model, var_veterans, df_agents, agent_categories, config
     )
+    if config["symmetry_breaking"]:
+        model = constraint_order_shift_tracks(
+            model, var_veterans, agent_categories, config
+        )
+        model = constraint_order_equivalent_agents(
+            model, var_veterans, df_agents, agent_categories, config
+        )
     # Configure cost:
     model = cost_total_agent_hours_for_week(
-        model, var_veterans, coefficients, df_agents, agent_categories
+        model, var_veterans, coefficients, df_agents, agent_categories, config
     )
     model = cost_shift_duration(
         model,
@@ -848,9 +1218,10 @@ def setup_model_veterans(
 
     # Add together resulting cost terms:
     full_cost_list = (
-        var_veterans["h"]["total_week_slots_cost"].values.tolist()
-        + var_veterans["dhk"]["duration_cost"].values.tolist()
-        + var_veterans["dsh"]["slot_cost"].values.tolist()
-        + var_veterans["dh"]["multiple_shifts_cost"].values.tolist()
+        var_veterans["h"].values("total_week_slots_cost")
+        + var_veterans["dhk"].values("duration_cost")
+        + var_veterans["dsh"].values("slot_cost")
+        + var_veterans["dhk"].values("slot_cost")
+        + var_veterans["dh"].values("multiple_shifts_cost")
     )
     return [model, var_veterans, full_cost_list]
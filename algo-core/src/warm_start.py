@@ -0,0 +1,125 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import datetime
+
+from .custom_var_domains import define_custom_var_domains
+from .veterans import find_allowed_shift_durations
+from .metrics import timed
+
+# Warm start: the shifts of previous scheduler outputs (e.g. last week's, or
+# a partial manual schedule) are mapped by handle and weekday onto the days
+# of the current run, to be used as solution hints. Agent-days that can't be
+# scheduled as before are dropped; any further repair is left to the solver.
+
+# In the code below, the following abbreviations are used:
+# d: day
+# h: Github handle
+
+
+def read_previous_shifts(previous_outputs):
+    """Collect the shifts of previous outputs by (weekday, handle).
+
+    Later outputs override the agent-days that they contain shifts for, so
+    that e.g. a partial manual schedule can be given after last week's
+    output. Returns [previous_shifts, weekdays, handles], where weekdays and
+    handles are those covered by the outputs.
+    """
+    previous_shifts = {}
+    weekdays = set()
+    handles = set()
+    for sol_shifts in previous_outputs:
+        output_shifts = {}
+        for day_shifts in sol_shifts:
+            weekday = datetime.date.fromisoformat(
+                day_shifts["start_date"]
+            ).weekday()
+            weekdays.add(weekday)
+            for shift in day_shifts["shifts"]:
+                h = shift["agent"].split(" <")[0]
+                output_shifts.setdefault((weekday, h), []).append(
+                    (int(shift["start"]), int(shift["end"]))
+                )
+                handles.add(h)
+        previous_shifts.update(output_shifts)
+    return [previous_shifts, weekdays, handles]
+
+
+def is_day_schedulable(shifts, allowed_durations, slot_ranges, config):
+    """Check that an agent can still work a day's shifts.
+
+    Each shift has to have an allowed duration and lie within one of the
+    agent's available ranges, and shifts may neither overlap nor touch.
+    """
+    if len(shifts) > config["max_shifts_per_agent_per_day"]:
+        return False
+    for j, (start, end) in enumerate(shifts):
+        if end - start not in allowed_durations:
+            return False
+        if not any(
+            range_start <= start and end <= range_end
+            for range_start, range_end in slot_ranges
+        ):
+            return False
+        if j > 0 and shifts[j - 1][1] >= start:
+            return False
+    return True
+
+
+@timed
+def find_warm_start_shifts(
+    previous_outputs, coefficients, df_agents, agent_categories, config
+):
+    """Map the shifts of previous outputs onto the veterans' agent-days.
+
+    Returns {(day, handle): [(start, end), ...]}, for the veterans and
+    weekdays found in the previous outputs.
+    """
+    [previous_shifts, weekdays, handles] = read_previous_shifts(
+        previous_outputs
+    )
+    custom_domains = define_custom_var_domains(coefficients, df_agents, config)
+    allowed_durations = find_allowed_shift_durations(
+        custom_domains, coefficients, df_agents, config
+    )
+    slot_ranges = df_agents["slot_ranges"].to_dict()
+    veterans = set(agent_categories["veterans"])
+    agent_day_shifts = {}
+    num_accepted = 0
+    num_unavailable = 0
+    num_not_veteran = 0
+    for d in range(config["num_days"]):
+        weekday = config["days"][d].weekday()
+        if weekday not in weekdays:
+            continue
+        for h in sorted(handles):
+            shifts = sorted(previous_shifts.get((weekday, h), []))
+            if h not in veterans:
+                num_not_veteran += len(shifts)
+            elif is_day_schedulable(
+                shifts, allowed_durations[h], slot_ranges[h][d], config
+            ):
+                agent_day_shifts[(d, h)] = shifts
+                num_accepted += len(shifts)
+            else:
+                num_unavailable += len(shifts)
+
+    print(
+        f"\nWarm start: accepted {num_accepted} previous shifts, dropped "
+        f"{num_unavailable} outside current availability and "
+        f"{num_not_veteran} of agents who are not veterans in this run."
+    )
+    return agent_day_shifts
@@ -0,0 +1,88 @@
+"""
+Copyright 2019-2025 Balena Ltd.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import argparse
+import contextlib
+import json
+import sys
+from pathlib import Path
+
+from src.read_input import (
+    filename_output,
+    read_json_input,
+    read_onboarding_files,
+    validate_json,
+)
+from src.process_input import process_input_data
+from src.solve_model import coefficients
+from src.verify import print_summary, verify_schedule
+
+
+def main():
+    """Verify a (possibly hand-edited) scheduler output against its input."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-i", "--input", help="Scheduler input JSON file path", required=True
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Scheduler output JSON file path (default: the output in the "
+        "folder of the input)",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the verification summary as JSON",
+    )
+    args = parser.parse_args()
+    input_path = Path(args.input.strip())
+    output_path = Path(args.output or input_path.parent / filename_output)
+
+    # Progress of reading the input goes to stderr, to keep stdout for the
+    # summary:
+    with contextlib.redirect_stdout(sys.stderr):
+        [input_json, _] = read_json_input(input_path)
+        [sr_onboarding, sr_mentors] = read_onboarding_files(input_path.parent)
+        [df_agents, agent_categories, config] = process_input_data(
+            input_json, sr_onboarding, sr_mentors
+        )
+        sol_shifts = json.load(open(output_path))
+        validate_json(
+            sol_shifts,
+            "support-shift-scheduler-output.schema.json",
+            "Output JSON",
+        )
+
+    summary = verify_schedule(
+        sol_shifts, coefficients, df_agents, agent_categories, config
+    )
+    if args.json:
+        print(json.dumps(summary, indent=4))
+    else:
+        print_summary(summary)
+    is_covered = all(h_cover["met"] for h_cover in summary["coverage"]) and (
+        not any(
+            a_distribution["unmet_slots"]
+            for a_distribution in summary["distribution"]
+        )
+    )
+    if not (summary["valid"] and is_covered):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
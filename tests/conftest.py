@@ -0,0 +1,8 @@
+"""Shared pytest configuration: make the core algorithm importable."""
+
+import sys
+from pathlib import Path
+
+# The core algorithm is run as a directory (python algo-core), so make its
+# src package importable for the tests:
+sys.path.insert(0, str(Path(__file__).parent.parent / "algo-core"))
@@ -0,0 +1,114 @@
+import contextlib
+import io
+
+from ortools.sat.python import cp_model
+
+from benchmarks.synthetic import empty_handle_series, generate_input
+from src.automaton import build_shift_automaton
+from src.process_input import process_input_data
+from src.solve_model import setup_model
+
+
+def find_all_labels(num_slots, duration_costs, max_shifts):
+    """Enumerate the slot sequences (and their labels) that are accepted."""
+    model = cp_model.CpModel()
+    is_on = [model.NewBoolVar(f"is_on_{s}") for s in range(num_slots)]
+    is_end = [model.NewBoolVar(f"is_end_{s}") for s in range(num_slots)]
+    cost = [model.NewIntVar(0, 10, f"cost_{s}") for s in range(num_slots)]
+    labels = [is_on[0]]
+    for s in range(num_slots):
+        labels += [
+            is_on[s + 1] if s + 1 < num_slots else 0,
+            is_end[s],
+            cost[s],
+        ]
+    model.AddAutomaton(
+        labels, *build_shift_automaton(duration_costs, max_shifts)
+    )
+
+    solver = cp_model.CpSolver()
+    solver.parameters.enumerate_all_solutions = True
+    solutions = []
+
+    class Collector(cp_model.CpSolverSolutionCallback):
+        def on_solution_callback(self):
+            solutions.append(
+                (
+                    "".join(str(self.Value(x)) for x in is_on),
+                    "".join(str(self.Value(x)) for x in is_end),
+                    sum(self.Value(x) for x in cost),
+                )
+            )
+
+    solver.Solve(model, Collector())
+    return sorted(solutions)
+
+
+def test_automaton_accepts_runs_of_allowed_length():
+    """Runs of 2 or 3 slots, at most two per day, with their costs."""
+    solutions = find_all_labels(6, {2: 4, 3: 1}, 2)
+    assert ("000000", "000000", 0) in solutions
+    assert ("011100", "000100", 1) in solutions
+    assert ("110011", "010001", 8) in solutions
+    # Runs that are too short are rejected:
+    assert not [x for x in solutions if x[0] == "010000"]
+    # A run that is too long for one shift is rejected with one shift per
+    # day:
+    solutions = find_all_labels(6, {2: 4, 3: 1}, 1)
+    assert not [x for x in solutions if x[0] == "111100"]
+
+
+def test_automaton_limits_number_of_shifts():
+    """With one shift per day, two separate runs are rejected."""
+    solutions = find_all_labels(6, {2: 0}, 1)
+    assert [x[0] for x in solutions] == [
+        "000000",
+        "000011",
+        "000110",
+        "001100",
+        "011000",
+        "110000",
+    ]
+
+
+def test_automaton_accepts_back_to_back_shifts():
+    """A shift can start right after the previous one, as with intervals."""
+    solutions = find_all_labels(6, {2: 4, 3: 1}, 2)
+    assert ("111100", "010100", 8) in solutions
+    # A run can be split in several ways, which the solver chooses from:
+    assert [x for x in solutions if x[0] == "111110"] == [
+        ("111110", "001010", 5),
+        ("111110", "010010", 5),
+    ]
+
+
+def find_long_run_optimum(formulation):
+    """Solve a day on which an agent is on for longer than one shift."""
+    input_json = generate_input(
+        num_agents=4, num_days=1, max_shifts_per_agent_per_day=2, seed=1
+    )
+    input_json["options"]["veteranFormulation"] = formulation
+    input_json["agents"][0]["availableSlots"][0] = (
+        [0] * 16 + [1] * 36 + [0] * 2
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        [df_agents, agent_categories, config] = process_input_data(
+            input_json, empty_handle_series(), empty_handle_series()
+        )
+        [model, var_veterans, _, full_cost_list] = setup_model(
+            df_agents, agent_categories, config
+        )
+    # 18 slots in a row, more than the longest shift of 16 slots:
+    for s_i in range(4, 22):
+        model.Add(var_veterans["dsh"]["is_agent_on_slot"][0, s_i, 0] == 1)
+    model.Minimize(sum(full_cost_list))
+    solver = cp_model.CpSolver()
+    assert solver.Solve(model) == cp_model.OPTIMAL
+    return solver.ObjectiveValue()
+
+
+def test_back_to_back_shifts_match_intervals():
+    """Both formulations cover a long run with back-to-back shifts."""
+    assert find_long_run_optimum("automaton") == find_long_run_optimum(
+        "intervals"
+    )
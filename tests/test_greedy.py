@@ -0,0 +1,43 @@
+import contextlib
+import io
+
+import numpy as np
+
+from benchmarks.synthetic import empty_handle_series, generate_input
+from src.custom_var_domains import define_custom_var_domains
+from src.greedy import (
+    construct_greedy_schedule,
+    find_run_lengths,
+    find_schedule_violations,
+)
+from src.process_input import process_input_data
+from src.solve_model import coefficients
+
+
+def test_run_lengths_count_along_last_axis():
+    """Each entry counts the set entries from there up to the next gap."""
+    is_set = np.array([[1, 1, 0, 1], [0, 1, 1, 1]], bool)
+    assert find_run_lengths(is_set).tolist() == [[2, 1, 0, 1], [0, 3, 2, 1]]
+
+
+def test_greedy_schedule_is_feasible():
+    """The greedy schedule meets all hard constraints of a synthetic week."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        [df_agents, agent_categories, config] = process_input_data(
+            generate_input(num_agents=20, seed=0),
+            empty_handle_series(),
+            empty_handle_series(),
+        )
+    custom_domains = define_custom_var_domains(coefficients, df_agents, config)
+    schedule = construct_greedy_schedule(
+        custom_domains, coefficients, df_agents, agent_categories, config
+    )
+    assert len(schedule) == config["num_days"]
+    assert not find_schedule_violations(
+        schedule,
+        custom_domains,
+        coefficients,
+        df_agents,
+        agent_categories,
+        config,
+    )
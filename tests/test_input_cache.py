@@ -0,0 +1,40 @@
+import json
+
+import numpy as np
+
+from benchmarks.synthetic import generate_input
+from src.read_input import read_json_input
+
+
+def test_input_cache(tmp_path):
+    """Cached inputs match the JSON, and changed inputs are revalidated."""
+    input_json = generate_input(num_agents=10, seed=2)
+    # A day with fewer slots:
+    input_json["agents"][0]["availableSlots"][1] = [0] * 48
+    input_path = tmp_path / "support-shift-scheduler-input.json"
+    json.dump(input_json, open(input_path, "w"), indent=2)
+
+    [_, is_cached] = read_json_input(input_path)
+    assert not is_cached
+    [cached_json, is_cached] = read_json_input(input_path)
+    assert is_cached
+    assert cached_json["options"] == input_json["options"]
+    for cached_agent, agent in zip(
+        cached_json["agents"], input_json["agents"]
+    ):
+        assert {
+            **cached_agent,
+            "availableSlots": [
+                np.asarray(day_slots).tolist()
+                for day_slots in cached_agent["availableSlots"]
+            ],
+        } == agent
+    [_, is_cached] = read_json_input(input_path, revalidate=True)
+    assert not is_cached
+
+    # The cache of the previous input is replaced:
+    input_json["options"]["optimizationTimeout"] = 0.5
+    json.dump(input_json, open(input_path, "w"), indent=2)
+    [_, is_cached] = read_json_input(input_path)
+    assert not is_cached
+    assert len(list(tmp_path.glob("*.npy"))) == 1
@@ -0,0 +1,136 @@
+import contextlib
+import io
+import random
+import time
+
+import numpy as np
+import pandas as pd
+from ortools.sat.python import cp_model
+
+from benchmarks.synthetic import empty_handle_series, generate_input
+from src.lns import (
+    choose_neighbourhood,
+    find_is_on,
+    run_lns,
+    setup_initial_solver,
+    solve_fixed,
+)
+from src.process_input import process_input_data
+from src.solve_model import setup_model
+from src.solver_profiles import get_solver_parameters
+
+
+def test_only_free_cells_change():
+    """Cells outside the neighbourhood keep their incumbent occupancy."""
+    model = cp_model.CpModel()
+    x = [model.NewBoolVar(f"x_{j}") for j in range(4)]
+    model.AddAtMostOne(x[2], x[3])
+    model.Maximize(sum(x))
+    # Cell (0, 0, 1) can be covered by either of two patterns:
+    slot_occupancy = {(0, 0, 0): [0], (0, 1, 0): [1], (0, 0, 1): [2, 3]}
+    is_on = np.array([[[0, 1], [0, 0]]], np.int8)
+    free = np.zeros(is_on.shape, bool)
+    free[0, 1, 0] = True
+    [solver, status] = solve_fixed(
+        model, slot_occupancy, [0, 0, 1, 0], is_on, free, 10, 1, 0
+    )
+    assert status == cp_model.OPTIMAL
+    solution = list(solver.ResponseProto().solution)
+    assert solution[:2] == [0, 1]
+    assert solution[2] + solution[3] == 1
+    assert find_is_on(solution, slot_occupancy, is_on.shape).tolist() == [
+        [[0, 1], [1, 0]]
+    ]
+    # The original model is left unchanged:
+    assert len(model.Proto().constraints) == 1
+
+
+def test_neighbourhoods_free_the_expected_cells():
+    """Day and fair-share neighbourhoods free whole days and agents."""
+    is_on = np.zeros((3, 4, 10), np.int8)
+    is_on[:, :, 0] = 1
+    df_agents = pd.DataFrame(
+        {"fair_share": [4] * 10}, index=[f"@a{i}" for i in range(10)]
+    )
+    agent_categories = {"veterans": list(df_agents.index)}
+    rng = random.Random(0)
+    free = choose_neighbourhood("day", is_on, rng, df_agents, agent_categories)
+    assert free.sum(axis=(1, 2)).tolist().count(40) == 1
+    free = choose_neighbourhood(
+        "fair_share", is_on, rng, df_agents, agent_categories
+    )
+    # The agent furthest above the fair share is freed, with one below it:
+    assert free[:, :, 0].all()
+    assert free.all(axis=(0, 1)).sum() == 2
+
+
+def setup_lns_model(**options):
+    """Set up the model of a small synthetic day, with its objective."""
+    input_json = generate_input(num_agents=4, num_days=1, seed=1)
+    input_json["options"].update(optimizationTimeout=1, **options)
+    with contextlib.redirect_stdout(io.StringIO()):
+        [df_agents, agent_categories, config] = process_input_data(
+            input_json, empty_handle_series(), empty_handle_series()
+        )
+        [model, var_veterans, _, full_cost_list] = setup_model(
+            df_agents, agent_categories, config
+        )
+    model.Minimize(sum(full_cost_list))
+    return [
+        model,
+        var_veterans,
+        full_cost_list,
+        df_agents,
+        agent_categories,
+        config,
+    ]
+
+
+def test_infeasible_model_stops_at_once():
+    """LNS gives up on a model without solutions, instead of retrying."""
+    [model, var_veterans, full_cost_list, *data] = setup_lns_model()
+    model.Add(sum(full_cost_list) < 0)
+    start = time.perf_counter()
+    [_, status, progress] = run_lns(model, var_veterans, *data)
+    assert status == cp_model.INFEASIBLE
+    assert progress == []
+    assert time.perf_counter() - start < 60
+
+
+def test_stall_timeout_stops_search():
+    """LNS stops after the initial solution when the stall timeout is 0."""
+    [model, var_veterans, _, *data] = setup_lns_model(stallTimeout=0)
+    start = time.perf_counter()
+    [_, status, progress] = run_lns(model, var_veterans, *data)
+    assert status == cp_model.FEASIBLE
+    assert len(progress) == 1
+    assert time.perf_counter() - start < 60
+
+
+def test_initial_solve_uses_solver_profile():
+    """The initial solve has the profile's parameters, and the seed."""
+    [*_, config] = setup_lns_model(solverProfile="fast-preview", randomSeed=7)
+    solver = setup_initial_solver(get_solver_parameters(config), config)
+    assert solver.parameters.random_seed == 7
+    assert solver.parameters.linearization_level == 0
+    assert solver.parameters.relative_gap_limit == 0.05
+    assert solver.parameters.stop_after_first_solution
+
+
+def test_objective_cutoff_is_honoured():
+    """LNS only finds solutions up to the profile's objective cutoff."""
+    [model, *_] = setup_lns_model()
+    solver = cp_model.CpSolver()
+    assert solver.Solve(model) == cp_model.OPTIMAL
+    optimum = solver.ObjectiveValue()
+    [model, var_veterans, _, *data] = setup_lns_model(
+        objectiveCutoff=optimum, stallTimeout=0
+    )
+    [solver, status, _] = run_lns(model, var_veterans, *data)
+    assert status in [cp_model.OPTIMAL, cp_model.FEASIBLE]
+    assert solver.ObjectiveValue() == optimum
+    [model, var_veterans, _, *data] = setup_lns_model(
+        objectiveCutoff=optimum - 1
+    )
+    [_, status, _] = run_lns(model, var_veterans, *data)
+    assert status == cp_model.INFEASIBLE
@@ -0,0 +1,20 @@
+from src.metrics import get_metrics, phase, timed
+
+
+@timed
+def build_step():
+    """A function timed as a phase."""
+    return 1
+
+
+def test_phases_nest_and_aggregate():
+    """Nested phases form a tree; repeated phases are aggregated."""
+    with phase("test_outer"):
+        for _ in range(3):
+            assert build_step() == 1
+    [outer] = [p for p in get_metrics()["phases"] if p["name"] == "test_outer"]
+    assert outer["calls"] == 1
+    [inner] = outer["phases"]
+    assert inner["name"] == "build_step"
+    assert inner["calls"] == 3
+    assert 0 <= inner["seconds"] <= outer["seconds"]
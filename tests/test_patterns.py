@@ -0,0 +1,48 @@
+import pandas as pd
+from ortools.sat.python import cp_model
+
+from src.patterns import enumerate_shift_patterns
+from src.solve_model import coefficients
+
+config = {
+    "num_days": 1,
+    "end_slot": 24,
+    "min_duration": 2,
+    "max_duration": 4,
+    "allowed_availabilities": [1, 2],
+    "special_agent_conditions": {
+        "agentsMaxHoursShift": [{"handle": "@b", "value": 1}]
+    },
+}
+
+df_agents = pd.DataFrame(
+    {
+        "slots": [
+            # Preferred from 16 to 20, with a 3-slot at 18:
+            [{16: 1, 17: 1, 18: 3, 19: 1}],
+            [{20: 2, 21: 1, 22: 1, 23: 1}],
+        ],
+        "slot_ranges": [[[[16, 20]]], [[[20, 26]]]],
+        "ideal_shift_length": [2, 2],
+    },
+    index=["@a", "@b"],
+)
+
+agent_categories = {"veterans": ["@a", "@b"], "unavailable": [[]]}
+
+custom_domains = {
+    "duration_cost": cp_model.Domain.FromValues([0, 2, 4]),
+}
+
+
+def test_patterns_respect_availability_and_durations():
+    """Shifts avoid disallowed slots, support end and duration limits."""
+    patterns = enumerate_shift_patterns(
+        custom_domains, coefficients, df_agents, agent_categories, config
+    )
+    assert patterns == [
+        (0, "@a", 16, 18),
+        (0, "@b", 20, 22),
+        (0, "@b", 21, 23),
+        (0, "@b", 22, 24),
+    ]
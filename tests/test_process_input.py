@@ -0,0 +1,91 @@
+import contextlib
+import io
+
+import numpy as np
+
+from benchmarks.synthetic import empty_handle_series, generate_input
+from src.process_input import find_slot_ranges, process_input_data
+from src.read_input import validate_json
+from src.solve_model import generate_solution
+
+
+def test_slot_ranges():
+    """Ranges end at disallowed slots and around the last slot of the day."""
+    rows = [
+        # Two ranges, the second ending at a disallowed slot:
+        [0, 1, 1, 0, 2, 2, 3, 0, 0, 0],
+        # A range including the last slot (7) stays open after it:
+        [0, 0, 0, 0, 0, 1, 1, 1, 1, 0],
+        # A disallowed slot can start a range, ranges past the end of the
+        # day without a disallowed slot are dropped:
+        [3, 1, 0, 0, 0, 0, 0, 0, 0, 1],
+        # Padding outside the row doesn't end a range:
+        [1, 1, 0, 0, 0, 1, 1, 0, 0, 0],
+    ]
+    lengths = [10, 10, 10, 6]
+    availability = np.array(rows, np.int8).reshape(2, 2, 10)
+    in_row = (np.arange(10) < np.array(lengths)[:, np.newaxis]).reshape(
+        2, 2, 10
+    )
+    assert find_slot_ranges(availability, in_row, 8, [1, 2]) == [
+        [[1, 3], [4, 6]],
+        [[5, 8], [5, 9]],
+        [[0, 2]],
+        [[0, 2]],
+    ]
+
+
+def test_available_ranges():
+    """Availability as availableRanges is processed like availableSlots."""
+    results = []
+    for range_encoded in [False, True]:
+        input_json = generate_input(
+            num_agents=20, use_threes=True, range_encoded=range_encoded
+        )
+        validate_json(
+            input_json,
+            "support-shift-scheduler-input.schema.json",
+            "Input JSON",
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            results.append(
+                process_input_data(
+                    input_json, empty_handle_series(), empty_handle_series()
+                )
+            )
+    [[df_slots, categories_slots, _], [df_ranges, categories_ranges, _]] = (
+        results
+    )
+    assert df_ranges.equals(df_slots)
+    assert categories_ranges == categories_slots
+
+
+def test_mixed_availability_is_scheduled(tmp_path):
+    """Agents with availableRanges and 48-slot availableSlots mix."""
+    input_json = generate_input(
+        num_agents=6, num_days=1, range_encoded=True, seed=1
+    )
+    slots_json = generate_input(num_agents=6, num_days=1, seed=1)
+    for agent, slots_agent in zip(
+        input_json["agents"][::2], slots_json["agents"][::2]
+    ):
+        del agent["availableRanges"]
+        agent["availableSlots"] = [
+            day_slots[:48] for day_slots in slots_agent["availableSlots"]
+        ]
+    # Support ends with the shorter days:
+    input_json["options"]["endHour"] = 24
+    input_json["options"]["hoursCoverage"][0]["min_hours"] = 16
+    input_json["options"]["agentDistribution"][0]["end_hour"] = 24
+    validate_json(
+        input_json, "support-shift-scheduler-input.schema.json", "Input JSON"
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        [df_agents, agent_categories, config] = process_input_data(
+            input_json, empty_handle_series(), empty_handle_series()
+        )
+        config["output_folder"] = tmp_path
+        solution_info = generate_solution(df_agents, agent_categories, config)
+    assert solution_info["status"] == "OPTIMAL"
+    assert solution_info["verified_cost"] == solution_info["objective"]
+    assert (tmp_path / "support-shift-scheduler-output.json").exists()
@@ -0,0 +1,36 @@
+from benchmarks.replay import find_regressions
+
+
+def test_regressions_beyond_thresholds():
+    """Cost and time increases beyond the thresholds are regressions."""
+    old = {"build_time": 2.0, "solve_time": 10.0}
+    baseline = {
+        "results": {
+            "a": {**old, "objective": 100, "verified_cost": 100},
+            "b": {**old, "objective": 100, "verified_cost": 100},
+            "c": {**old, "objective": 100, "verified_cost": 100},
+        }
+    }
+    results = {
+        "results": {
+            # Within the thresholds, or below min_seconds:
+            "a": {
+                "build_time": 2.9,
+                "solve_time": 12.0,
+                "objective": 104,
+                "verified_cost": 104,
+            },
+            "b": {
+                "build_time": 4.0,
+                "solve_time": 10.0,
+                "objective": 110,
+                "verified_cost": 110,
+            },
+            "c": {**old, "objective": None, "verified_cost": None},
+        }
+    }
+    assert find_regressions(results, baseline, 0.05, 0.25, 1.0) == [
+        "b: cost 100 -> 110",
+        "b: build_time 2.00 s -> 4.00 s",
+        "c: no solution found",
+    ]
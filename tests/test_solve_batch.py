@@ -0,0 +1,9 @@
+from solve_batch import divide_cores
+
+
+def test_divide_cores():
+    """Cores are divided by model size, with at least one core per job."""
+    assert divide_cores([300, 100, 100], 8) == [4, 2, 2]
+    assert divide_cores([1000, 1], 4) == [3, 1]
+    assert sum(divide_cores([7, 5, 3, 2], 9)) == 9
+    assert divide_cores([10, 20, 30], 2) == [1, 1, 1]
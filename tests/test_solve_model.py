@@ -0,0 +1,52 @@
+import json
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+from src.solve_model import (
+    fetch_veteran_schedule,
+    find_solution_indices,
+    get_solution_values,
+    write_json_atomically,
+)
+from src.var_grid import VarGrid
+
+
+def test_json_is_replaced_atomically(tmp_path):
+    """A rewrite replaces the file, without leaving temporary files."""
+    path = tmp_path / "support-shift-scheduler-output.json"
+    write_json_atomically(path, [{"start_date": "2022-01-03", "shifts": []}])
+    write_json_atomically(path, [])
+    assert json.load(open(path)) == []
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]
+
+
+def test_automaton_shifts_are_read_in_batch():
+    """Runs of slots are read back as (handle, start, end), split at ends."""
+    model = cp_model.CpModel()
+    v_dsh = VarGrid(
+        {"day": range(2), "slot": range(16, 22), "handle": ["@a", "@b"]},
+        ["is_agent_on_slot", "is_shift_end"],
+    )
+    is_on = np.zeros(v_dsh.shape, int)
+    is_end = np.zeros(v_dsh.shape, int)
+    is_on[0, 1:3, 0] = 1
+    is_end[0, 2, 0] = 1
+    is_on[0, 4:, 0] = 1
+    is_end[0, 5, 0] = 1
+    # Back-to-back shifts:
+    is_on[1, :, 1] = 1
+    is_end[1, [2, 5], 1] = 1
+    for cell, value in np.ndenumerate(is_on):
+        if cell != (1, 0, 0):
+            v_dsh["is_agent_on_slot"][cell] = model.NewConstant(int(value))
+            v_dsh["is_shift_end"][cell] = model.NewConstant(int(is_end[cell]))
+    solver = cp_model.CpSolver()
+    solver.Solve(model)
+    config = {"veteran_formulation": "automaton", "num_days": 2}
+    var_veterans = {"dsh": v_dsh}
+    indices = find_solution_indices(var_veterans, None, config)
+    values = get_solution_values(solver, indices)
+    assert fetch_veteran_schedule(
+        values, indices, var_veterans, {"veterans": ["@a", "@b"]}, config
+    ) == [[("@a", 17, 19), ("@a", 20, 22)], [("@b", 16, 19), ("@b", 19, 22)]]
@@ -0,0 +1,26 @@
+from src.solver_profiles import get_solver_parameters, solver_profiles
+
+
+def test_solver_parameters():
+    """Options override the profile, and auto sizes to the run's cores."""
+    config = {
+        "solver_profiles": solver_profiles,
+        "solver_profile": "fast-preview",
+        "num_cores": 3,
+        "num_search_workers": None,
+        "random_seed": 5,
+        "relative_gap_limit": None,
+        "objective_cutoff": None,
+    }
+    parameters = get_solver_parameters(config)
+    assert parameters["num_search_workers"] == 8
+    assert parameters["random_seed"] == 5
+    assert parameters["relative_gap_limit"] == 0.05
+    assert parameters["objective_cutoff"] is None
+
+    config["solver_profile"] = "auto"
+    config["relative_gap_limit"] = 0.01
+    parameters = get_solver_parameters(config)
+    assert parameters["num_search_workers"] == 3
+    assert parameters["max_memory_in_mb"] > 0
+    assert parameters["relative_gap_limit"] == 0.01
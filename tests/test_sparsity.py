@@ -0,0 +1,48 @@
+import pandas as pd
+
+from src.sparsity import find_reachable_slots, find_shift_tracks
+
+config = {
+    "num_days": 2,
+    "start_slot": 16,
+    "end_slot": 50,
+    "min_duration": 4,
+    "max_shifts_per_agent_per_day": 2,
+    "sparse_model": True,
+}
+
+df_agents = pd.DataFrame(
+    {
+        "slot_ranges": [
+            # A range too short for a shift, and one holding two shifts:
+            [[[16, 18], [30, 38]], []],
+            # A single range reaching beyond the end of support hours:
+            [[], [[44, 54]]],
+        ]
+    },
+    index=["@a", "@b"],
+)
+
+
+def test_reachable_slots_lie_within_long_enough_ranges():
+    """Only slots in ranges that can hold a shift are reachable."""
+    reachable = find_reachable_slots(df_agents, ["@a", "@b"], 4, config)
+    assert reachable.shape == (2, 34, 2)
+    assert reachable[0, :, 0].nonzero()[0].tolist() == list(range(14, 22))
+    assert not reachable[1, :, 0].any()
+    assert reachable[1, :, 1].nonzero()[0].tolist() == list(range(28, 34))
+
+
+def test_shift_tracks_limited_by_available_ranges():
+    """Agents only get as many tracks as shifts fit into their day."""
+    num_tracks = find_shift_tracks(df_agents, ["@a", "@b"], config)
+    assert num_tracks.tolist() == [[2, 0], [0, 2]]
+
+
+def test_dense_model_keeps_everything():
+    """Without sparse_model, all slots and tracks are kept."""
+    dense_config = {**config, "sparse_model": False}
+    assert find_reachable_slots(df_agents, ["@a", "@b"], 4, dense_config).all()
+    assert (
+        find_shift_tracks(df_agents, ["@a", "@b"], dense_config) == 2
+    ).all()
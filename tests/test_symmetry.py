@@ -0,0 +1,81 @@
+import contextlib
+import copy
+import io
+
+import pytest
+from ortools.sat.python import cp_model
+
+from benchmarks.synthetic import empty_handle_series, generate_input
+from src.process_input import process_input_data
+from src.solve_model import setup_model
+from src.symmetry import find_equivalent_agents
+
+
+def setup_twins_input():
+    """Generate a small input in which two agents are interchangeable."""
+    input_json = generate_input(
+        num_agents=4, num_days=1, max_shifts_per_agent_per_day=2, seed=1
+    )
+    twin = copy.deepcopy(input_json["agents"][0])
+    twin["handle"] = "@twin"
+    twin["email"] = "twin@example.com"
+    input_json["agents"].append(twin)
+    return input_json
+
+
+def process_twins_input(options):
+    """Process the twins input, with the given options."""
+    input_json = setup_twins_input()
+    input_json["options"].update(options)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return process_input_data(
+            input_json, empty_handle_series(), empty_handle_series()
+        )
+
+
+def test_equivalent_agents_exclude_special_conditions():
+    """Twins are equivalent, unless one has special agent conditions."""
+    [df_agents, agent_categories, config] = process_twins_input({})
+    twins = [
+        agent_categories["veterans"].index(h)
+        for h in [df_agents.index[0], "@twin"]
+    ]
+    assert twins in find_equivalent_agents(df_agents, agent_categories, config)
+
+    config["special_agent_conditions"]["agentsMaxHoursShift"] = [
+        {"handle": "@twin", "value": 4}
+    ]
+    assert all(
+        twins[1] not in positions
+        for positions in find_equivalent_agents(
+            df_agents, agent_categories, config
+        )
+    )
+
+
+def test_symmetry_breaking_keeps_optimum():
+    """Symmetry breaking only rules out equivalent solutions."""
+    objectives = []
+    for symmetry_breaking in [False, True]:
+        [df_agents, agent_categories, config] = process_twins_input(
+            {"symmetryBreaking": symmetry_breaking}
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            [model, _, _, full_cost_list] = setup_model(
+                df_agents, agent_categories, config
+            )
+        model.Minimize(sum(full_cost_list))
+        solver = cp_model.CpSolver()
+        solver.parameters.num_search_workers = 8
+        assert solver.Solve(model) == cp_model.OPTIMAL
+        objectives.append(solver.ObjectiveValue())
+    assert objectives[0] == objectives[1]
+
+
+def test_symmetry_breaking_needs_intervals_formulation():
+    """Symmetry breaking is rejected with the other formulations."""
+    for formulation in ["patterns", "automaton"]:
+        with pytest.raises(SystemExit):
+            process_twins_input(
+                {"symmetryBreaking": True, "veteranFormulation": formulation}
+            )
@@ -0,0 +1,15 @@
+from benchmarks.tuning import score_candidates
+
+
+def test_score_candidates():
+    """Candidates are scored relative to the best, missing ones worst."""
+    scores = score_candidates(
+        [
+            # Per candidate, the objectives reached on three inputs:
+            [9.0, 0.0, None],
+            [19.0, None, None],
+            [4.0, 1.0, None],
+        ]
+    )
+    # Unsolved by all, the third input counts equally for everyone:
+    assert scores == [(2 + 1 + 2) / 3, (4 + 3 + 2) / 3, (1 + 2 + 2) / 3]
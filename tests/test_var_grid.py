@@ -0,0 +1,23 @@
+from src.var_grid import VarGrid
+
+
+def test_positional_and_label_access():
+    """Cells can be addressed by position as well as by label."""
+    grid = VarGrid(
+        {"day": range(2), "slot": range(16, 20), "handle": ["@a", "@b"]},
+        ["is_agent_on_slot"],
+    )
+    assert grid.shape == (2, 4, 2)
+    assert len(grid) == 16
+
+    grid["is_agent_on_slot"][1, grid.pos("slot", 18), 1] = "x"
+    assert grid.at("is_agent_on_slot", 1, 18, "@b") == "x"
+    assert grid["is_agent_on_slot"][1, 2, :].tolist() == [None, "x"]
+
+
+def test_values_skips_empty_cells():
+    """Only filled cells are returned when flattening a column."""
+    grid = VarGrid({"handle": ["@a", "@b", "@c"]}, ["total_week_slots"])
+    grid["total_week_slots"][0] = 1
+    grid["total_week_slots"][2] = 3
+    assert grid.values("total_week_slots") == [1, 3]
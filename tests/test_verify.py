@@ -0,0 +1,115 @@
+import contextlib
+import datetime
+import io
+
+import pandas as pd
+
+from benchmarks.synthetic import empty_handle_series, generate_input
+from src.process_input import process_input_data
+from src.solve_model import (
+    coefficients,
+    format_solution,
+    run_greedy_heuristic,
+)
+from src.verify import verify_schedule, verify_veteran_schedule
+
+
+def test_edited_schedule():
+    """The greedy schedule is valid, and edits are reported."""
+    input_json = generate_input(
+        num_agents=20, max_shifts_per_agent_per_day=2, seed=1
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        [df_agents, agent_categories, config] = process_input_data(
+            input_json, empty_handle_series(), empty_handle_series()
+        )
+        [schedule, _] = run_greedy_heuristic(
+            df_agents, agent_categories, config
+        )
+        [sol_shifts, _, _] = format_solution(
+            schedule, None, None, df_agents, agent_categories, config
+        )
+    summary = verify_schedule(
+        sol_shifts, coefficients, df_agents, agent_categories, config
+    )
+    assert summary["valid"]
+    assert all(h_cover["met"] for h_cover in summary["coverage"])
+
+    # Move a shift before the support hours, and remove one:
+    shift = sol_shifts[0]["shifts"][0]
+    sol_shifts[0]["shifts"][0] = {**shift, "start": 0, "end": 4}
+    sol_shifts[1]["shifts"].pop()
+    summary = verify_schedule(
+        sol_shifts, coefficients, df_agents, agent_categories, config
+    )
+    assert not summary["valid"]
+    assert [violation["slot"] for violation in summary["violations"]] == [
+        0,
+        1,
+        2,
+        3,
+    ]
+    assert not all(h_cover["met"] for h_cover in summary["coverage"][:2])
+
+
+def verify_two_agents(schedule):
+    """Verify a one-day schedule of @a (54 slots) and @b (48 slots)."""
+    df_agents = pd.DataFrame(
+        {
+            "slots": [
+                [[0] * 16 + [1] * 30 + [2] * 4 + [0] * 4],
+                [[0] * 16 + [2] * 4 + [1] * 28],
+            ],
+            "ideal_shift_length": [8, 6],
+            "fair_share": [10, 20],
+            "is_support_engineer": [0, 0],
+        },
+        index=["@a", "@b"],
+    )
+    config = {
+        "num_days": 1,
+        "days": [datetime.date(2022, 1, 3)],
+        "start_slot": 16,
+        "end_slot": 50,
+        "allowed_availabilities": [1, 2],
+        "hours_coverage": [],
+        "agent_distribution": [],
+    }
+    return verify_veteran_schedule(
+        schedule,
+        coefficients,
+        df_agents,
+        {"veterans": ["@a", "@b"]},
+        config,
+    )
+
+
+def test_cost_terms_of_fixed_schedule():
+    """Each cost term matches a calculation by hand."""
+    summary = verify_two_agents(
+        [[("@a", 16, 22), ("@a", 40, 48), ("@b", 16, 28)]]
+    )
+    assert summary["valid"]
+    assert summary["costs"] == {
+        # Slots 46-47 of @a and 16-19 of @b have preference level 2:
+        "slot": 2 * 6,
+        # @a is 2 slots short of 8 in the first shift, @b 6 slots over 6:
+        "shift_length": 2 * 2 + 2 * 6,
+        # @a has 14 slots, 4 over the fair share of 10:
+        "fair_share": 4**2,
+        # @a has a second shift:
+        "multiple_shifts": 2,
+    }
+    assert summary["total_cost"] == 46
+
+
+def test_ragged_availability():
+    """Days with fewer slots (availableSlots) mix with 54-slot ones."""
+    summary = verify_two_agents([[("@a", 42, 50), ("@b", 40, 48)]])
+    assert summary["valid"]
+    # Slots past the end of a shorter day are unavailable:
+    summary = verify_two_agents([[("@b", 42, 50)]])
+    assert [violation["slot"] for violation in summary["violations"]] == [
+        48,
+        49,
+    ]
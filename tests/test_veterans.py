@@ -0,0 +1,194 @@
+import contextlib
+import io
+
+import pandas as pd
+from ortools.sat.python import cp_model
+
+from benchmarks.synthetic import empty_handle_series, generate_input
+from src.custom_var_domains import define_custom_var_domains
+from src.process_input import process_input_data
+from src.solve_model import coefficients, setup_model
+from src.veterans import (
+    cost_total_agent_hours_for_week,
+    define_weekly_and_daily_relationships_veterans,
+    fill_weekly_and_daily_vars_veterans,
+    find_prefix_slot_costs,
+    setup_weekly_and_daily_var_grids_veterans,
+    week_working_slots,
+)
+
+
+def find_fair_share_costs(encoding, fair_share):
+    """Solve for the fair share cost of every feasible weekly total."""
+    agent_categories = {"veterans": ["@a"]}
+    df_agents = pd.DataFrame(
+        {"fair_share": [fair_share], "slot_ranges": [[]]}, index=["@a"]
+    )
+    config = {
+        "num_days": 0,
+        "start_slot": 16,
+        "end_slot": 50,
+        "max_shifts_per_agent_per_day": 2,
+        "allowed_availabilities": [1],
+        "min_duration": 4,
+        "max_duration": 16,
+        "min_fair_share": fair_share,
+        "fair_share_encoding": encoding,
+    }
+    costs = {}
+    for total in range(week_working_slots + 1):
+        model = cp_model.CpModel()
+        custom_domains = define_custom_var_domains(
+            coefficients, df_agents, config
+        )
+        var_veterans = setup_weekly_and_daily_var_grids_veterans(
+            agent_categories, config
+        )
+        fill_weekly_and_daily_vars_veterans(
+            model, custom_domains, var_veterans, agent_categories, config
+        )
+        define_weekly_and_daily_relationships_veterans(
+            model, var_veterans, df_agents, agent_categories, config
+        )
+        cost_total_agent_hours_for_week(
+            model,
+            var_veterans,
+            coefficients,
+            df_agents,
+            agent_categories,
+            config,
+        )
+        model.Add(var_veterans["h"]["total_week_slots"][0] == total)
+        solver = cp_model.CpSolver()
+        if solver.Solve(model) == cp_model.OPTIMAL:
+            costs[total] = solver.Value(
+                var_veterans["h"]["total_week_slots_cost"][0]
+            )
+    return costs
+
+
+def test_fair_share_encodings_agree():
+    """All encodings of the fair share cost allow the same costs."""
+    for fair_share in [0, 30, 79]:
+        costs = find_fair_share_costs("multiplication", fair_share)
+        for encoding in ["element", "tangents"]:
+            assert find_fair_share_costs(encoding, fair_share) == costs
+        assert costs[week_working_slots - 1] == (
+            coefficients["fair_share"]
+            * (week_working_slots - 1 - fair_share) ** 2
+        )
+
+
+def find_optimum(options, num_agents=4):
+    """Solve a small synthetic input to optimality, with the given options."""
+    input_json = generate_input(
+        num_agents=num_agents,
+        num_days=1,
+        max_shifts_per_agent_per_day=2,
+        seed=1,
+    )
+    input_json["options"].update(options)
+    with contextlib.redirect_stdout(io.StringIO()):
+        [df_agents, agent_categories, config] = process_input_data(
+            input_json, empty_handle_series(), empty_handle_series()
+        )
+        [model, _, _, full_cost_list] = setup_model(
+            df_agents, agent_categories, config
+        )
+    model.Minimize(sum(full_cost_list))
+    solver = cp_model.CpSolver()
+    solver.parameters.num_search_workers = 8
+    assert solver.Solve(model) == cp_model.OPTIMAL
+    return solver.ObjectiveValue()
+
+
+def test_duration_cost_encodings_agree():
+    """Both encodings of the duration cost reach the same optimum."""
+    assert find_optimum({"durationCostEncoding": "element"}) == find_optimum(
+        {"durationCostEncoding": "reified"}
+    )
+
+
+def test_prefix_slot_costs():
+    """A shift costs the difference of the prefix sums at its end and start."""
+    config = {"start_slot": 2, "end_slot": 6, "allowed_availabilities": [1, 2]}
+    # Slots outside support hours and disallowed slots cost nothing:
+    prefix_slot_costs = find_prefix_slot_costs(
+        coefficients, [2, 2, 1, 2, 0, 2, 2], config
+    )
+    assert len(prefix_slot_costs) == 8
+    assert prefix_slot_costs[6] - prefix_slot_costs[2] == (
+        2 * coefficients["non_preferred"]
+    )
+    assert prefix_slot_costs[4] - prefix_slot_costs[3] == (
+        coefficients["non_preferred"]
+    )
+
+
+def test_slot_cost_encodings_agree():
+    """Both encodings of the slot cost reach the same optimum."""
+    assert find_optimum({"slotCostEncoding": "prefix_sums"}) == find_optimum(
+        {"slotCostEncoding": "per_slot"}
+    )
+
+
+def test_agent_distribution_encodings_agree():
+    """Both encodings of agentDistribution reach the same optimum."""
+    # Overlapping windows of different bounds:
+    agent_distribution = [
+        {"start_hour": 8, "end_hour": 12, "max_agents": 2},
+        {"start_hour": 12, "end_hour": 20, "max_agents": 3},
+        {"start_hour": 14, "end_hour": 18, "min_support_engineers": 1},
+        {"start_hour": 20, "end_hour": 25, "max_agents": 2},
+    ]
+    options = {
+        "agentDistribution": [
+            {
+                "start_day": 0,
+                "end_day": 0,
+                "min_agents": 1,
+                "max_agents": 4,
+                **a_distribution,
+            }
+            for a_distribution in agent_distribution
+        ],
+        "maxShiftsPerAgentPerDay": 1,
+    }
+    assert find_optimum(
+        {**options, "agentDistributionEncoding": "cumulative"}, 10
+    ) == find_optimum({**options, "agentDistributionEncoding": "slots"}, 10)
+
+
+def find_late_shift_optimum(encoding):
+    """Solve with a shift running past end_slot, as some availability does."""
+    input_json = generate_input(
+        num_agents=4, num_days=1, max_shifts_per_agent_per_day=2, seed=1
+    )
+    input_json["options"]["hoursCoverageEncoding"] = encoding
+    # endHour is 25, i.e. end_slot 50, but the rows have 54 slots:
+    input_json["agents"][0]["availableSlots"][0] = [0] * 42 + [1] * 11 + [0]
+    with contextlib.redirect_stdout(io.StringIO()):
+        [df_agents, agent_categories, config] = process_input_data(
+            input_json, empty_handle_series(), empty_handle_series()
+        )
+        [model, var_veterans, _, full_cost_list] = setup_model(
+            df_agents, agent_categories, config
+        )
+    i = agent_categories["veterans"].index("@agent-000")
+    model.Add(var_veterans["dhk"]["shift_end"][0, i, 0] == 53)
+    model.Add(var_veterans["dhk"]["shift_duration"][0, i, 0] == 11)
+    model.Minimize(sum(full_cost_list))
+    solver = cp_model.CpSolver()
+    solver.parameters.num_search_workers = 8
+    assert solver.Solve(model) == cp_model.OPTIMAL
+    return solver.ObjectiveValue()
+
+
+def test_hours_coverage_encodings_agree():
+    """All encodings of hoursCoverage reach the same optimum."""
+    optimum = find_optimum({"hoursCoverageEncoding": "slots"})
+    late_shift_optimum = find_late_shift_optimum("slots")
+    for encoding in ["durations", "durations_linked"]:
+        assert find_optimum({"hoursCoverageEncoding": encoding}) == optimum
+        # Only the slots up to end_slot count towards coverage:
+        assert find_late_shift_optimum(encoding) == late_shift_optimum
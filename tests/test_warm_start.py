@@ -0,0 +1,50 @@
+from src.warm_start import is_day_schedulable, read_previous_shifts
+
+config = {"max_shifts_per_agent_per_day": 2}
+
+
+def make_output(start_date, shifts):
+    """Build a single-day scheduler output from (handle, start, end)."""
+    return [
+        {
+            "start_date": start_date,
+            "shifts": [
+                {"agent": f"{h} <{h[1:]}@example.com>", "start": s, "end": e}
+                for h, s, e in shifts
+            ],
+        }
+    ]
+
+
+def test_later_outputs_override_agent_days():
+    """A later (e.g. manual) output replaces an agent's shifts on its days."""
+    last_week = make_output("2022-01-03", [("@a", 16, 24), ("@b", 24, 32)])
+    manual = make_output("2022-01-10", [("@a", 30, 36)])
+    [previous_shifts, weekdays, handles] = read_previous_shifts(
+        [last_week, manual]
+    )
+    assert weekdays == {0}
+    assert handles == {"@a", "@b"}
+    assert previous_shifts == {(0, "@a"): [(30, 36)], (0, "@b"): [(24, 32)]}
+
+
+def test_day_schedulable_within_availability():
+    """Shifts must have allowed durations and fit the available ranges."""
+    allowed_durations = {4: 0, 6: 0, 8: 0}
+    slot_ranges = [[16, 26], [30, 40]]
+    assert is_day_schedulable([], allowed_durations, slot_ranges, config)
+    assert is_day_schedulable(
+        [(16, 22), (32, 36)], allowed_durations, slot_ranges, config
+    )
+    # Beyond the end of an available range:
+    assert not is_day_schedulable(
+        [(20, 28)], allowed_durations, slot_ranges, config
+    )
+    # Duration not allowed:
+    assert not is_day_schedulable(
+        [(16, 21)], allowed_durations, slot_ranges, config
+    )
+    # Touching shifts:
+    assert not is_day_schedulable(
+        [(16, 20), (20, 24)], allowed_durations, [[16, 26]], config
+    )